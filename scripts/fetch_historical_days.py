@@ -1,50 +1,17 @@
-from ib_insync import *
-import pandas as pd
-import os
-from datetime import datetime, timedelta
-
-ib = IB()
-ib.connect("127.0.0.1", 7497, clientId=5)
-
-contracts = ib.reqContractDetails(Future(symbol="MES", exchange="CME"))
-mes = contracts[0].contract
-
-# Generate last n weekdays (excluding weekends)
-def get_past_trading_days(n):
-    today = datetime.now()
-    dates = []
-    while len(dates) < n:
-        today -= timedelta(days=1)
-        if today.weekday() < 5:
-            dates.append(today.strftime("%Y%m%d"))
-    return dates
+"""
+Download the last 100 MES trade dates into the bar store.
 
-dates = get_past_trading_days(100)
-
-os.makedirs("data", exist_ok=True)
-
-for date in dates:
-    file_path = f"data/MES_{date}.csv"
-    if os.path.exists(file_path):
-        print(f"⚠️ Already exists: MES_{date}.csv, skipping.")
-        continue
-
-    bars = ib.reqHistoricalData(
-        mes,
-        endDateTime=f"{date} 23:59:59",
-        durationStr="1 D",
-        barSizeSetting="1 min",
-        whatToShow="TRADES",
-        useRTH=False,
-        formatDate=1
-    )
+Thin wrapper around src/downloader.py (also available as `python -m src fetch`);
+run from the repository root, e.g.
+    python scripts/fetch_historical_days.py --days 100 --csv-dir data/
+"""
+import os
+import sys
 
-    if not bars:
-        print(f"❌ No data for {date}, skipping.")
-        continue
+# Run directly, sys.path holds scripts/ rather than the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    df = util.df(bars)
-    df.to_csv(file_path, index=False)
-    print(f"✅ Saved: MES_{date}.csv")
+from src.downloader import main
 
-ib.disconnect()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""python -m src <command> ..."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,357 @@
+"""
+Streaming tick-to-bar aggregation.
+
+Ticks (time, price, size) or fine-grained bars (e.g. IB 5-second bars) are
+read chunk by chunk and rolled up into bars of any size: time bars such as
+1s/5s/15s/1min, or volume bars of a fixed number of contracts. Only the
+current chunk and the unfinished last bar are held in memory; finished bars
+are regrouped into whole Globex sessions that can go straight into the
+signal and backtest stages, or into a BarStore.
+
+Bars have the IB CSV schema (date, open, high, low, close, volume, average,
+barCount). Time bars are stamped with the start of their period, as IB
+stamps its bars; volume bars with the time of their first record.
+"""
+import argparse
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest import simulate_trades
+from .config import VWAPConfig
+from .indicators import NS_PER_DAY, segment_starts, session_ids
+from .metrics import evaluate_performance
+from .signals import compute_vwap_zscore_signals
+from .store import BAR_COLUMNS, BarStore
+
+# Columnar records the aggregators work on: one row per tick or input bar.
+# 'date' is int64 UTC nanoseconds; 'pv' is price x volume, kept so 'average' stays volume-weighted.
+RECORD_FIELDS = ('date', 'open', 'high', 'low', 'close', 'volume', 'pv', 'barCount')
+
+Records = Dict[str, np.ndarray]
+
+DEFAULT_CHUNKSIZE = 500_000
+
+_UNITS = {'s': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+          'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+          'h': 3600, 'hour': 3600, 'hours': 3600}
+
+
+def _parse_times(values: pd.Series, unit: Optional[str] = None) -> np.ndarray:
+    """Timestamps (ISO strings with offset, or epoch numbers in `unit`) as int64 UTC nanoseconds."""
+    if pd.api.types.is_numeric_dtype(values):
+        dates = pd.to_datetime(values, unit=unit or 's', utc=True)
+    else:
+        dates = pd.to_datetime(values, utc=True, format='ISO8601')
+    return pd.DatetimeIndex(dates).as_unit('ns').asi8
+
+
+def ticks_to_records(ns: np.ndarray, price: np.ndarray, size: np.ndarray) -> Records:
+    """One record per trade: a one-tick bar."""
+    price = np.asarray(price, dtype=np.float64)
+    size = np.asarray(size, dtype=np.float64)
+    return {'date': np.asarray(ns, dtype=np.int64), 'open': price, 'high': price, 'low': price, 'close': price,
+            'volume': size, 'pv': price * size, 'barCount': np.ones(len(price), dtype=np.int64)}
+
+
+def bars_to_records(df: pd.DataFrame, time_unit: Optional[str] = None) -> Records:
+    """Records from a bar frame; 'average' and 'barCount' are optional."""
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    price = df['average'] if 'average' in df.columns else df['close']
+    return {
+        'date': _parse_times(df['date'], time_unit),
+        'open': df['open'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'volume': volume,
+        'pv': price.to_numpy(dtype=np.float64) * volume,
+        'barCount': df['barCount'].to_numpy(dtype=np.int64) if 'barCount' in df.columns
+        else np.ones(len(df), dtype=np.int64),
+    }
+
+
+def read_ticks(path: str, chunksize: int = DEFAULT_CHUNKSIZE, time_col: str = 'time', price_col: str = 'price',
+               size_col: str = 'size', time_unit: Optional[str] = None) -> Iterator[Records]:
+    """
+    Read a tick CSV in chunks of `chunksize` rows, oldest first.
+
+    Args:
+        path: CSV with one trade per row
+        time_col, price_col, size_col: Column names of the trade fields
+        time_unit: Unit of numeric epoch timestamps ('s', 'ms', 'us', 'ns'); ISO strings need none
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=[time_col, price_col, size_col]):
+        yield ticks_to_records(_parse_times(chunk[time_col], time_unit), chunk[price_col], chunk[size_col])
+
+
+def read_bars(path: str, chunksize: int = DEFAULT_CHUNKSIZE, time_unit: Optional[str] = None) -> Iterator[Records]:
+    """Read a bar CSV (IB schema, e.g. 5-second bars) in chunks of `chunksize` rows."""
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield bars_to_records(chunk, time_unit)
+
+
+def _empty_records() -> Records:
+    return {name: np.empty(0, dtype=np.int64 if name in ('date', 'barCount') else np.float64)
+            for name in RECORD_FIELDS}
+
+
+def _concat(a: Optional[Records], b: Records) -> Records:
+    if a is None:
+        return b
+    return {name: np.concatenate((a[name], b[name])) for name in RECORD_FIELDS}
+
+
+def _reduce(records: Records, starts: np.ndarray, stop: int) -> Records:
+    """Roll records[:stop] up into one bar per group beginning at `starts`."""
+    if len(starts) == 0:
+        return _empty_records()
+    last = np.append(starts[1:], stop) - 1
+    return {
+        'date': records['date'][starts],
+        'open': records['open'][starts],
+        'high': np.maximum.reduceat(records['high'][:stop], starts),
+        'low': np.minimum.reduceat(records['low'][:stop], starts),
+        'close': records['close'][last],
+        'volume': np.add.reduceat(records['volume'][:stop], starts),
+        'pv': np.add.reduceat(records['pv'][:stop], starts),
+        'barCount': np.add.reduceat(records['barCount'][:stop], starts),
+    }
+
+
+class BarAggregator:
+    """
+    Incremental roll-up of records into bars.
+
+    `update()` takes one chunk of records and returns the bars it completed;
+    the last, possibly unfinished bar is carried over as a single record
+    (open/high/low/close/volume combine the same way whatever the split),
+    so output does not depend on how the input is chunked. `flush()`
+    returns that final bar at the end of the stream.
+
+    Subclasses define where bars end in `_bar_starts`.
+    """
+
+    label = 'bars'
+
+    def __init__(self, tz: str = "America/Chicago"):
+        self.tz = tz
+        self._pending: Optional[Records] = None
+
+    def _bar_starts(self, records: Records) -> Tuple[np.ndarray, int]:
+        """(first record of every bar, number of records in finished bars)."""
+        raise NotImplementedError
+
+    def _stamp(self, date: np.ndarray) -> np.ndarray:
+        """Timestamp of each bar from the time of its first record."""
+        return date
+
+    def _frame(self, bars: Records) -> pd.DataFrame:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average = np.where(bars['volume'] > 0, bars['pv'] / bars['volume'], bars['close'])
+        return pd.DataFrame({
+            'date': pd.to_datetime(self._stamp(bars['date']), utc=True).tz_convert(self.tz),
+            **{name: bars[name] for name in ('open', 'high', 'low', 'close', 'volume')},
+            'average': average,
+            'barCount': bars['barCount'],
+        }, columns=list(BAR_COLUMNS))
+
+    def update(self, records: Records) -> pd.DataFrame:
+        """Consume one chunk of records (time-ordered) and return the bars it completed."""
+        records = _concat(self._pending, records)
+        n = len(records['date'])
+        if n == 0:
+            self._pending = None
+            return self._frame(_empty_records())
+        starts, done = self._bar_starts(records)
+        finished = starts[starts < done]
+        if done < n:
+            self._pending = _reduce({name: values[done:] for name, values in records.items()},
+                                    np.zeros(1, dtype=np.int64), n - done)
+        else:
+            self._pending = None
+        return self._frame(_reduce(records, finished, done))
+
+    def flush(self) -> pd.DataFrame:
+        """Return the unfinished last bar (if any) and clear it."""
+        pending, self._pending = self._pending, None
+        return self._frame(pending if pending is not None else _empty_records())
+
+    def aggregate(self, chunks: Iterable[Records]) -> Iterator[pd.DataFrame]:
+        """Yield non-empty frames of finished bars for a stream of record chunks, ending with the flush."""
+        for chunk in chunks:
+            bars = self.update(chunk)
+            if len(bars):
+                yield bars
+        bars = self.flush()
+        if len(bars):
+            yield bars
+
+
+class TimeBarAggregator(BarAggregator):
+    """
+    Fixed-duration bars aligned to the epoch (and so to every Globex session
+    open, for durations that divide an hour). Periods without records produce no bar.
+    """
+
+    def __init__(self, seconds: float, tz: str = "America/Chicago"):
+        super().__init__(tz)
+        self.period_ns = int(round(seconds * 1e9))
+        if self.period_ns <= 0:
+            raise ValueError(f"Bar duration must be positive, got {seconds}s")
+        self.label = f"{seconds:g}s" if seconds < 60 or seconds % 60 else f"{seconds // 60:g}min"
+
+    def _stamp(self, date):
+        return date // self.period_ns * self.period_ns
+
+    def _bar_starts(self, records):
+        bucket = records['date'] // self.period_ns
+        starts = np.flatnonzero(segment_starts(bucket))
+        # The last bucket may continue in the next chunk
+        return starts, starts[-1]
+
+
+class VolumeBarAggregator(BarAggregator):
+    """
+    Bars closing on the record that brings their volume to at least
+    `bar_volume`, or on the last record of a session. Records are not split,
+    so a bar can exceed `bar_volume` by up to one record's volume.
+    """
+
+    def __init__(self, bar_volume: float, config: VWAPConfig = VWAPConfig()):
+        super().__init__(config.session_tz)
+        if bar_volume <= 0:
+            raise ValueError(f"Bar volume must be positive, got {bar_volume}")
+        self.bar_volume = bar_volume
+        self.session_start = config.session_start
+        self.label = f"{bar_volume:g}v"
+
+    def _bar_starts(self, records):
+        n = len(records['date'])
+        cum = np.cumsum(records['volume'])
+        sessions = session_ids(pd.to_datetime(records['date'], utc=True), self.session_start, self.tz)
+        bounds = np.append(np.flatnonzero(segment_starts(sessions)), n)
+        session_last = bounds[np.searchsorted(bounds, np.arange(n), side='right')] - 1
+
+        # Jump from bar to bar; the loop runs once per bar, not per record
+        starts = []
+        j = 0
+        while j < n:
+            starts.append(j)
+            base = cum[j - 1] if j else 0.0
+            full = int(np.searchsorted(cum, base + self.bar_volume))
+            if full >= n and session_last[j] == n - 1:
+                break
+            j = min(full, session_last[j]) + 1
+        return np.asarray(starts, dtype=np.int64), j
+
+
+def make_aggregator(bar_size: str, config: VWAPConfig = VWAPConfig()) -> BarAggregator:
+    """
+    Aggregator for a bar size such as '5s', '15 secs', '1 min', '1min' or '500v' (volume bars).
+    """
+    spec = bar_size.strip().lower()
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(v|vol|volume)", spec)
+    if match:
+        return VolumeBarAggregator(float(match.group(1)), config)
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([a-z]+)", spec)
+    if not match or match.group(2) not in _UNITS:
+        raise ValueError(f"Unknown bar size: {bar_size!r}")
+    return TimeBarAggregator(float(match.group(1)) * _UNITS[match.group(2)], config.session_tz)
+
+
+def session_frames(bar_frames: Iterable[pd.DataFrame],
+                   config: VWAPConfig = VWAPConfig()) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Regroup a stream of bar frames into whole sessions.
+
+    Yields (trade date 'YYYYMMDD', bars) once a session is complete, so at
+    most one session of bars is buffered.
+    """
+    buffered = []
+    current = None
+    for bars in bar_frames:
+        if not len(bars):
+            continue
+        sessions = session_ids(bars['date'], config.session_start, config.session_tz)
+        bounds = np.append(np.flatnonzero(segment_starts(sessions)), len(bars))
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if sessions[a] != current:
+                if buffered:
+                    yield _trade_date(current), pd.concat(buffered, ignore_index=True)
+                buffered = []
+                current = sessions[a]
+            buffered.append(bars.iloc[a:b])
+    if buffered:
+        yield _trade_date(current), pd.concat(buffered, ignore_index=True)
+
+
+def _trade_date(session: int) -> str:
+    # A session opening on the evening of day D belongs to trade date D + 1
+    return pd.Timestamp((int(session) + 1) * NS_PER_DAY).strftime("%Y%m%d")
+
+
+def backtest_sessions(days: Iterable[Tuple[str, pd.DataFrame]], config: VWAPConfig = VWAPConfig(),
+                      equity_start: float = 5000, **trade_kwargs) -> pd.DataFrame:
+    """
+    Signals and trades session by session, carrying equity forward as multi_day_backtest does.
+
+    Returns:
+        Trade log with a 'day' column
+    """
+    equity = equity_start
+    logs = []
+    for day, bars in days:
+        signals = compute_vwap_zscore_signals(bars, config, copy=False)
+        trades = simulate_trades(signals, equity_start=equity, **trade_kwargs)
+        if not trades.empty:
+            trades['day'] = day
+            logs.append(trades)
+            equity += trades['pnl'].sum()
+    return pd.concat(logs, ignore_index=True) if logs else pd.DataFrame()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate ticks or fine bars into bars, chunk by chunk")
+    parser.add_argument('path', help="Tick CSV (time, price, size) or bar CSV")
+    parser.add_argument('--input', choices=['ticks', 'bars'], default='ticks')
+    parser.add_argument('--bar-size', default='5s', help="e.g. 1s, 5s, 15s, 1min, 500v (volume bars)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--time-unit', default=None, help="Unit of numeric epoch timestamps (s, ms, us, ns)")
+    parser.add_argument('--symbol', default='MES')
+    parser.add_argument('--out-dir', default=None, help="Write one SYMBOL_<bar size>_YYYYMMDD.csv per session")
+    parser.add_argument('--store', default=None, help="Ingest sessions into a BarStore under this root")
+    parser.add_argument('--backtest', action='store_true', help="Run signals and trades on the bars")
+    args = parser.parse_args(argv)
+
+    aggregator = make_aggregator(args.bar_size)
+    if args.input == 'ticks':
+        chunks = read_ticks(args.path, args.chunksize, time_unit=args.time_unit)
+    else:
+        chunks = read_bars(args.path, args.chunksize, args.time_unit)
+    store = BarStore(args.store, f"{args.symbol}_{aggregator.label}") if args.store else None
+
+    def sessions():
+        for day, bars in session_frames(aggregator.aggregate(chunks)):
+            if args.out_dir:
+                bars.to_csv(f"{args.out_dir.rstrip('/')}/{args.symbol}_{aggregator.label}_{day}.csv", index=False)
+            if store is not None:
+                store.ingest_frame(day, bars)
+            print(f"✅ {day}: {len(bars)} {aggregator.label} bars")
+            yield day, bars
+
+    if args.backtest:
+        trades = backtest_sessions(sessions())
+        if trades.empty:
+            print("⚠️ No trades")
+        else:
+            evaluate_performance(trades)
+    else:
+        for _ in sessions():
+            pass
+
+
+if __name__ == "__main__":
+    main()
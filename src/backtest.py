@@ -1,6 +1,318 @@
+import numpy as np
 import pandas as pd
 
-def simulate_trades(df: pd.DataFrame, equity_start: float = 5000, risk_pct: float = 0.01, multiplier: float = 5, cooldown_bars: int = 10, max_contracts=5):
+from . import instrumentation
+from .indicators import atr as average_true_range, valid_rows
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the pure-Python kernel
+    njit = None
+
+COMMISSION_PER_CONTRACT = 1.25  # USD per round-trip
+SLIPPAGE_PER_CONTRACT = 0.15    # in points
+
+TRADE_COLUMNS = ['type', 'entry_time', 'entry_price', 'exit_time', 'exit_price',
+                 'contracts', 'pnl', 'pnl_usd', 'result', 'equity_after']
+
+# Integer codes used by the array kernel for trade side and exit reason
+LONG, SHORT = 1, -1
+STOP_LOSS, TAKE_PROFIT = 0, 1
+
+
+def _trade_kernel(close, high, low, atr, long_signal, short_signal, tp_first,
+                  equity_start, risk_pct, multiplier, cooldown_bars, max_contracts,
+                  commission_per_contract, slippage_per_contract,
+                  side, entry_idx, exit_idx, entry_price, exit_price,
+                  contracts_out, pnl_out, pnl_usd_out, result_out, equity_out):
+    """
+    Entry/SL/TP/cooldown state machine over plain arrays.
+
+    Mirrors the bar-by-bar logic of the legacy loop exactly and writes each
+    closed trade into the preallocated output arrays. A bar that touches
+    both stop and target fills at the stop unless `tp_first` is set for it.
+
+    Returns:
+        Number of trades written
+    """
+    n_trades = 0
+    pos_side = 0
+    pos_entry_idx = 0
+    pos_entry_price = 0.0
+    pos_sl = 0.0
+    pos_tp = 0.0
+    pos_contracts = 0
+    cooldown = 0
+    equity = equity_start
+    commission_points = commission_per_contract / multiplier
+
+    for i in range(len(close) - 1):
+        if pos_side == 0 and cooldown == 0:
+            risk_per_trade = equity * risk_pct
+            a = atr[i]
+            point_risk = max(a * 0.8, 0.5)
+            usd_risk_per_contract = point_risk * multiplier
+
+            if point_risk <= 0 or point_risk != point_risk:
+                continue
+
+            contracts = min(int(risk_per_trade // usd_risk_per_contract), max_contracts)
+            if contracts == 0:
+                continue
+
+            if long_signal[i]:
+                pos_side = LONG
+                pos_sl = close[i] - point_risk
+                pos_tp = close[i] + a * 2.4
+            elif short_signal[i]:
+                pos_side = SHORT
+                pos_sl = close[i] + point_risk
+                pos_tp = close[i] - a * 2.4
+            else:
+                continue
+            pos_entry_idx = i
+            pos_entry_price = close[i]
+            pos_contracts = contracts
+
+        elif pos_side != 0:
+            h = high[i + 1]
+            l = low[i + 1]
+
+            if pos_side == LONG:
+                if l <= pos_sl and not (h >= pos_tp and tp_first[i + 1]):
+                    fill = pos_sl
+                    result = STOP_LOSS
+                elif h >= pos_tp:
+                    fill = pos_tp
+                    result = TAKE_PROFIT
+                else:
+                    continue
+                pnl_points = fill - pos_entry_price
+            else:
+                if h >= pos_sl and not (l <= pos_tp and tp_first[i + 1]):
+                    fill = pos_sl
+                    result = STOP_LOSS
+                elif l <= pos_tp:
+                    fill = pos_tp
+                    result = TAKE_PROFIT
+                else:
+                    continue
+                pnl_points = pos_entry_price - fill
+
+            pnl_net = pnl_points - (slippage_per_contract + commission_points) * pos_contracts
+            pnl_usd = pnl_net * pos_contracts * multiplier
+            equity += pnl_usd
+
+            side[n_trades] = pos_side
+            entry_idx[n_trades] = pos_entry_idx
+            exit_idx[n_trades] = i + 1
+            entry_price[n_trades] = pos_entry_price
+            exit_price[n_trades] = fill
+            contracts_out[n_trades] = pos_contracts
+            pnl_out[n_trades] = pnl_net
+            pnl_usd_out[n_trades] = pnl_usd
+            result_out[n_trades] = result
+            equity_out[n_trades] = equity
+            n_trades += 1
+
+            pos_side = 0
+            cooldown = cooldown_bars
+
+        else:
+            cooldown = max(0, cooldown - 1)
+
+    return n_trades
+
+
+_compiled_kernel = njit(cache=True)(_trade_kernel) if njit is not None else None
+
+
+def simulate_trades_arrays(close, high, low, atr, long_signal, short_signal,
+                           equity_start: float = 5000, risk_pct: float = 0.01,
+                           multiplier: float = 5, cooldown_bars: int = 10, max_contracts=5,
+                           commission_per_contract: float = COMMISSION_PER_CONTRACT,
+                           slippage_per_contract: float = SLIPPAGE_PER_CONTRACT,
+                           tp_first=None) -> dict:
+    """
+    Run the trade state machine on NumPy arrays.
+
+    Args:
+        close, high, low, atr: float arrays of equal length (no NaN in atr)
+        long_signal, short_signal: boolean entry signal arrays
+        equity_start: Starting equity in USD
+        risk_pct: Fraction of equity risked per trade
+        multiplier: Contract point value in USD
+        cooldown_bars: Bars to wait after an exit before re-entering
+        max_contracts: Position size cap
+        tp_first: Optional boolean array marking bars on which the target was
+            touched before the stop; by default the stop wins on such bars
+
+    Returns:
+        Dict of columnar trade arrays ('side', 'entry_idx', 'exit_idx',
+        'entry_price', 'exit_price', 'contracts', 'pnl', 'pnl_usd',
+        'result', 'equity_after'), trimmed to the number of trades
+    """
+    n = len(close)
+    # Every trade needs at least an entry bar and a later exit bar
+    capacity = n // 2 + 1
+    out = {
+        'side': np.zeros(capacity, dtype=np.int8),
+        'entry_idx': np.zeros(capacity, dtype=np.int64),
+        'exit_idx': np.zeros(capacity, dtype=np.int64),
+        'entry_price': np.zeros(capacity, dtype=np.float64),
+        'exit_price': np.zeros(capacity, dtype=np.float64),
+        'contracts': np.zeros(capacity, dtype=np.int64),
+        'pnl': np.zeros(capacity, dtype=np.float64),
+        'pnl_usd': np.zeros(capacity, dtype=np.float64),
+        'result': np.zeros(capacity, dtype=np.int8),
+        'equity_after': np.zeros(capacity, dtype=np.float64),
+    }
+
+    if tp_first is None:
+        tp_first = np.zeros(n, dtype=bool)
+
+    if _compiled_kernel is not None:
+        inputs = (np.ascontiguousarray(close, dtype=np.float64),
+                  np.ascontiguousarray(high, dtype=np.float64),
+                  np.ascontiguousarray(low, dtype=np.float64),
+                  np.ascontiguousarray(atr, dtype=np.float64),
+                  np.ascontiguousarray(long_signal, dtype=np.bool_),
+                  np.ascontiguousarray(short_signal, dtype=np.bool_),
+                  np.ascontiguousarray(tp_first, dtype=np.bool_))
+        kernel = _compiled_kernel
+    else:
+        # Python lists index much faster than NumPy scalars in an interpreted loop
+        inputs = (np.asarray(close, dtype=np.float64).tolist(),
+                  np.asarray(high, dtype=np.float64).tolist(),
+                  np.asarray(low, dtype=np.float64).tolist(),
+                  np.asarray(atr, dtype=np.float64).tolist(),
+                  np.asarray(long_signal, dtype=bool).tolist(),
+                  np.asarray(short_signal, dtype=bool).tolist(),
+                  np.asarray(tp_first, dtype=bool).tolist())
+        kernel = _trade_kernel
+
+    n_trades = kernel(*inputs,
+                      float(equity_start), float(risk_pct), float(multiplier),
+                      int(cooldown_bars), int(max_contracts),
+                      float(commission_per_contract), float(slippage_per_contract),
+                      *out.values())
+    return {k: v[:n_trades] for k, v in out.items()}
+
+
+def trades_to_frame(trades: dict, dates: pd.Series) -> pd.DataFrame:
+    """
+    Build the trade log DataFrame from columnar kernel output.
+
+    Args:
+        trades: Output of simulate_trades_arrays
+        dates: Bar timestamps aligned with the arrays the kernel ran on
+
+    Returns:
+        DataFrame with the same columns as the legacy trade log
+    """
+    if len(trades['side']) == 0:
+        return pd.DataFrame()
+
+    return pd.DataFrame({
+        'type': np.where(trades['side'] == LONG, 'long', 'short'),
+        'entry_time': dates.iloc[trades['entry_idx']].to_numpy(),
+        'entry_price': trades['entry_price'],
+        'exit_time': dates.iloc[trades['exit_idx']].to_numpy(),
+        'exit_price': trades['exit_price'],
+        'contracts': trades['contracts'],
+        'pnl': trades['pnl'],
+        'pnl_usd': trades['pnl_usd'],
+        'result': np.where(trades['result'] == TAKE_PROFIT, 'take_profit', 'stop_loss'),
+        'equity_after': trades['equity_after'],
+    }, columns=TRADE_COLUMNS)
+
+
+def _resolve_ambiguous(trades: dict, inputs: tuple, params: dict, bar_ns: np.ndarray, resolver) -> dict:
+    """
+    Settle stop-loss exits on bars that also touched the target.
+
+    Only those bars are passed to `resolver`; the kernel is re-run with the
+    bars where the target came first until no unsettled ambiguous exit is
+    left (a changed fill changes equity, and so later position sizes).
+    """
+    atr, high, low = inputs[3], inputs[1], inputs[2]
+    tp_first = np.zeros(len(atr), dtype=bool)
+    settled = set()
+    while True:
+        side, entry, exit_idx = trades['side'], trades['entry_idx'], trades['exit_idx']
+        # Same target arithmetic as the kernel
+        tp = trades['entry_price'] + side * atr[entry] * 2.4
+        touched = np.where(side == LONG, high[exit_idx] >= tp, low[exit_idx] <= tp)
+        pending = [j for j in np.flatnonzero((trades['result'] == STOP_LOSS) & touched)
+                   if exit_idx[j] not in settled]
+        if not pending:
+            return trades
+        instrumentation.count('ambiguous_bars', len(pending))
+
+        changed = False
+        for j in pending:
+            bar = exit_idx[j]
+            settled.add(bar)
+            if resolver.first_touch(bar_ns[bar], side[j], trades['exit_price'][j], tp[j]) == TAKE_PROFIT:
+                tp_first[bar] = True
+                changed = True
+        if not changed:
+            return trades
+        trades = simulate_trades_arrays(*inputs, tp_first=tp_first, **params)
+
+
+@instrumentation.timed('simulate')
+def simulate_trades(df: pd.DataFrame, equity_start: float = 5000, risk_pct: float = 0.01, multiplier: float = 5, cooldown_bars: int = 10, max_contracts=5, mode: str = 'array', resolver=None):
+    """
+    Simulate ATR-based stop/target trades on a signal DataFrame.
+
+    Args:
+        df: DataFrame with 'date', OHLC and 'long_signal'/'short_signal' columns
+        equity_start: Starting equity in USD
+        risk_pct: Fraction of equity risked per trade
+        multiplier: Contract point value in USD
+        cooldown_bars: Bars to wait after an exit before re-entering
+        max_contracts: Position size cap
+        mode: 'array' for the array engine, 'legacy' for the original
+            per-row loop (kept for cross-checking)
+        resolver: Optional fills.FillResolver deciding, from finer data,
+            whether stop or target was hit first on bars touching both
+            (array engine only; without it the stop always wins)
+
+    Returns:
+        DataFrame with one row per closed trade
+    """
+    if mode == 'legacy':
+        return _simulate_trades_legacy(df, equity_start, risk_pct, multiplier, cooldown_bars, max_contracts)
+    if mode != 'array':
+        raise ValueError(f"Unknown simulation mode: {mode!r}")
+
+    close = df['close'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    atr = average_true_range(high, low, close, 14)
+    # Views past the ATR warm-up rather than masked copies
+    valid = valid_rows(atr)
+
+    inputs = (
+        close[valid],
+        high[valid],
+        low[valid],
+        atr[valid],
+        df['long_signal'].to_numpy()[valid],
+        df['short_signal'].to_numpy()[valid],
+    )
+    params = dict(equity_start=equity_start, risk_pct=risk_pct, multiplier=multiplier,
+                  cooldown_bars=cooldown_bars, max_contracts=max_contracts)
+    trades = simulate_trades_arrays(*inputs, **params)
+    if resolver is not None:
+        bar_ns = pd.DatetimeIndex(pd.to_datetime(df['date'].iloc[valid], utc=True)).as_unit('ns').asi8
+        trades = _resolve_ambiguous(trades, inputs, params, bar_ns, resolver)
+    instrumentation.count('trades', len(trades['pnl']))
+    return trades_to_frame(trades, df['date'].iloc[valid])
+
+
+def _simulate_trades_legacy(df: pd.DataFrame, equity_start: float = 5000, risk_pct: float = 0.01, multiplier: float = 5, cooldown_bars: int = 10, max_contracts=5):
     df = df.copy()
 
     # ATR calculation (true range)
@@ -9,8 +321,8 @@ def simulate_trades(df: pd.DataFrame, equity_start: float = 5000, risk_pct: floa
     df['atr'] = df['tr'].rolling(14).mean()
     df = df.dropna(subset=['atr'])
 
-    commission_per_contract = 1.25  # USD per round-trip
-    slippage_per_contract = 0.15    # in points
+    commission_per_contract = COMMISSION_PER_CONTRACT
+    slippage_per_contract = SLIPPAGE_PER_CONTRACT
 
     trades = []
     position = None
@@ -102,4 +414,4 @@ def simulate_trades(df: pd.DataFrame, equity_start: float = 5000, risk_pct: floa
         else:
             cooldown = max(0, cooldown - 1)
 
-    return pd.DataFrame(trades)
\ No newline at end of file
+    return pd.DataFrame(trades)
@@ -0,0 +1,238 @@
+"""
+Benchmark suite for the backtest pipeline.
+
+Times each pipeline stage on seeded synthetic bars at several scales (1 day
+up to 5 years), records the peak traced memory of every stage, and compares
+the run with a JSON baseline so slowdowns are flagged. Run from the
+repository root, e.g.
+    python -m src.benchmark --scales 1d 1m 1y --repeat 3
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .backtest import simulate_trades
+from .config import VWAPConfig
+from .metrics import evaluate_performance
+from .signals import compute_vwap_zscore_signals, throttle_signals
+from .store import BarStore, parse_bar_dates
+from .synthetic import write_synthetic_csv
+
+SCALES = {'1d': 1, '1w': 5, '1m': 21, '1y': 252, '5y': 1260}
+DEFAULT_SCALES = ('1d', '1m', '1y')
+DEFAULT_BASELINE = "data/benchmarks/baseline.json"
+
+
+class BenchmarkData:
+    """
+    Synthetic inputs for one scale, written to a temporary directory.
+
+    Stages only time their own work: everything a stage consumes (CSV files,
+    the bar store, signal frames, trade logs) is prepared here up front.
+    """
+
+    def __init__(self, n_days: int, seed: int, tmp: str, config: VWAPConfig = VWAPConfig()):
+        self.config = config
+        self.csv_paths = write_synthetic_csv(tmp, n_days, seed)
+        self.store = BarStore(os.path.join(tmp, "store"))
+        self.store.sync_csv_dir(tmp)
+        self.frames = [df for _, df in self.store.iter_days()]
+        self.signals = [compute_vwap_zscore_signals(df, config) for df in self.frames]
+        self.trades = pd.concat([simulate_trades(df) for df in self.signals], ignore_index=True)
+
+    @property
+    def bars(self) -> int:
+        return sum(len(df) for df in self.frames)
+
+
+def _csv_read(data: BenchmarkData):
+    for path in data.csv_paths:
+        df = pd.read_csv(path, dtype={'date': str})
+        parse_bar_dates(df['date'])
+
+
+def _store_load(data: BenchmarkData):
+    for _ in data.store.iter_days():
+        pass
+
+
+def _signals(data: BenchmarkData):
+    for df in data.frames:
+        compute_vwap_zscore_signals(df, data.config)
+
+
+def _throttle(data: BenchmarkData):
+    threshold = data.config.zscore_threshold
+    for df in data.signals:
+        throttle_signals(df['zscore_smooth'] < -threshold, df['zscore_smooth'] > threshold, data.config.throttle_bars)
+
+
+def _simulate(data: BenchmarkData):
+    for df in data.signals:
+        simulate_trades(df)
+
+
+def _evaluate(trades: pd.DataFrame) -> dict:
+    # Rendering the summary is part of the stage; only the printed copy is dropped
+    with contextlib.redirect_stdout(io.StringIO()):
+        return evaluate_performance(trades).as_dict()
+
+
+def _metrics(data: BenchmarkData):
+    _evaluate(data.trades)
+
+
+def _pipeline(data: BenchmarkData):
+    # The multi_day_backtest.py loop without the signal cache or plotting
+    equity = 5000
+    all_trades = []
+    for df in data.frames:
+        trades = simulate_trades(compute_vwap_zscore_signals(df, data.config), equity_start=equity)
+        if not trades.empty:
+            all_trades.append(trades)
+            equity += trades["pnl"].sum()
+    _evaluate(pd.concat(all_trades, ignore_index=True) if all_trades else pd.DataFrame())
+
+
+STAGES: Dict[str, Callable[[BenchmarkData], None]] = {
+    'csv_read': _csv_read,
+    'store_load': _store_load,
+    'signals': _signals,
+    'throttle': _throttle,
+    'simulate': _simulate,
+    'metrics': _metrics,
+    'pipeline': _pipeline,
+}
+
+
+def time_stage(stage: Callable, data: BenchmarkData, repeat: int = 3) -> dict:
+    """
+    Best-of-`repeat` wall time, then one extra run under tracemalloc for the peak memory.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        stage(data)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        stage(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'median_seconds': float(np.median(times)), 'peak_mb': peak / 1024 ** 2}
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, stages=tuple(STAGES), repeat: int = 3, seed: int = 0,
+                   config: VWAPConfig = VWAPConfig()) -> dict:
+    """
+    Run the selected stages at the selected scales.
+
+    Returns:
+        JSON-serialisable dict with environment details and, per scale, the
+        number of days and bars and each stage's timings and peak memory
+    """
+    results = {}
+    for scale in scales:
+        n_days = SCALES[scale]
+        with tempfile.TemporaryDirectory() as tmp:
+            data = BenchmarkData(n_days, seed, tmp, config)
+            results[scale] = {'days': n_days, 'bars': data.bars, 'stages': {}}
+            for name in stages:
+                stats = time_stage(STAGES[name], data, repeat)
+                stats['bars_per_second'] = data.bars / stats['seconds'] if stats['seconds'] > 0 else None
+                results[scale]['stages'][name] = stats
+                print(f"{scale:>3} {name:<11} {stats['seconds'] * 1000:10.2f} ms {stats['peak_mb']:9.2f} MB")
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25, min_seconds: float = 0.005) -> List[dict]:
+    """
+    Stages slower (or using more memory) than the baseline by more than `tolerance`.
+
+    Time differences below `min_seconds` are ignored as timer noise.
+    """
+    regressions = []
+    for scale, result in current['results'].items():
+        previous = baseline.get('results', {}).get(scale)
+        if previous is None or previous.get('days') != result['days']:
+            continue
+        for name, stats in result['stages'].items():
+            old = previous['stages'].get(name)
+            if old is None:
+                continue
+            slower = stats['seconds'] > old['seconds'] * (1 + tolerance) \
+                and stats['seconds'] - old['seconds'] > min_seconds
+            bigger = stats['peak_mb'] > old['peak_mb'] * (1 + tolerance) and stats['peak_mb'] - old['peak_mb'] > 1
+            if slower or bigger:
+                regressions.append({
+                    'scale': scale, 'stage': name,
+                    'seconds': stats['seconds'], 'baseline_seconds': old['seconds'],
+                    'peak_mb': stats['peak_mb'], 'baseline_peak_mb': old['peak_mb'],
+                })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the backtest pipeline on synthetic bars")
+    parser.add_argument('--scales', nargs='+', default=list(DEFAULT_SCALES), choices=list(SCALES))
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="JSON baseline compared against and updated")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument('--update', action='store_true', help="Overwrite the baseline even if a regression is found")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.scales, args.stages, args.repeat, args.seed)
+
+    regressions = []
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        for r in regressions:
+            print(f"⚠️ Regression: {r['scale']} {r['stage']}: "
+                  f"{r['baseline_seconds'] * 1000:.2f} -> {r['seconds'] * 1000:.2f} ms, "
+                  f"{r['baseline_peak_mb']:.2f} -> {r['peak_mb']:.2f} MB")
+        if not regressions:
+            print(f"✅ No regressions against {args.baseline}")
+
+    if not regressions or args.update:
+        # Keep baseline entries for scales that were not run this time
+        current['results'] = {**baseline.get('results', {}), **current['results']}
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=1)
+        print(f"📊 Baseline saved: {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
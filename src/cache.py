@@ -0,0 +1,181 @@
+"""
+Content-addressed cache for computed signal frames.
+
+Results of compute_vwap_zscore_signals are keyed by a hash of the input bars
+and the VWAPConfig fields. A small in-process LRU memo sits in front of an
+on-disk store with a size cap and least-recently-used eviction.
+"""
+import contextlib
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import pandas as pd
+
+from . import instrumentation
+from .config import VWAPConfig
+from .registry import code_version
+from .signals import compute_vwap_zscore_signals
+
+# Modules whose source determines a signal frame; any edit to them changes
+# every key, so stale entries are never reused
+SIGNAL_MODULES = ('signals', 'indicators', 'config')
+CODE_VERSION = code_version(SIGNAL_MODULES)
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (f"signal cache: {self.hits} hits ({self.memory_hits} memory, {self.disk_hits} disk), "
+                f"{self.misses} misses, {self.evictions} evictions, hit rate {self.hit_rate:.0%}")
+
+
+def frame_key(df: pd.DataFrame, config: VWAPConfig, copy: bool = True) -> str:
+    """
+    Hash of the bar data (values, columns and index), every VWAPConfig field
+    and the source of SIGNAL_MODULES; frames computed with copy=False keep fewer columns and get their own keys.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{CODE_VERSION}|{sorted(asdict(config).items())}|{list(df.columns)}".encode())
+    if not copy:
+        h.update(b"|lean")
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class SignalCache:
+    """
+    Two-level (memory, disk) cache for signal frames.
+
+    Args:
+        cache_dir: Directory for pickled frames
+        max_bytes: Disk size cap; least recently used files are removed beyond it
+        max_memory_entries: Number of frames kept in the in-process memo
+    """
+
+    def __init__(self, cache_dir: str = "data/.cache/signals", max_bytes: int = 512 * 2**20,
+                 max_memory_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_memory_entries = max_memory_entries
+        self.stats = CacheStats()
+        self._memo: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _remember(self, key: str, frame: pd.DataFrame):
+        self._memo[key] = frame
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_memory_entries:
+            self._memo.popitem(last=False)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            self.stats.memory_hits += 1
+            return self._memo[key]
+
+        path = self._path(key)
+        try:
+            frame = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError, ValueError, AttributeError):
+            # Truncated or written by incompatible code: drop it and recompute
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        os.utime(path)  # mark as recently used for eviction
+        self.stats.disk_hits += 1
+        self._remember(key, frame)
+        return frame
+
+    def put(self, key: str, frame: pd.DataFrame):
+        self._remember(key, frame)
+        tmp = self._path(key) + ".tmp"
+        frame.to_pickle(tmp)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            self._memo.pop(name[:-len(".pkl")], None)
+            total -= size
+            self.stats.evictions += 1
+
+    def clear(self):
+        """Drop every cached frame from memory and disk."""
+        self._memo.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def compute(self, df: pd.DataFrame, config: VWAPConfig = VWAPConfig(), copy: bool = True) -> pd.DataFrame:
+        """
+        Cached equivalent of compute_vwap_zscore_signals(df, config, copy).
+
+        With copy=False a miss computes into `df` itself and the cached frame
+        is returned as is, without a defensive copy; callers must not modify it.
+        """
+        with instrumentation.stage('cache.lookup'):
+            key = frame_key(df, config, copy)
+            frame = self.get(key)
+        if frame is None:
+            self.stats.misses += 1
+            instrumentation.count('cache_misses')
+            frame = compute_vwap_zscore_signals(df, config, copy=copy)
+            with instrumentation.stage('cache.store'):
+                self.put(key, frame)
+        else:
+            instrumentation.count('cache_hits')
+        return frame.copy() if copy else frame
+
+
+_default_cache: Optional[SignalCache] = None
+
+
+def default_cache() -> SignalCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SignalCache()
+    return _default_cache
+
+
+def cached_compute_vwap_zscore_signals(
+    df: pd.DataFrame,
+    config: VWAPConfig = VWAPConfig(),
+    cache: Optional[SignalCache] = None,
+    copy: bool = True
+) -> pd.DataFrame:
+    """
+    compute_vwap_zscore_signals backed by the signal cache (the process-wide default if none is given).
+    """
+    return (cache or default_cache()).compute(df, config, copy)
@@ -0,0 +1,203 @@
+"""
+Single entry point for the strategy tools:
+
+    python -m src <command> [options]
+
+Each command's module is imported only when that command runs, so
+`python -m src --help` loads neither pandas nor any broker or plotting
+library, and headless commands never pull in plotly, matplotlib or
+ib_insync. `python -m src startup` measures this against a budget.
+"""
+import importlib
+import json
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# command -> (module, function, help); the module is imported on dispatch
+COMMANDS: Dict[str, Tuple[str, str, str]] = {
+    'backtest': ('src.multi_day_backtest', 'main', "Backtest every stored day with equity carried forward"),
+    'sweep': ('src.sweep', 'main', "Parameter grid search"),
+    'search': ('src.halving', 'main', "Successive-halving parameter search"),
+    'walk-forward': ('src.walk_forward', 'main', "Rolling in-sample/out-of-sample optimisation"),
+    'monte-carlo': ('src.monte_carlo', 'main', "Bootstrap the trade log"),
+    'panel': ('src.panel', 'main', "Multi-instrument portfolio backtest"),
+    'aggregate': ('src.aggregate', 'main', "Aggregate ticks or fine bars into larger bars"),
+    'runs': ('src.registry', 'main', "List, inspect and compare recorded backtest runs"),
+    'share': ('src.shm', 'main', "Publish the bar store into shared memory for concurrent runs"),
+    'fetch': ('src.downloader', 'main', "Download historical bars from IB into the bar store"),
+    'live': ('src.live', 'main', "Paper-trade the strategy on IB (or --fake)"),
+    'benchmark': ('src.benchmark', 'main', "Pipeline benchmarks against a stored baseline"),
+    'plot': ('src.cli', 'plot_main', "Candles, trades or equity charts"),
+    'startup': ('src.cli', 'startup_main', "Check import time and heavy imports of each command"),
+}
+
+# Libraries only the commands that draw or talk to a broker may load
+HEAVY_MODULES = ('plotly', 'matplotlib', 'ib_insync')
+INTERACTIVE_COMMANDS = {'plot', 'fetch', 'live'}
+DEFAULT_STARTUP_BUDGET_MS = 250.0
+
+
+def _usage() -> str:
+    width = max(len(name) for name in COMMANDS)
+    lines = ["usage: python -m src <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {spec[2]}" for name, spec in COMMANDS.items()]
+    lines += ["", "Run 'python -m src <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+
+def resolve(command: str):
+    """Import the module of `command` and return its entry function."""
+    module, func, _ = COMMANDS[command]
+    return getattr(importlib.import_module(module), func)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help', 'help'):
+        print(_usage())
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Unknown command '{command}'\n\n{_usage()}", file=sys.stderr)
+        return 2
+
+    # Subcommand parsers take their prog name from argv[0]
+    sys.argv[0] = f"python -m src {command}"
+    result = resolve(command)(rest)
+    # Entry points return an exit code, or data when called from Python
+    return result if isinstance(result, int) and not isinstance(result, bool) else 0
+
+
+def plot_main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src plot", description="Charts of bars, trades and equity")
+    parser.add_argument('kind', choices=['candles', 'trades', 'equity'])
+    parser.add_argument('--day', help="Trade date (YYYYMMDD) for candles and trades")
+    parser.add_argument('--data', default="data/", help="Directory with per-day CSV files and the bar store")
+    parser.add_argument('--trades', default="data/full_trade_log.csv", help="Trade log to overlay")
+    parser.add_argument('--equity', default="data/equity_curve.csv", help="Equity curve for 'equity' (.csv per trade or .npz per bar)")
+    parser.add_argument('--output', default=None, help="Write the candles chart to .html/.png instead of a browser")
+    args = parser.parse_args(argv)
+
+    if args.kind == 'equity':
+        from .plot_equity import plot_equity_curve
+        plot_equity_curve(args.equity)
+        return 0
+
+    if not args.day:
+        parser.error(f"--day is required for '{args.kind}'")
+
+    import os
+    import pandas as pd
+    from .cache import cached_compute_vwap_zscore_signals
+    from .store import open_store
+
+    df = open_store(args.data).load_frame(args.day, args.day)
+    df = cached_compute_vwap_zscore_signals(df)
+    trades = pd.read_csv(args.trades) if os.path.exists(args.trades) else None
+    if trades is not None:
+        for col in ('entry_time', 'exit_time'):
+            trades[col] = pd.to_datetime(trades[col], utc=True).dt.tz_localize(None)
+
+    if args.kind == 'candles':
+        from .plot import plot_candles_with_vwap
+        plot_candles_with_vwap(df, trades, title=f"MES {args.day}", output=args.output)
+    else:
+        if trades is None:
+            print(f"❌ No trade log at {args.trades}; run 'python -m src backtest' first", file=sys.stderr)
+            return 1
+        from .plot_trades import plot_day_trades
+        plot_day_trades(df, trades, args.day)
+    return 0
+
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import importlib
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - t0
+print(json.dumps({'ms': elapsed * 1000, 'modules': sorted(m.split('.')[0] for m in sys.modules)}))
+"""
+
+
+def _probe(module: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE, module], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def measure_startup(commands: Optional[List[str]] = None, repeat: int = 3) -> dict:
+    """
+    Import time of each command's module in a fresh interpreter, best of
+    `repeat`, together with the heavy libraries it loaded. `pandas` is
+    measured the same way as the floor every data command pays.
+
+    Returns:
+        {name: {'ms': float, 'heavy': [module, ...]}}
+    """
+    targets = {'cli': 'src.cli', 'pandas': 'pandas'}
+    for name in commands or COMMANDS:
+        targets.setdefault(name, COMMANDS[name][0])
+
+    results = {}
+    for name, module in targets.items():
+        runs = [_probe(module) for _ in range(repeat)]
+        loaded = set(runs[0]['modules'])
+        results[name] = {
+            'ms': min(r['ms'] for r in runs),
+            'heavy': [m for m in HEAVY_MODULES if m in loaded],
+            'pandas': 'pandas' in loaded,
+        }
+    return results
+
+
+def check_startup(results: dict, budget_ms: float = DEFAULT_STARTUP_BUDGET_MS) -> List[str]:
+    """
+    Violations of the startup rules: the dispatcher must not load pandas,
+    headless commands must not load heavy libraries, and no command may
+    take more than `budget_ms` beyond a bare pandas import.
+    """
+    problems = []
+    if results['cli']['pandas'] or results['cli']['heavy']:
+        problems.append("cli: dispatcher imports pandas or heavy libraries")
+    floor = results['pandas']['ms']
+    for name, r in results.items():
+        if name in ('cli', 'pandas', 'plot', 'startup'):
+            continue
+        if r['heavy'] and name not in INTERACTIVE_COMMANDS:
+            problems.append(f"{name}: loads {', '.join(r['heavy'])} at import")
+        if r['ms'] - floor > budget_ms:
+            problems.append(f"{name}: {r['ms']:.0f} ms import, {r['ms'] - floor:.0f} ms over pandas "
+                            f"(budget {budget_ms:.0f} ms)")
+    return problems
+
+
+def startup_main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src startup",
+                                     description="Measure the import cost of each command")
+    parser.add_argument('commands', nargs='*', metavar='command', help="Commands to measure (default: all)")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+                        help="Allowed import time beyond a bare pandas import")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    unknown = [c for c in args.commands if c not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s): {', '.join(unknown)}")
+
+    results = measure_startup(args.commands or None, args.repeat)
+    floor = results['pandas']['ms']
+    print(f"⏱️ Import time (best of {args.repeat}, pandas alone {floor:.0f} ms)")
+    for name, r in results.items():
+        heavy = f"  [{', '.join(r['heavy'])}]" if r['heavy'] else ""
+        print(f"  {name:<13} {r['ms']:8.1f} ms{heavy}")
+
+    problems = check_startup(results, args.budget_ms)
+    for problem in problems:
+        print(f"⚠️ {problem}")
+    if not problems:
+        print(f"✅ All commands within {args.budget_ms:.0f} ms of pandas and free of unneeded heavy imports")
+    return 1 if problems else 0
@@ -10,6 +10,8 @@ class VWAPConfig:
     zscore_threshold: float = 2.0
     zscore_smooth_span: int = 5
     throttle_bars: int = 10
+    session_start: str = "17:00"  # CME Globex session opens 17:00 CT the prior evening
+    session_tz: str = "America/Chicago"
 
 @dataclass
 class IBKRConfig:
@@ -25,6 +27,23 @@ class TradingConfig:
     bar_size: str = "1 min"
     use_rth: bool = False
 
+@dataclass
+class InstrumentConfig:
+    symbol: str
+    multiplier: float                      # USD per point
+    commission_per_contract: float = 1.25  # USD per round-trip
+    slippage_per_contract: float = 0.15    # in points
+    max_contracts: int = 5
+    exchange: str = "CME"
+
+# Micro equity index futures traded on the same Globex schedule
+INSTRUMENTS: Dict[str, InstrumentConfig] = {
+    'MES': InstrumentConfig('MES', multiplier=5.0),
+    'MNQ': InstrumentConfig('MNQ', multiplier=2.0, slippage_per_contract=0.25),
+    'M2K': InstrumentConfig('M2K', multiplier=5.0, slippage_per_contract=0.10),
+    'MYM': InstrumentConfig('MYM', multiplier=0.5, slippage_per_contract=1.0, exchange="CBOT"),
+}
+
 # Default configurations
 DEFAULT_VWAP_CONFIG = VWAPConfig()
 DEFAULT_IBKR_CONFIG = IBKRConfig()
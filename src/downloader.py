@@ -0,0 +1,266 @@
+"""
+Concurrent, resumable historical bar downloader.
+
+Keeps several `reqHistoricalDataAsync` requests in flight while staying
+within IB's pacing limits, requests only CME trade dates, writes each day
+straight into the bar store and checkpoints progress so an interrupted run
+resumes where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import os
+from collections import deque
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .config import DEFAULT_IBKR_CONFIG, DEFAULT_TRADING_CONFIG, DEFAULT_VWAP_CONFIG
+from .indicators import session_ids
+from .store import BarStore
+from .trading_calendar import CME_EQUITY_CALENDAR
+
+# (max requests, period in seconds) enforced by IB for historical data
+IB_PACING_LIMITS: Sequence[Tuple[int, float]] = ((60, 600.0), (6, 2.0))
+
+BAR_FIELDS = ['date', 'open', 'high', 'low', 'close', 'volume', 'average', 'barCount']
+
+
+class Pacer:
+    """
+    Async context manager limiting concurrency and request rate.
+
+    Args:
+        max_in_flight: Maximum simultaneous requests
+        limits: (max requests, period in seconds) sliding-window limits
+    """
+
+    def __init__(self, max_in_flight: int = 6, limits: Sequence[Tuple[int, float]] = IB_PACING_LIMITS):
+        self.limits = limits
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._lock = asyncio.Lock()
+        self._sent: deque = deque()
+
+    def _wait_time(self, now: float) -> float:
+        wait = 0.0
+        for limit, period in self.limits:
+            recent = [t for t in self._sent if now - t < period]
+            if len(recent) >= limit:
+                wait = max(wait, recent[-limit] + period - now)
+        return wait
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                wait = self._wait_time(loop.time())
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self._sent.append(loop.time())
+            longest = max((period for _, period in self.limits), default=0.0)
+            while self._sent and loop.time() - self._sent[0] > longest:
+                self._sent.popleft()
+        return self
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+
+class Checkpoint:
+    """
+    JSON record of finished, empty and failed days, saved after every change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state: Dict[str, object] = {'done': [], 'empty': [], 'failed': {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state.update(json.load(f))
+
+    def finished(self, day: str) -> bool:
+        return day in self.state['done'] or day in self.state['empty']
+
+    def _mark(self, key: str, day: str):
+        self.state['failed'].pop(day, None)
+        if day not in self.state[key]:
+            self.state[key].append(day)
+        self.save()
+
+    def mark_done(self, day: str):
+        self._mark('done', day)
+
+    def mark_empty(self, day: str):
+        self._mark('empty', day)
+
+    def mark_failed(self, day: str, error: str):
+        self.state['failed'][day] = error
+        self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def bars_to_frame(bars) -> pd.DataFrame:
+    """
+    Convert a list of BarData-like objects into a DataFrame with the CSV schema.
+    """
+    return pd.DataFrame({name: [getattr(bar, name) for bar in bars] for name in BAR_FIELDS})
+
+
+def session_trade_date(df: pd.DataFrame, session_start: str = DEFAULT_VWAP_CONFIG.session_start,
+                       tz: str = DEFAULT_VWAP_CONFIG.session_tz) -> Optional[str]:
+    """
+    Trade date ('YYYYMMDD') of the session holding the last bar; sessions open the evening before.
+    """
+    if df.empty:
+        return None
+    dates = pd.to_datetime(df['date'].iloc[-1:], utc=True)
+    session = int(session_ids(dates, session_start, tz)[0])
+    return (date(1970, 1, 1) + timedelta(days=session + 1)).strftime("%Y%m%d")
+
+
+async def download_days(
+    ib,
+    contract,
+    days: List[str],
+    store: BarStore,
+    checkpoint: Checkpoint,
+    pacer: Pacer,
+    bar_size: str = "1 min",
+    what_to_show: str = "TRADES",
+    use_rth: bool = False,
+    csv_dir: Optional[str] = None,
+    retries: int = 2,
+    retry_delay: float = 2.0
+) -> Dict[str, str]:
+    """
+    Download every day not yet stored or checkpointed, several at a time.
+
+    Args:
+        ib: Connected ib_insync IB (or FakeIB) instance
+        contract: Qualified futures contract
+        days: Trade dates as 'YYYYMMDD' strings
+        store: Bar store the bars are written into
+        checkpoint: Progress record used to skip finished days
+        pacer: Concurrency and rate limiter
+        csv_dir: Also write `SYMBOL_YYYYMMDD.csv` files here when given
+        retries: Extra attempts for a request that returns no bars
+        retry_delay: Base back-off in seconds between attempts
+
+    Returns:
+        Mapping of day to outcome ('done', 'empty' for closed days, or the
+        error of a failed day, which is retried on the next run)
+    """
+    outcomes: Dict[str, str] = {}
+
+    async def fetch(day: str):
+        # An empty answer is usually a pacing violation or timeout, so retry before giving up
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(retry_delay * attempt)
+            async with pacer:
+                bars = await ib.reqHistoricalDataAsync(
+                    contract,
+                    endDateTime=f"{day} 23:59:59",
+                    durationStr="1 D",
+                    barSizeSetting=bar_size,
+                    whatToShow=what_to_show,
+                    useRTH=use_rth,
+                    formatDate=1
+                )
+            if bars:
+                break
+        else:
+            raise RuntimeError(f"no bars returned after {retries + 1} attempts")
+
+        df = bars_to_frame(bars)
+        # IB answers closed days with the previous session; never store it under the wrong date
+        if session_trade_date(df) != day:
+            checkpoint.mark_empty(day)
+            outcomes[day] = 'empty'
+            print(f"❌ No session for {day}, skipping.")
+            return
+        store.ingest_frame(day, df, source={'downloaded': datetime.now().isoformat(timespec='seconds')})
+        if csv_dir:
+            df.to_csv(os.path.join(csv_dir, f"{store.symbol}_{day}.csv"), index=False)
+        checkpoint.mark_done(day)
+        outcomes[day] = 'done'
+        print(f"✅ Saved: {store.symbol}_{day}")
+
+    pending = [day for day in days if day not in store and not checkpoint.finished(day)]
+    results = await asyncio.gather(*(fetch(day) for day in pending), return_exceptions=True)
+    for day, result in zip(pending, results):
+        if isinstance(result, BaseException):
+            checkpoint.mark_failed(day, repr(result))
+            outcomes[day] = repr(result)
+            print(f"⚠️ Failed: {day}: {result!r}")
+    return outcomes
+
+
+def _contract(symbol: str, exchange: str, fake: bool):
+    if fake:
+        return SimpleNamespace(symbol=symbol, exchange=exchange)
+    from ib_insync import Future
+    return Future(symbol=symbol, exchange=exchange)
+
+
+async def run(args) -> Dict[str, str]:
+    calendar = CME_EQUITY_CALENDAR
+    if args.start:
+        start = datetime.strptime(args.start, "%Y%m%d").date()
+        end = datetime.strptime(args.end, "%Y%m%d").date() if args.end else date.today() - timedelta(days=1)
+        days = calendar.trading_days(start, end)
+    else:
+        days = calendar.previous_trading_days(args.days, date.today())
+    days = [d.strftime("%Y%m%d") for d in days]
+
+    if args.fake:
+        from .fake_ib import FakeIB
+        ib = FakeIB(args.fake_data, latency=args.latency)
+    else:
+        from ib_insync import IB
+        ib = IB()
+    await ib.connectAsync(args.host, args.port, clientId=args.client_id)
+
+    try:
+        details = await ib.reqContractDetailsAsync(_contract(args.symbol, args.exchange, args.fake))
+        store = BarStore(args.store, args.symbol)
+        checkpoint = Checkpoint(os.path.join(store.path, "download_checkpoint.json"))
+        if args.csv_dir:
+            os.makedirs(args.csv_dir, exist_ok=True)
+        return await download_days(ib, details[0].contract, days, store, checkpoint,
+                                   Pacer(args.max_in_flight), csv_dir=args.csv_dir)
+    finally:
+        ib.disconnect()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download historical 1-minute bars into the bar store")
+    parser.add_argument('--days', type=int, default=100, help="Number of most recent trade dates")
+    parser.add_argument('--start', help="First trade date (YYYYMMDD); overrides --days")
+    parser.add_argument('--end', help="Last trade date (YYYYMMDD), default yesterday")
+    parser.add_argument('--symbol', default=DEFAULT_TRADING_CONFIG.symbol)
+    parser.add_argument('--exchange', default=DEFAULT_TRADING_CONFIG.exchange)
+    parser.add_argument('--host', default=DEFAULT_IBKR_CONFIG.host)
+    parser.add_argument('--port', type=int, default=DEFAULT_IBKR_CONFIG.port)
+    parser.add_argument('--client-id', type=int, default=5)
+    parser.add_argument('--max-in-flight', type=int, default=6)
+    parser.add_argument('--store', default="data/store", help="Bar store root directory")
+    parser.add_argument('--csv-dir', default=None, help="Also write per-day CSV files here")
+    parser.add_argument('--fake', action='store_true', help="Serve requests from local CSV files instead of IB")
+    parser.add_argument('--fake-data', default="data/", help="CSV directory used by --fake")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds per request with --fake")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+In-process stand-in for the ib_insync IB client.
+
+FakeIB implements the async calls used by the downloader and serves the
+per-day CSV files in `data/` with configurable latency, so downloads can be
+exercised without TWS or IB Gateway. It also enforces IB's historical-data
+pacing limits and records violations.
+
+For live trading it replays the files as a keepUpToDate bar subscription at
+a configurable speed and acts as a paper broker for bracket orders: parents
+fill at their limit price when placed, and working stop/target children are
+matched against each bar that completes afterwards (stop first when a bar
+reaches both).
+"""
+import asyncio
+import itertools
+import os
+import re
+from collections import deque, namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .downloader import IB_PACING_LIMITS
+
+
+@dataclass
+class FakeBar:
+    """Same fields as ib_insync's BarData."""
+    date: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    average: float
+    barCount: int
+
+
+BracketOrder = namedtuple('BracketOrder', ['parent', 'takeProfit', 'stopLoss'])
+
+
+class FakeEvent:
+    """Minimal eventkit Event: handlers are added with += and called by emit()."""
+
+    def __init__(self):
+        self._handlers: List[Callable] = []
+
+    def __iadd__(self, handler):
+        self._handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self._handlers.remove(handler)
+        return self
+
+    def emit(self, *args):
+        for handler in list(self._handlers):
+            handler(*args)
+
+
+class FakeBarDataList(list):
+    """
+    Bars of a keepUpToDate subscription, like ib_insync's BarDataList.
+
+    The last bar is the one still forming; updateEvent(bars, True) fires when
+    a new bar starts. `finished` is set once the replay has run out of data
+    (the last bar is then complete too).
+    """
+
+    def __init__(self, contract):
+        super().__init__()
+        self.contract = contract
+        self.updateEvent = FakeEvent()
+        self.finished = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class FakeOrder:
+    """The ib_insync Order fields used by bracket orders."""
+    orderId: int = 0
+    action: str = ''
+    totalQuantity: float = 0
+    orderType: str = ''
+    lmtPrice: float = 0.0
+    auxPrice: float = 0.0
+    parentId: int = 0
+    transmit: bool = True
+
+
+@dataclass
+class FakeOrderStatus:
+    status: str = 'PendingSubmit'
+    filled: float = 0
+    avgFillPrice: float = 0.0
+
+
+@dataclass
+class FakeTrade:
+    contract: object
+    order: FakeOrder
+    orderStatus: FakeOrderStatus = field(default_factory=FakeOrderStatus)
+
+    def isDone(self) -> bool:
+        return self.orderStatus.status in ('Filled', 'Cancelled')
+
+
+class FakeIB:
+    """
+    Fake IB client serving stored bars.
+
+    Args:
+        data_path: Directory with `SYMBOL_YYYYMMDD.csv` files
+        latency: Seconds each historical data request takes
+        pacing_limits: (max requests, period) limits; exceeding one makes the
+            request fail with no bars, as IB does with error 162
+        max_in_flight: Concurrent requests allowed before requests fail
+        tz: Timezone of the returned bar timestamps
+    """
+
+    def __init__(self, data_path: str = "data/", latency: float = 0.05,
+                 pacing_limits: Sequence[Tuple[int, float]] = IB_PACING_LIMITS,
+                 max_in_flight: int = 50, tz: str = "America/Chicago", speed: float = 0.0,
+                 days: Optional[Sequence[str]] = None):
+        self.data_path = data_path
+        self.tz = tz
+        self.latency = latency
+        self.pacing_limits = pacing_limits
+        self.max_in_flight = max_in_flight
+        self.connected = False
+        self.requests: List[str] = []
+        self.violations = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._request_times: deque = deque()
+
+        # Live replay and paper broker
+        self.speed = speed
+        self.days = list(days) if days is not None else None
+        self.orderStatusEvent = FakeEvent()
+        self.trades: List[FakeTrade] = []
+        self._working: List[FakeTrade] = []
+        self._order_ids = itertools.count(1)
+        self._last_price = float('nan')
+
+    async def connectAsync(self, host: str = "127.0.0.1", port: int = 7497, clientId: int = 1, **kwargs):
+        await asyncio.sleep(0)
+        self.connected = True
+        return self
+
+    def isConnected(self) -> bool:
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+
+    async def reqContractDetailsAsync(self, contract):
+        await asyncio.sleep(0)
+        return [SimpleNamespace(contract=contract)]
+
+    def _paced_ok(self, now: float) -> bool:
+        longest = max((period for _, period in self.pacing_limits), default=0.0)
+        while self._request_times and now - self._request_times[0] > longest:
+            self._request_times.popleft()
+        self._request_times.append(now)
+        for limit, period in self.pacing_limits:
+            if sum(1 for t in self._request_times if now - t <= period) > limit:
+                return False
+        return self.in_flight <= self.max_in_flight
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime: str, durationStr: str, barSizeSetting: str,
+                                     whatToShow: str, useRTH: bool, formatDate: int = 1,
+                                     keepUpToDate: bool = False, chartOptions=None, timeout: float = 60):
+        if keepUpToDate:
+            return self._subscribe(contract)
+        day = str(endDateTime)[:8]
+        self.requests.append(day)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if not self._paced_ok(asyncio.get_running_loop().time()):
+                self.violations += 1
+                return []
+            await asyncio.sleep(self.latency)
+            return self.load_bars(getattr(contract, 'symbol', 'MES'), day)
+        finally:
+            self.in_flight -= 1
+
+    def load_bars(self, symbol: str, day: str) -> List[FakeBar]:
+        path = os.path.join(self.data_path, f"{symbol}_{day}.csv")
+        if not os.path.exists(path):
+            return []
+        df = pd.read_csv(path, dtype={'date': str})
+        dates = pd.to_datetime(df['date'], format="%Y-%m-%d %H:%M:%S%z", utc=True).dt.tz_convert(self.tz)
+        return [
+            FakeBar(d.to_pydatetime(), o, h, l, c, v, a, int(n))
+            for d, o, h, l, c, v, a, n in zip(dates, df['open'], df['high'], df['low'], df['close'],
+                                              df['volume'], df['average'], df['barCount'])
+        ]
+
+    # ------------------------------------------------------------ live replay
+
+    def replay_days(self, symbol: str) -> List[str]:
+        """Days replayed by a keepUpToDate subscription: `days`, or every file for `symbol`."""
+        if self.days is not None:
+            return self.days
+        pattern = re.compile(rf"^{re.escape(symbol)}_(\d{{8}})\.csv$")
+        return sorted(m.group(1) for m in map(pattern.match, os.listdir(self.data_path)) if m)
+
+    def _subscribe(self, contract) -> FakeBarDataList:
+        bars = FakeBarDataList(contract)
+        bars.task = asyncio.get_running_loop().create_task(self._replay(bars))
+        return bars
+
+    async def _replay(self, bars: FakeBarDataList):
+        # At `speed` times real time, one 1-minute bar every 60 / speed seconds; 0 replays as fast as possible
+        interval = 60.0 / self.speed if self.speed else 0.0
+        symbol = getattr(bars.contract, 'symbol', 'MES')
+        for day in self.replay_days(symbol):
+            for bar in self.load_bars(symbol, day):
+                await asyncio.sleep(interval)
+                if bars:
+                    self._match_orders(bars[-1])
+                bars.append(bar)
+                bars.updateEvent.emit(bars, True)
+        if bars:
+            self._match_orders(bars[-1])
+        bars.finished.set()
+
+    def cancelHistoricalData(self, bars):
+        if getattr(bars, 'task', None) is not None:
+            bars.task.cancel()
+
+    # ----------------------------------------------------------- paper broker
+
+    def bracketOrder(self, action: str, quantity: float, limitPrice: float,
+                     takeProfitPrice: float, stopLossPrice: float) -> BracketOrder:
+        reverse = 'SELL' if action == 'BUY' else 'BUY'
+        parent = FakeOrder(next(self._order_ids), action, quantity, 'LMT', lmtPrice=limitPrice, transmit=False)
+        take_profit = FakeOrder(next(self._order_ids), reverse, quantity, 'LMT', lmtPrice=takeProfitPrice,
+                                parentId=parent.orderId, transmit=False)
+        stop_loss = FakeOrder(next(self._order_ids), reverse, quantity, 'STP', auxPrice=stopLossPrice,
+                              parentId=parent.orderId, transmit=True)
+        return BracketOrder(parent, take_profit, stop_loss)
+
+    def placeOrder(self, contract, order: FakeOrder) -> FakeTrade:
+        if not order.orderId:
+            order.orderId = next(self._order_ids)
+        trade = FakeTrade(contract, order)
+        self.trades.append(trade)
+        if order.parentId:
+            trade.orderStatus.status = 'Submitted'
+            self._working.append(trade)
+            self.orderStatusEvent.emit(trade)
+        elif order.orderType == 'LMT':
+            self._fill(trade, order.lmtPrice)
+        else:
+            self._fill(trade, self._last_price)
+        return trade
+
+    def cancelOrder(self, order: FakeOrder):
+        for trade in list(self._working):
+            if trade.order is order or trade.order.orderId == order.orderId:
+                self._working.remove(trade)
+                trade.orderStatus.status = 'Cancelled'
+                self.orderStatusEvent.emit(trade)
+
+    def openTrades(self) -> List[FakeTrade]:
+        return list(self._working)
+
+    def _fill(self, trade: FakeTrade, price: float):
+        trade.orderStatus = FakeOrderStatus('Filled', trade.order.totalQuantity, price)
+        self.orderStatusEvent.emit(trade)
+
+    def _match_orders(self, bar: FakeBar):
+        """Fill working children touched by a completed bar, stop before target; the sibling is cancelled."""
+        self._last_price = bar.close
+        brackets = {}
+        for trade in self._working:
+            brackets.setdefault(trade.order.parentId, []).append(trade)
+        for children in brackets.values():
+            for trade in sorted(children, key=lambda t: t.order.orderType != 'STP'):
+                order = trade.order
+                buy = order.action == 'BUY'
+                if order.orderType == 'STP':
+                    price = order.auxPrice
+                    hit = bar.high >= price if buy else bar.low <= price
+                else:
+                    price = order.lmtPrice
+                    hit = bar.low <= price if buy else bar.high >= price
+                if hit:
+                    for sibling in children:
+                        self._working.remove(sibling)
+                        if sibling is not trade:
+                            sibling.orderStatus.status = 'Cancelled'
+                            self.orderStatusEvent.emit(sibling)
+                    self._fill(trade, price)
+                    break
@@ -0,0 +1,109 @@
+"""
+Intrabar fill resolution for bars that touch both stop and target.
+
+On 1-minute bars the trade kernel cannot tell which level was hit first and
+assumes the stop. FillResolver settles such bars from finer data (5-second
+bars or ticks), fetched one minute at a time through an LRU cache, so the
+cost grows with the number of ambiguous bars rather than with the amount
+of fine data on disk.
+"""
+import functools
+import os
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .backtest import LONG, STOP_LOSS, TAKE_PROFIT
+from .store import BarStore
+
+# (start_ns, end_ns) -> time-ordered arrays with at least 'high' and 'low' for [start, end)
+FineSource = Callable[[int, int], Dict[str, np.ndarray]]
+
+
+class StoreSource:
+    """
+    Fine bars for a time range, read from a memory-mapped BarStore.
+
+    Only the first timestamp of each day is read up front; each lookup
+    binary-searches one day's timestamps and slices the mapped columns.
+    """
+
+    def __init__(self, store: BarStore):
+        self.store = store
+        self._days = {}
+        firsts = {}
+        for day in store.days:
+            arrays = self._day(day)
+            if len(arrays['date']):
+                firsts[day] = arrays['date'][0]
+        self._order = sorted(firsts, key=firsts.get)
+        self._firsts = np.array([firsts[day] for day in self._order], dtype=np.int64)
+
+    def _day(self, day: str) -> Dict[str, np.ndarray]:
+        if day not in self._days:
+            self._days[day] = self.store.load_arrays(day, day, columns=['date', 'high', 'low'])
+        return self._days[day]
+
+    def __call__(self, start_ns: int, end_ns: int) -> Dict[str, np.ndarray]:
+        k = int(np.searchsorted(self._firsts, start_ns, side='right')) - 1
+        if k < 0:
+            return {name: np.empty(0) for name in ('date', 'high', 'low')}
+        arrays = self._day(self._order[k])
+        lo, hi = np.searchsorted(arrays['date'], [start_ns, end_ns])
+        return {name: values[lo:hi] for name, values in arrays.items()}
+
+
+class FillResolver:
+    """
+    Decides whether a bar's stop or target was touched first.
+
+    Args:
+        source: Callable returning fine data for [start_ns, end_ns)
+        bar_seconds: Duration of the bars being resolved (bars are stamped at their start)
+        cache_size: Number of bar windows kept in the LRU cache
+    """
+
+    def __init__(self, source: FineSource, bar_seconds: int = 60, cache_size: int = 4096):
+        self.source = source
+        self.bar_ns = int(bar_seconds * 1_000_000_000)
+        self._window = functools.lru_cache(maxsize=cache_size)(self._load)
+        self.stats = {'take_profit': 0, 'stop_loss': 0, 'unresolved': 0}
+
+    def _load(self, start_ns: int):
+        data = self.source(start_ns, start_ns + self.bar_ns)
+        return np.asarray(data['high'], dtype=np.float64), np.asarray(data['low'], dtype=np.float64)
+
+    def first_touch(self, bar_ns: int, side: int, sl: float, tp: float) -> int:
+        """
+        STOP_LOSS or TAKE_PROFIT for a position of `side` on the bar starting
+        at `bar_ns`. When the fine data is missing, or one fine record
+        touches both levels, the stop is assumed as before.
+        """
+        high, low = self._window(int(bar_ns))
+        if side == LONG:
+            hit_sl, hit_tp = low <= sl, high >= tp
+        else:
+            hit_sl, hit_tp = high >= sl, low <= tp
+        either = hit_sl | hit_tp
+        if not either.any():
+            self.stats['unresolved'] += 1
+            return STOP_LOSS
+        first = int(either.argmax())
+        if hit_sl[first] and hit_tp[first]:
+            self.stats['unresolved'] += 1
+            return STOP_LOSS
+        result = TAKE_PROFIT if hit_tp[first] else STOP_LOSS
+        self.stats['take_profit' if result == TAKE_PROFIT else 'stop_loss'] += 1
+        return result
+
+    def cache_info(self):
+        return self._window.cache_info()
+
+
+def open_resolver(data_path: str = "data/", symbol: str = "MES", bar_size: str = "5s",
+                  root: Optional[str] = None, **kwargs) -> FillResolver:
+    """
+    Resolver over the `SYMBOL_<bar size>` store written by `python -m src.aggregate --store`.
+    """
+    store = BarStore(root or os.path.join(data_path, "store"), f"{symbol}_{bar_size}")
+    return FillResolver(StoreSource(store), **kwargs)
@@ -0,0 +1,243 @@
+"""
+Successive-halving search over the sweep parameters.
+
+Instead of backtesting every grid combination on every day, a seeded
+sample of candidate configurations is scored on a few days, the best
+1/eta of them are kept and promoted to eta times as many days, and so on
+until the survivors have been run on the full history. Day subsets are
+nested (each rung adds days to the previous one) and kept in
+chronological order so equity still carries from day to day.
+
+Work is grouped by signal parameters and run in a process pool on the
+same per-day precomputed arrays as run_sweep; each worker keeps its
+smoothed z-scores across rungs.
+"""
+import argparse
+import math
+import os
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+import pandas as pd
+
+from . import sweep
+from .config import VWAPConfig
+from .metrics import METRIC_NAMES
+from .sweep import (SIGNAL_PARAMS, TRADE_PARAMS, _run_days, _signal_day, _smoothed_zscores, add_grid_arguments,
+                    grid_from_args, load_days, normalize_grid, worker_pool)
+
+PARAMS = SIGNAL_PARAMS + TRADE_PARAMS
+
+# Objective name -> score(row, dd_penalty); higher is better
+OBJECTIVES: Dict[str, Callable[[dict, float], float]] = {
+    'profit_factor': lambda row, dd_penalty: row['profit_factor'],
+    'sharpe': lambda row, dd_penalty: row['sharpe'],
+    # max_drawdown is negative, so this subtracts the drawdown from the PnL
+    'penalised_pnl': lambda row, dd_penalty: row['total_pnl'] + dd_penalty * row['max_drawdown'],
+}
+
+
+@dataclass
+class HalvingResult:
+    best: dict                # parameters and full-history metrics of the winner
+    leaderboard: pd.DataFrame  # last rung, best first
+    log: pd.DataFrame         # every evaluation: rung, days, candidate, parameters, metrics, score
+    evaluated_days: int       # candidate-days simulated
+    grid_days: int            # candidate-days an exhaustive grid would simulate
+
+
+def score_row(row: dict, objective: str, dd_penalty: float = 1.0, min_trades: int = 1) -> float:
+    """
+    Objective value of one evaluation; -inf when it has too few trades or no value.
+    """
+    if objective in OBJECTIVES:
+        value = OBJECTIVES[objective](row, dd_penalty)
+    else:
+        value = row[objective]
+    if row['total_trades'] < min_trades or value is None or math.isnan(value):
+        return -math.inf
+    return value
+
+
+def sample_candidates(grid: Dict[str, list], n: int, seed: int = 0) -> List[dict]:
+    """
+    Up to `n` distinct parameter combinations drawn from the grid without
+    replacement (all of them when the grid is smaller), in grid order.
+    """
+    sizes = [len(grid[name]) for name in PARAMS]
+    total = math.prod(sizes)
+    indices = range(total) if total <= n else sorted(random.Random(seed).sample(range(total), n))
+
+    candidates = []
+    for index in indices:
+        combo = {}
+        # Mixed-radix decode, last parameter varying fastest like itertools.product
+        for name, size in zip(reversed(PARAMS), reversed(sizes)):
+            index, pos = divmod(index, size)
+            combo[name] = grid[name][pos]
+        candidates.append({name: combo[name] for name in PARAMS})
+    return candidates
+
+
+def rung_schedule(n_candidates: int, n_days: int, min_days: int, eta: int) -> List[tuple]:
+    """
+    (candidates, days) per rung: candidates shrink and days grow by `eta`
+    until the survivors have been evaluated on all `n_days`.
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    rungs = []
+    candidates, days = n_candidates, min(max(min_days, 1), n_days)
+    while True:
+        rungs.append((candidates, days))
+        if days >= n_days:
+            return rungs
+        candidates = max(1, math.ceil(candidates / eta))
+        days = min(n_days, days * eta)
+
+
+def _evaluate_group(task) -> List[dict]:
+    """
+    Evaluate candidates sharing one set of signal parameters on the worker's
+    days at `day_indices` (chronological).
+    """
+    params, candidates, equity_start, day_indices = task
+    window, span, threshold, throttle_bars = params
+    zscores = _smoothed_zscores(window, span)
+    signal_days = [_signal_day(sweep._DAYS[i], zscores[i], threshold, throttle_bars) for i in day_indices]
+
+    rows = []
+    for cid, candidate in candidates:
+        acc = _run_days(signal_days, equity_start, candidate['risk_pct'], candidate['cooldown_bars'],
+                        candidate['max_contracts'])
+        rows.append({'candidate': cid, **candidate, **acc.result().as_dict()})
+    return rows
+
+
+def _tasks(candidates: Dict[int, dict], equity_start: float, day_indices: List[int]) -> List[tuple]:
+    groups = {}
+    for cid in sorted(candidates):
+        c = candidates[cid]
+        key = (c['window'], c['zscore_smooth_span'], c['zscore_threshold'], c['throttle_bars'])
+        groups.setdefault(key, []).append((cid, c))
+    # Equal window/span pairs adjacent so workers reuse their z-scores
+    return [(key, groups[key], equity_start, day_indices) for key in sorted(groups)]
+
+
+def successive_halving(
+    days: List[pd.DataFrame],
+    grid: Dict[str, Sequence],
+    n_candidates: int = 81,
+    min_days: int = 5,
+    eta: int = 3,
+    objective: str = 'penalised_pnl',
+    dd_penalty: float = 1.0,
+    min_trades: int = 1,
+    seed: int = 0,
+    base_config: VWAPConfig = VWAPConfig(),
+    equity_start: float = 5000,
+    processes: int = None,
+    verbose: bool = True
+) -> HalvingResult:
+    """
+    Search a parameter grid by successive halving.
+
+    Args:
+        days: Per-day OHLCV DataFrames in chronological order
+        grid: Parameter grid as accepted by run_sweep
+        n_candidates: Configurations sampled for the first rung
+        min_days: Days in the first rung
+        eta: Reduction factor: each rung keeps 1/eta of the candidates on eta times the days
+        objective: A key of OBJECTIVES or any metric from evaluate_performance
+        dd_penalty: Weight of the max drawdown in 'penalised_pnl'
+        min_trades: Evaluations with fewer trades are ranked last
+        seed: Seeds the candidate sample and the order days are added in
+        base_config: Session settings used for the VWAP
+        equity_start: Starting equity in USD
+        processes: Worker processes (None = CPU count, 1 = run in-process)
+
+    Returns:
+        HalvingResult
+    """
+    if objective not in OBJECTIVES and objective not in METRIC_NAMES:
+        raise ValueError(f"Unknown objective: {objective!r}")
+    if not days:
+        raise ValueError("No days to search on")
+    grid = normalize_grid(grid)
+    candidates = dict(enumerate(sample_candidates(grid, n_candidates, seed)))
+    schedule = rung_schedule(len(candidates), len(days), min_days, eta)
+
+    # Nested day subsets: a seeded order, each rung taking a longer prefix in date order
+    order = list(range(len(days)))
+    random.Random(seed).shuffle(order)
+
+    log, survivors, evaluated = [], candidates, 0
+    with worker_pool(days, base_config, processes) as pool:
+        for rung, (_, n_days) in enumerate(schedule):
+            day_indices = sorted(order[:n_days])
+            tasks = _tasks(survivors, equity_start, day_indices)
+            results = pool.map(_evaluate_group, tasks) if pool else map(_evaluate_group, tasks)
+            rows = [row for group in results for row in group]
+            for row in rows:
+                row['score'] = score_row(row, objective, dd_penalty, min_trades)
+                row['rung'] = rung
+                row['days'] = n_days
+            log.extend(rows)
+            evaluated += len(rows) * n_days
+
+            ranked = sorted(rows, key=lambda r: (-r['score'], r['candidate']))
+            keep = schedule[rung + 1][0] if rung + 1 < len(schedule) else len(ranked)
+            survivors = {r['candidate']: candidates[r['candidate']] for r in ranked[:keep]}
+            if verbose:
+                top = ranked[0]
+                print(f"🔍 Rung {rung}: {len(rows)} candidates on {n_days} days, "
+                      f"best #{top['candidate']} {objective}={top['score']:.4g}, keeping {len(survivors)}")
+
+    columns = ['rung', 'days', 'candidate', *PARAMS, *METRIC_NAMES, 'score']
+    log = pd.DataFrame(log, columns=columns)
+    last = log[log['rung'] == log['rung'].max()]
+    leaderboard = last.sort_values(['score', 'candidate'], ascending=[False, True], ignore_index=True)
+    return HalvingResult(
+        best=leaderboard.iloc[:1].to_dict('records')[0],  # per-column dtypes, so ints stay ints
+        leaderboard=leaderboard,
+        log=log,
+        evaluated_days=evaluated,
+        grid_days=math.prod(len(grid[name]) for name in PARAMS) * len(days),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Successive-halving parameter search for the VWAP z-score strategy")
+    parser.add_argument('--data', default='data/', help="Directory with per-day CSV files")
+    parser.add_argument('--shared', default=None, help="Read bars published by 'python -m src share' under this name")
+    add_grid_arguments(parser)
+    parser.add_argument('--candidates', type=int, default=81, help="Configurations sampled for the first rung")
+    parser.add_argument('--min-days', type=int, default=5, help="Days in the first rung")
+    parser.add_argument('--eta', type=int, default=3, help="Keep 1/eta of the candidates per rung")
+    parser.add_argument('--objective', default='penalised_pnl', choices=list(OBJECTIVES) + METRIC_NAMES)
+    parser.add_argument('--dd-penalty', type=float, default=1.0, help="Drawdown weight for penalised_pnl")
+    parser.add_argument('--min-trades', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--log', default=None, help="Write every evaluation to this CSV path")
+    args = parser.parse_args(argv)
+
+    result = successive_halving(
+        load_days(args.data, shared=args.shared), grid_from_args(args), n_candidates=args.candidates,
+        min_days=args.min_days, eta=args.eta, objective=args.objective, dd_penalty=args.dd_penalty,
+        min_trades=args.min_trades, seed=args.seed, equity_start=args.equity, processes=args.processes
+    )
+
+    if args.log:
+        os.makedirs(os.path.dirname(args.log) or ".", exist_ok=True)
+        result.log.to_csv(args.log, index=False)
+    print(result.leaderboard.head(10).to_string())
+    print(f"📊 {result.evaluated_days} candidate-days simulated, "
+          f"{result.evaluated_days / result.grid_days:.1%} of the {result.grid_days} of a full grid")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Vectorized indicator kernels for the trading system.
+All functions operate on NumPy arrays with cumulative sums and run in linear time.
+"""
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400_000_000_000
+
+
+def session_ids(
+    dates: pd.Series,
+    session_start: str = "17:00",
+    tz: str = "America/Chicago"
+) -> np.ndarray:
+    """
+    Label each bar with the trading session it belongs to.
+
+    A session runs from `session_start` local time until the same time on the
+    next day, so the CME Globex session that opens at 17:00 CT the prior
+    evening is kept together.
+
+    Args:
+        dates: Bar timestamps (tz-aware, or naive in exchange local time)
+        session_start: Local wall-clock time at which a new session begins
+        tz: Exchange timezone used to read the wall clock
+
+    Returns:
+        int64 array with one session number per bar
+    """
+    dt = pd.Series(dates)
+    if not pd.api.types.is_datetime64_any_dtype(dt):
+        dt = pd.to_datetime(dt, utc=True)
+    if dt.dt.tz is not None:
+        dt = dt.dt.tz_convert(tz).dt.tz_localize(None)
+    local_ns = dt.dt.as_unit('ns').to_numpy().view(np.int64)
+    offset_ns = pd.Timedelta(f"{session_start}:00").value
+    return (local_ns - offset_ns) // NS_PER_DAY
+
+
+def segment_starts(ids: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask marking the first bar of each run of equal ids.
+    """
+    starts = np.ones(len(ids), dtype=bool)
+    starts[1:] = ids[1:] != ids[:-1]
+    return starts
+
+
+def segmented_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum that restarts at every True in `starts`.
+
+    Args:
+        values: Float array to accumulate
+        starts: Boolean mask marking the first element of each segment
+
+    Returns:
+        Array of per-segment running totals
+    """
+    total = np.cumsum(values, dtype=np.float64)
+    if len(total) == 0:
+        return total
+    # Running total just before each segment starts, carried forward
+    before = np.concatenate(([0.0], total[:-1]))
+    base_pos = np.maximum.accumulate(np.where(starts, np.arange(len(total)), 0))
+    return total - before[base_pos]
+
+
+def session_vwap(
+    close: np.ndarray,
+    volume: np.ndarray,
+    starts: np.ndarray
+) -> np.ndarray:
+    """
+    VWAP that resets at the start of every session.
+
+    Args:
+        close: Close prices
+        volume: Bar volumes
+        starts: Boolean mask marking the first bar of each session
+
+    Returns:
+        VWAP array (NaN until a session has traded volume)
+    """
+    cum_pv = segmented_cumsum(close * volume, starts)
+    cum_vol = segmented_cumsum(volume, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return cum_pv / cum_vol
+
+
+def _segment_position(n: int, starts: np.ndarray) -> np.ndarray:
+    """
+    Offset of each element from the first element of its segment.
+    """
+    idx = np.arange(n)
+    return idx - np.maximum.accumulate(np.where(starts, idx, 0))
+
+
+def _rolling_sum(values: np.ndarray, window: int, starts: np.ndarray = None) -> np.ndarray:
+    """
+    Trailing-window sum via cumulative sums; the first window-1 entries
+    (of every segment, if `starts` marks segments) are NaN.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    csum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    if starts is None:
+        out[window - 1:] = csum[window:] - csum[:-window]
+    else:
+        end = np.flatnonzero(_segment_position(n, starts) >= window - 1) + 1
+        out[end - 1] = csum[end] - csum[end - window]
+    return out
+
+
+def _equal_run_length(values: np.ndarray, starts: np.ndarray = None) -> np.ndarray:
+    """
+    Length of the run of identical values ending at each position.
+    """
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.arange(n)
+    new_run = np.ones(n, dtype=bool)
+    new_run[1:] = values[1:] != values[:-1]
+    if starts is not None:
+        new_run |= starts
+    run_start = np.maximum.accumulate(np.where(new_run, idx, 0))
+    return idx - run_start + 1
+
+
+def rolling_mean_std(values: np.ndarray, window: int, starts: np.ndarray = None):
+    """
+    Rolling mean and sample standard deviation (ddof=1).
+
+    Matches pandas `rolling(window)` semantics: a window containing any NaN
+    yields NaN, and a window of identical values has exactly zero deviation.
+
+    Args:
+        values: Input array
+        window: Rolling window size
+        starts: Optional boolean mask of segment starts; windows never
+            reach back across a segment start (as with a groupby-rolling)
+
+    Returns:
+        Tuple of (mean, std) arrays
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = ~np.isnan(values)
+    # Centre the data before summing squares to limit cancellation error
+    shift = values[finite].mean() if finite.any() else 0.0
+    centred = np.where(finite, values - shift, 0.0)
+
+    count = _rolling_sum(finite.astype(np.float64), window, starts)
+    s1 = _rolling_sum(centred, window, starts)
+    s2 = _rolling_sum(centred * centred, window, starts)
+
+    full = count == window
+    mean = np.where(full, s1 / window + shift, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 * s1 / window) / (window - 1)
+    std = np.where(full, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+    constant = full & (_equal_run_length(values, starts) >= window)
+    mean[constant] = values[constant]
+    std[constant] = 0.0
+    return mean, std
+
+
+def rolling_zscore(values: np.ndarray, window: int, starts: np.ndarray = None) -> np.ndarray:
+    """
+    Rolling Z-score of `values` over a trailing window (restarting at `starts`, if given).
+    """
+    mean, std = rolling_mean_std(values, window, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (values - mean) / std
+
+
+def valid_rows(values: np.ndarray):
+    """
+    Index of the non-NaN rows of `values`: a slice when NaN only leads (warm-up
+    rows), so indexing with it returns views, otherwise a boolean mask.
+    """
+    missing = np.isnan(values)
+    first = int(missing.argmin()) if not missing.all() else len(missing)
+    return slice(first, None) if not missing[first:].any() else ~missing
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, starts: np.ndarray = None) -> np.ndarray:
+    """
+    True range; the first bar (of every segment) has no previous close and uses high - low.
+    """
+    prev_close = np.empty(len(close))
+    if len(close):
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+        if starts is not None:
+            prev_close[starts] = np.nan
+    return np.fmax(high, prev_close) - np.fmin(low, prev_close)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14,
+        starts: np.ndarray = None) -> np.ndarray:
+    """
+    Average true range as a simple rolling mean of the true range.
+
+    Returns:
+        ATR array with NaN for the first period-1 bars (of every segment, if
+        `starts` marks segments)
+    """
+    tr = true_range(
+        np.asarray(high, dtype=np.float64),
+        np.asarray(low, dtype=np.float64),
+        np.asarray(close, dtype=np.float64),
+        starts,
+    )
+    return _rolling_sum(tr, period, starts) / period
@@ -0,0 +1,205 @@
+"""
+Lightweight per-stage timing and counters for the backtest pipeline.
+
+Instrumentation is off by default: `stage()` then hands back a shared no-op
+context manager and `count()` returns at once, so instrumented code costs
+one attribute check per call. Enable it with `enable()`, or from the
+environment:
+    MES_INSTRUMENT=1            collect timings and counters
+    MES_INSTRUMENT_JSON=path    also write them as JSON at the end of a run
+    MES_PROFILE=<stage>         run every call of one stage under cProfile
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import time
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import pandas as pd
+
+_NULL_CONTEXT = nullcontext()
+
+
+@dataclass
+class StageTiming:
+    calls: int = 0
+    total: float = 0.0      # seconds, including nested stages
+    max: float = 0.0
+
+
+class _StageTimer:
+    __slots__ = ('owner', 'name', 'start', 'profiling')
+
+    def __init__(self, owner: "Instrumentation", name: str):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.profiling = self.name == self.owner.profile_stage
+        if self.profiling:
+            self.owner._start_profile()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if self.profiling:
+            self.owner._stop_profile()
+        self.owner.record(self.name, elapsed)
+        return False
+
+
+class Instrumentation:
+    """
+    Stage timings and named counters, collected only while enabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.profile_stage: Optional[str] = None
+        self.stages: Dict[str, StageTiming] = {}
+        self.counters: Dict[str, int] = {}
+        self.started: Optional[float] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._profile_depth = 0
+
+    def enable(self, profile_stage: Optional[str] = None):
+        """Start collecting; `profile_stage` names a stage to run under cProfile."""
+        self.enabled = True
+        self.profile_stage = profile_stage
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.stages.clear()
+        self.counters.clear()
+        self.started = time.perf_counter() if self.enabled else None
+        self._profiler = None
+        self._profile_depth = 0
+
+    def stage(self, name: str):
+        """Context manager timing the enclosed block as stage `name`."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, name)
+
+    def record(self, name: str, elapsed: float):
+        """Add one call of stage `name` that took `elapsed` seconds."""
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming()
+        timing.calls += 1
+        timing.total += elapsed
+        timing.max = max(timing.max, elapsed)
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def _start_profile(self):
+        # Recursive or nested calls of the profiled stage share one profiler run
+        if self._profile_depth == 0:
+            if self._profiler is None:
+                self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._profile_depth += 1
+
+    def _stop_profile(self):
+        self._profile_depth -= 1
+        if self._profile_depth == 0:
+            self._profiler.disable()
+
+    def summary(self) -> pd.DataFrame:
+        """One row per stage; 'pct' is relative to the wall time since enable()."""
+        wall = time.perf_counter() - self.started if self.started is not None else 0.0
+        rows = [
+            {'stage': name, 'calls': t.calls, 'total_s': t.total, 'mean_ms': t.total / t.calls * 1000,
+             'max_ms': t.max * 1000, 'pct': t.total / wall * 100 if wall > 0 else float('nan')}
+            for name, t in self.stages.items()
+        ]
+        columns = ['stage', 'calls', 'total_s', 'mean_ms', 'max_ms', 'pct']
+        return pd.DataFrame(rows, columns=columns).sort_values('total_s', ascending=False, ignore_index=True)
+
+    def as_dict(self) -> dict:
+        return {
+            'wall_s': time.perf_counter() - self.started if self.started is not None else 0.0,
+            'stages': {name: asdict(t) for name, t in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+
+    def render(self) -> str:
+        """The printed per-stage report (nested stages are included in their parents' totals)."""
+        lines = [f"\n⏱️ Stage Timings:", f"---------------------------"]
+        if self.stages:
+            lines.append(self.summary().to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+        else:
+            lines.append("No stages recorded.")
+        for name, value in self.counters.items():
+            lines.append(f"{name + ':':<20} {value}")
+        return "\n".join(lines)
+
+    def dump_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=1)
+
+    def profile_report(self, limit: int = 25, sort: str = 'cumulative') -> str:
+        """pstats listing of the profiled stage, or '' if nothing was profiled."""
+        if self._profiler is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+INSTRUMENTATION = Instrumentation()
+
+enable = INSTRUMENTATION.enable
+disable = INSTRUMENTATION.disable
+reset = INSTRUMENTATION.reset
+stage = INSTRUMENTATION.stage
+count = INSTRUMENTATION.count
+
+
+def enabled() -> bool:
+    return INSTRUMENTATION.enabled
+
+
+def timed(name: str):
+    """Decorator timing every call of the function as stage `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENTATION.enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(INSTRUMENTATION, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable_from_env():
+    """Enable instrumentation if MES_INSTRUMENT or MES_PROFILE is set."""
+    profile_stage = os.environ.get("MES_PROFILE") or None
+    if os.environ.get("MES_INSTRUMENT") or profile_stage:
+        enable(profile_stage)
+
+
+def report_from_env():
+    """Print the report (and write JSON or profile output) if instrumentation is enabled."""
+    if not INSTRUMENTATION.enabled:
+        return
+    print(INSTRUMENTATION.render())
+    if INSTRUMENTATION.profile_stage:
+        print(f"\n🔍 Profile of stage '{INSTRUMENTATION.profile_stage}':")
+        print(INSTRUMENTATION.profile_report())
+    path = os.environ.get("MES_INSTRUMENT_JSON")
+    if path:
+        INSTRUMENTATION.dump_json(path)
@@ -0,0 +1,362 @@
+"""
+Asyncio paper-trading service on live 1-minute bars.
+
+PaperTrader subscribes to a keepUpToDate bar stream, updates the VWAP
+z-score signals incrementally with StreamingVWAPSignal, and runs the same
+entry/stop/target/cooldown state machine as simulate_trades on each
+finished bar. Entries are sent as bracket orders (limit parent at the bar
+close, target limit and stop children). The time from a bar's arrival to
+the last order call returning is recorded in a latency histogram.
+
+Each session is traded as the backtest trades one day: indicators restart
+at the session open, and a position still open when a new session starts is
+flattened at market and left out of the trade log.
+
+Run against TWS/Gateway paper trading, or end to end against FakeIB
+replaying `data/`:
+    python -m src.live --fake --speed 600
+"""
+import argparse
+import asyncio
+import math
+import time
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .backtest import LONG, SHORT, STOP_LOSS, TAKE_PROFIT, TRADE_COLUMNS
+from .config import DEFAULT_IBKR_CONFIG, DEFAULT_TRADING_CONFIG, INSTRUMENTS, InstrumentConfig, VWAPConfig
+from .downloader import _contract
+from .metrics import evaluate_performance
+from .streaming import StreamingVWAPSignal, _field
+
+ATR_PERIOD = 14
+
+
+class LatencyHistogram:
+    """
+    Log-spaced latency histogram from `low` to `high` seconds.
+
+    Percentiles are reported as the upper edge of the bucket they fall in,
+    so they are accurate to one bucket width (about 26% with 10 buckets per decade).
+    """
+
+    def __init__(self, name: str, low: float = 1e-6, high: float = 10.0, buckets_per_decade: int = 10):
+        self.name = name
+        n = int(round(math.log10(high / low) * buckets_per_decade))
+        self.edges = np.logspace(math.log10(low), math.log10(high), n + 1)
+        self.counts = np.zeros(n + 2, dtype=np.int64)  # plus under- and overflow buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[np.searchsorted(self.edges, seconds, side='right')] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        return self.max if bucket >= len(self.edges) else min(self.edges[bucket], self.max)
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else float('nan'),
+            'p50_ms': self.percentile(50) * 1000,
+            'p90_ms': self.percentile(90) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+    def render(self) -> str:
+        s = self.summary()
+        return (f"{self.name + ':':<12} n={s['count']:<6} mean={s['mean_ms']:.3f}ms p50={s['p50_ms']:.3f}ms "
+                f"p90={s['p90_ms']:.3f}ms p99={s['p99_ms']:.3f}ms max={s['max_ms']:.3f}ms")
+
+
+class PaperTrader:
+    """
+    Live VWAP z-score strategy on an ib_insync IB (or FakeIB) connection.
+
+    Args:
+        ib: Connected client
+        contract: Qualified contract to trade
+        config: Strategy parameters
+        instrument: Contract specs (multiplier, costs, max_contracts)
+        equity_start: Starting equity in USD
+        risk_pct: Fraction of equity risked per trade
+        cooldown_bars: Bars to wait after an exit before re-entering
+    """
+
+    def __init__(self, ib, contract, config: VWAPConfig = VWAPConfig(),
+                 instrument: InstrumentConfig = INSTRUMENTS['MES'], equity_start: float = 5000,
+                 risk_pct: float = 0.01, cooldown_bars: int = 10):
+        self.ib = ib
+        self.contract = contract
+        self.config = config
+        self.instrument = instrument
+        self.risk_pct = risk_pct
+        self.cooldown_bars = cooldown_bars
+        self.equity = equity_start
+        self.engine = StreamingVWAPSignal(config)
+        self.trades: List[dict] = []
+        self.decision_latency = LatencyHistogram('decision')
+        self.submit_latency = LatencyHistogram('submission')
+        self.trading = True
+        self._bracket = None
+        self._seen = 0
+        self._session = None
+        self._reset_session()
+
+    # --------------------------------------------------------- state machine
+
+    def _reset_session(self):
+        self.engine.reset()
+        self._prev_close = math.nan
+        self._atr_csum = deque([0.0], maxlen=ATR_PERIOD + 1)
+        self._row = -1        # kernel row: bars with a smoothed z-score and a full ATR window
+        self._next_step = 0
+        self._bar = None
+        self.pos_side = 0
+        self.cooldown = 0
+
+    def on_bar(self, bar, received: Optional[float] = None):
+        """
+        Process one finished bar.
+
+        Args:
+            bar: BarData-like object with date, open, high, low, close, volume
+            received: perf_counter() time the bar arrived, for the latency histograms
+        """
+        received = time.perf_counter() if received is None else received
+        session = self.engine.session_id(_field(bar, 'date'))
+        if session != self._session:
+            if self.pos_side != 0:
+                # Dropped like a position still open at the end of a backtest day
+                self._flatten()
+            self._session = session
+            self._reset_session()
+
+        update = self.engine.update(bar)
+        if update.zscore_smooth != update.zscore_smooth:
+            return
+        high, low, close = float(_field(bar, 'high')), float(_field(bar, 'low')), update.close
+        # ATR over the rows with a smoothed z-score, as simulate_trades computes it on the signal frame
+        prev = self._prev_close
+        tr = high - low if prev != prev else max(high, prev) - min(low, prev)
+        self._prev_close = close
+        self._atr_csum.append(self._atr_csum[-1] + tr)
+        if len(self._atr_csum) <= ATR_PERIOD:
+            return
+        atr = (self._atr_csum[-1] - self._atr_csum[0]) / ATR_PERIOD
+
+        self._row += 1
+        self._bar = (update.date, close, high, low, atr, update.long_signal, update.short_signal)
+        # Kernel step k works on row k when flat, and checks row k + 1 when in a position
+        while True:
+            if self.pos_side == 0 and self._next_step == self._row:
+                self._flat_step(received)
+            elif self.pos_side != 0 and self._next_step + 1 == self._row:
+                self._exit_step()
+            else:
+                break
+            self._next_step += 1
+        self.decision_latency.record(time.perf_counter() - received)
+
+    def _flat_step(self, received: float):
+        if self.cooldown > 0:
+            self.cooldown = max(0, self.cooldown - 1)
+            return
+        date, close, _, _, atr, long_signal, short_signal = self._bar
+        spec = self.instrument
+        point_risk = max(atr * 0.8, 0.5)
+        contracts = min(int(self.equity * self.risk_pct // (point_risk * spec.multiplier)), spec.max_contracts)
+        if contracts == 0 or not (long_signal or short_signal):
+            return
+        side = LONG if long_signal else SHORT
+        self.pos_side = side
+        self.pos_entry_time = date
+        self.pos_entry_price = close
+        self.pos_sl = close - side * point_risk
+        self.pos_tp = close + side * atr * 2.4
+        self.pos_contracts = contracts
+        if self.trading:
+            self._submit_bracket(received)
+
+    def _exit_step(self):
+        date, _, high, low, _, _, _ = self._bar
+        if self.pos_side == LONG:
+            if low <= self.pos_sl:
+                fill, result = self.pos_sl, STOP_LOSS
+            elif high >= self.pos_tp:
+                fill, result = self.pos_tp, TAKE_PROFIT
+            else:
+                return
+            pnl_points = fill - self.pos_entry_price
+        else:
+            if high >= self.pos_sl:
+                fill, result = self.pos_sl, STOP_LOSS
+            elif low <= self.pos_tp:
+                fill, result = self.pos_tp, TAKE_PROFIT
+            else:
+                return
+            pnl_points = self.pos_entry_price - fill
+
+        spec = self.instrument
+        n = self.pos_contracts
+        pnl_net = pnl_points - (spec.slippage_per_contract + spec.commission_per_contract / spec.multiplier) * n
+        pnl_usd = pnl_net * n * spec.multiplier
+        self.equity += pnl_usd
+        if self.trading:
+            self.trades.append(dict(zip(TRADE_COLUMNS, (
+                'long' if self.pos_side == LONG else 'short', self.pos_entry_time, self.pos_entry_price,
+                date, fill, n, pnl_net, pnl_usd, 'take_profit' if result == TAKE_PROFIT else 'stop_loss',
+                self.equity))))
+            self._close_bracket()
+        self.pos_side = 0
+        self.cooldown = self.cooldown_bars
+
+    # ----------------------------------------------------------------- orders
+
+    def _submit_bracket(self, received: float):
+        action = 'BUY' if self.pos_side == LONG else 'SELL'
+        bracket = self.ib.bracketOrder(action, self.pos_contracts, self.pos_entry_price, self.pos_tp, self.pos_sl)
+        self._bracket = [self.ib.placeOrder(self.contract, order) for order in bracket]
+        self.submit_latency.record(time.perf_counter() - received)
+
+    def _close_bracket(self):
+        """Cancel the children the broker has not filled; if none filled, close the position at market."""
+        if self._bracket is None:
+            return
+        parent, *children = self._bracket
+        self._bracket = None
+        working = [t for t in children if not t.isDone()]
+        for trade in working:
+            self.ib.cancelOrder(trade.order)
+        if len(working) == len(children) and parent.orderStatus.status == 'Filled':
+            self._market_close(parent.order)
+
+    def _market_close(self, entry_order):
+        action = 'SELL' if entry_order.action == 'BUY' else 'BUY'
+        try:
+            from ib_insync import MarketOrder
+            order = MarketOrder(action, entry_order.totalQuantity)
+        except ImportError:
+            from .fake_ib import FakeOrder
+            order = FakeOrder(action=action, totalQuantity=entry_order.totalQuantity, orderType='MKT')
+        self.ib.placeOrder(self.contract, order)
+
+    def _flatten(self):
+        self.pos_side = 0
+        if self.trading:
+            self._close_bracket()
+
+    # ------------------------------------------------------------------- loop
+
+    def _on_update(self, bars, has_new_bar: bool):
+        if not has_new_bar:
+            return
+        received = time.perf_counter()
+        # Every bar but the last (still forming) is finished
+        for bar in bars[self._seen:len(bars) - 1]:
+            self.on_bar(bar, received)
+        self._seen = max(self._seen, len(bars) - 1)
+
+    async def run(self, duration: Optional[float] = None):
+        """
+        Subscribe and trade until `duration` seconds have passed, or the bar
+        stream ends (a FakeIB replay), or the task is cancelled.
+        """
+        cfg = DEFAULT_TRADING_CONFIG
+        bars = await self.ib.reqHistoricalDataAsync(
+            self.contract, endDateTime='', durationStr=cfg.duration, barSizeSetting=cfg.bar_size,
+            whatToShow='TRADES', useRTH=cfg.use_rth, formatDate=2, keepUpToDate=True)
+
+        # Historical bars only warm up the indicators; trading starts flat on the first live bar
+        self.trading = False
+        for bar in bars[:-1]:
+            self.on_bar(bar)
+        self._seen = max(len(bars) - 1, 0)
+        self.pos_side = 0
+        self.cooldown = 0
+        self._next_step = self._row + 1
+        self.trading = True
+
+        bars.updateEvent += self._on_update
+        try:
+            finished = getattr(bars, 'finished', None)
+            waiter = finished.wait() if finished is not None else asyncio.Event().wait()
+            await asyncio.wait_for(waiter, duration)
+            # The replay has ended, so its last bar is complete too
+            for bar in bars[self._seen:]:
+                self.on_bar(bar)
+            self._seen = len(bars)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            bars.updateEvent -= self._on_update
+            self.ib.cancelHistoricalData(bars)
+
+    def trade_log(self) -> pd.DataFrame:
+        return pd.DataFrame(self.trades, columns=TRADE_COLUMNS)
+
+    def render(self) -> str:
+        return "\n".join(["\n⏱️ Bar-to-Order Latency:", self.decision_latency.render(), self.submit_latency.render()])
+
+
+async def run(args) -> PaperTrader:
+    if args.fake:
+        from .fake_ib import FakeIB
+        ib = FakeIB(args.fake_data, latency=0.0, speed=args.speed, days=args.days)
+    else:
+        from ib_insync import IB
+        ib = IB()
+    await ib.connectAsync(args.host, args.port, clientId=args.client_id)
+    try:
+        details = await ib.reqContractDetailsAsync(_contract(args.symbol, args.exchange, args.fake))
+        trader = PaperTrader(ib, details[0].contract, equity_start=args.equity, risk_pct=args.risk_pct,
+                             cooldown_bars=args.cooldown_bars, instrument=INSTRUMENTS[args.symbol])
+        await trader.run(args.duration)
+        return trader
+    finally:
+        ib.disconnect()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paper-trade the VWAP z-score strategy on live bars")
+    parser.add_argument('--symbol', default=DEFAULT_TRADING_CONFIG.symbol)
+    parser.add_argument('--exchange', default=DEFAULT_TRADING_CONFIG.exchange)
+    parser.add_argument('--host', default=DEFAULT_IBKR_CONFIG.host)
+    parser.add_argument('--port', type=int, default=DEFAULT_IBKR_CONFIG.port)
+    parser.add_argument('--client-id', type=int, default=DEFAULT_IBKR_CONFIG.client_id)
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--risk-pct', type=float, default=0.01)
+    parser.add_argument('--cooldown-bars', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=None, help="Seconds to run (default: until stopped)")
+    parser.add_argument('--out', default=None, help="Write the trade log to this CSV path")
+    parser.add_argument('--fake', action='store_true', help="Replay local CSV files through FakeIB instead of IB")
+    parser.add_argument('--fake-data', default="data/", help="CSV directory used by --fake")
+    parser.add_argument('--speed', type=float, default=0.0, help="Replay speed as a multiple of real time (0: max)")
+    parser.add_argument('--days', nargs='+', default=None, help="Trade dates to replay with --fake (default: all)")
+    args = parser.parse_args(argv)
+
+    trader = asyncio.run(run(args))
+    trades = trader.trade_log()
+    if args.out:
+        trades.to_csv(args.out, index=False)
+    if trades.empty:
+        print("⚠️ No trades")
+    else:
+        evaluate_performance(trades)
+    print(trader.render())
+    return trader
+
+
+if __name__ == "__main__":
+    main()
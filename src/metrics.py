@@ -1,49 +1,172 @@
+import math
+from dataclasses import asdict, dataclass, fields
+
 import pandas as pd
 import numpy as np
 
-def evaluate_performance(trades_df: pd.DataFrame, risk_free_rate: float = 0.0):
+from . import instrumentation
+
+@dataclass
+class PerformanceResult:
+    """Performance metrics of a trade sequence; PnL figures are in points."""
+    total_trades: int
+    win_rate: float
+    total_pnl: float
+    avg_pnl: float
+    sharpe: float
+    max_drawdown: float
+    profit_factor: float
+    expectancy: float
+    avg_win: float
+    avg_loss: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def render(self) -> str:
+        """The printed performance report."""
+        if self.total_trades == 0:
+            return "No trades executed."
+        return "\n".join([
+            f"\n📊 Performance Metrics:",
+            f"---------------------------",
+            f"Total Trades:        {self.total_trades}",
+            f"Win Rate:            {self.win_rate:.2f}%",
+            f"Total PnL:           {self.total_pnl:.2f} points",
+            f"Average PnL/Trade:   {self.avg_pnl:.2f} points",
+            f"Sharpe Ratio:        {self.sharpe:.2f}",
+            f"Max Drawdown:        {self.max_drawdown:.2f} points",
+            f"Profit Factor:       {self.profit_factor:.2f}",
+            f"Expectancy:          {self.expectancy:.2f} points/trade",
+            f"Avg Win / Avg Loss:  {self.avg_win:.2f} / {self.avg_loss:.2f}",
+        ])
+
+    def __str__(self) -> str:
+        return self.render()
+
+METRIC_NAMES = [f.name for f in fields(PerformanceResult)]
+
+class PerformanceAccumulator:
+    """
+    Running performance statistics, updated in O(1) per trade.
+
+    Accumulators built over consecutive slices of a trade sequence (e.g. by
+    parallel workers) can be combined with `merge` in chronological order.
+    """
+
+    def __init__(self, risk_free_rate: float = 0.0):
+        self.risk_free_rate = risk_free_rate
+        self.count = 0
+        self.wins = 0
+        self.total = 0.0           # cumulative PnL
+        self.mean = 0.0            # Welford running mean and sum of squared deviations
+        self.m2 = 0.0
+        self.peak = -math.inf      # running max of cumulative PnL
+        self.trough = math.inf     # running min of cumulative PnL
+        self.max_drawdown = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+
+    def update(self, pnl: float) -> "PerformanceAccumulator":
+        """Add one closed trade's PnL."""
+        self.count += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        else:
+            self.gross_loss += pnl
+        delta = pnl - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (pnl - self.mean)
+
+        self.total += pnl
+        self.peak = max(self.peak, self.total)
+        self.trough = min(self.trough, self.total)
+        self.max_drawdown = min(self.max_drawdown, self.total - self.peak)
+        return self
+
+    @classmethod
+    def from_pnl(cls, pnl, risk_free_rate: float = 0.0) -> "PerformanceAccumulator":
+        """Build an accumulator from an array of trade PnL with vectorised operations."""
+        pnl = np.asarray(pnl, dtype=np.float64)
+        acc = cls(risk_free_rate)
+        if len(pnl) == 0:
+            return acc
+        cumulative = np.cumsum(pnl)
+        running_max = np.maximum.accumulate(cumulative)
+        won = pnl > 0
+        acc.count = len(pnl)
+        acc.wins = int(won.sum())
+        acc.total = float(cumulative[-1])
+        acc.mean = float(pnl.mean())
+        acc.m2 = float(((pnl - acc.mean) ** 2).sum())
+        acc.peak = float(running_max[-1])
+        acc.trough = float(cumulative.min())
+        acc.max_drawdown = float((cumulative - running_max).min())
+        acc.gross_profit = float(pnl[won].sum())
+        acc.gross_loss = float(pnl[~won].sum())
+        return acc
+
+    def merge(self, other: "PerformanceAccumulator") -> "PerformanceAccumulator":
+        """Append the trades summarised by `other`, which must follow this accumulator's trades."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            risk_free_rate = self.risk_free_rate
+            self.__dict__.update(other.__dict__)
+            self.risk_free_rate = risk_free_rate
+            return self
+
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+
+        # Drawdowns inside `other` may be measured from a peak reached earlier in `self`
+        self.max_drawdown = min(self.max_drawdown, other.max_drawdown,
+                                self.total + other.trough - self.peak)
+        self.peak = max(self.peak, self.total + other.peak)
+        self.trough = min(self.trough, self.total + other.trough)
+        self.total += other.total
+
+        self.count = n
+        self.wins += other.wins
+        self.gross_profit += other.gross_profit
+        self.gross_loss += other.gross_loss
+        return self
+
+    def result(self) -> PerformanceResult:
+        n = self.count
+        if n == 0:
+            return PerformanceResult(0, *([np.nan] * (len(METRIC_NAMES) - 1)))
+
+        losses = n - self.wins
+        pnl_std = math.sqrt(self.m2 / (n - 1)) if n > 1 else np.nan
+
+        # Sharpe Ratio (scaled by sqrt(n))
+        sharpe = (self.mean - self.risk_free_rate) / pnl_std * np.sqrt(n) if pnl_std > 0 else np.nan
+
+        # Profit Factor
+        profit_factor = self.gross_profit / abs(self.gross_loss) if self.gross_loss != 0 else np.inf
+
+        return PerformanceResult(
+            total_trades=n,
+            win_rate=self.wins / n * 100,
+            total_pnl=self.total,
+            avg_pnl=self.mean,
+            sharpe=sharpe,
+            max_drawdown=self.max_drawdown,
+            profit_factor=profit_factor,
+            expectancy=self.mean,
+            avg_win=self.gross_profit / self.wins if self.wins else 0,
+            avg_loss=self.gross_loss / losses if losses else 0,
+        )
+
+@instrumentation.timed('metrics')
+def evaluate_performance(trades_df: pd.DataFrame, risk_free_rate: float = 0.0) -> PerformanceResult:
     if trades_df.empty:
-        print("No trades executed.")
-        return
-
-    n = len(trades_df)
-    wins = trades_df[trades_df['pnl'] > 0]
-    losses = trades_df[trades_df['pnl'] <= 0]
-
-    total_pnl = trades_df['pnl'].sum()
-    avg_pnl = trades_df['pnl'].mean()
-    win_rate = len(wins) / n * 100
-    pnl_std = trades_df['pnl'].std()
-
-    # Sharpe Ratio (scaled by sqrt(n))
-    sharpe = (avg_pnl - risk_free_rate) / pnl_std * np.sqrt(n) if pnl_std > 0 else np.nan
-
-    # Max Drawdown (on points equity curve)
-    cumulative_pnl = trades_df['pnl'].cumsum()
-    running_max = cumulative_pnl.cummax()
-    drawdown = cumulative_pnl - running_max
-    max_drawdown = drawdown.min()
-
-    # Profit Factor
-    gross_profit = wins['pnl'].sum()
-    gross_loss = losses['pnl'].sum()
-    profit_factor = gross_profit / abs(gross_loss) if gross_loss != 0 else np.inf
-
-    # Expectancy
-    expectancy = avg_pnl
-
-    # Avg win/loss
-    avg_win = wins['pnl'].mean() if not wins.empty else 0
-    avg_loss = losses['pnl'].mean() if not losses.empty else 0
-
-    print(f"\n📊 Performance Metrics:")
-    print(f"---------------------------")
-    print(f"Total Trades:        {n}")
-    print(f"Win Rate:            {win_rate:.2f}%")
-    print(f"Total PnL:           {total_pnl:.2f} points")
-    print(f"Average PnL/Trade:   {avg_pnl:.2f} points")
-    print(f"Sharpe Ratio:        {sharpe:.2f}")
-    print(f"Max Drawdown:        {max_drawdown:.2f} points")
-    print(f"Profit Factor:       {profit_factor:.2f}")
-    print(f"Expectancy:          {expectancy:.2f} points/trade")
-    print(f"Avg Win / Avg Loss:  {avg_win:.2f} / {avg_loss:.2f}")
\ No newline at end of file
+        result = PerformanceAccumulator(risk_free_rate).result()
+    else:
+        result = PerformanceAccumulator.from_pnl(trades_df['pnl'], risk_free_rate).result()
+    print(result.render())
+    return result
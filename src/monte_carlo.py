@@ -0,0 +1,211 @@
+"""
+Monte Carlo robustness checks for a realised trade log.
+
+Resamples the per-trade USD PnL many times (iid bootstrap, circular block
+bootstrap or trade-order permutation) and reports the distribution of final
+equity, max drawdown and Sharpe ratio. Paths are generated as 2-D arrays in
+chunks of bounded size; each chunk has its own seed, so results do not
+depend on how the chunks are spread over worker processes.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('iid', 'block', 'permutation')
+STATISTICS = ('final_equity', 'max_drawdown', 'sharpe')
+
+# Statistics a method leaves unchanged on every path: reordering trades
+# keeps their sum, mean and standard deviation
+INVARIANT = {'permutation': ('final_equity', 'sharpe')}
+
+
+def resample_indices(rng: np.random.Generator, n_paths: int, n_trades: int, method: str = 'iid',
+                     block_size: int = 10) -> np.ndarray:
+    """
+    (n_paths, n_trades) array of trade indices for one batch of paths.
+
+    Args:
+        rng: Random generator
+        n_paths: Number of paths
+        n_trades: Trades per path (the length of the original log)
+        method: 'iid' draws trades with replacement, 'block' draws runs of
+            `block_size` consecutive trades (wrapping around the end) to keep
+            short-range dependence, 'permutation' shuffles the original order
+        block_size: Run length for the block bootstrap
+    """
+    if method == 'iid':
+        return rng.integers(0, n_trades, size=(n_paths, n_trades), dtype=np.int32)
+    if method == 'block':
+        n_blocks = -(-n_trades // block_size)
+        starts = rng.integers(0, n_trades, size=(n_paths, n_blocks, 1), dtype=np.int32)
+        idx = (starts + np.arange(block_size, dtype=np.int32)) % n_trades
+        return idx.reshape(n_paths, -1)[:, :n_trades]
+    if method == 'permutation':
+        return rng.permuted(np.broadcast_to(np.arange(n_trades, dtype=np.int32), (n_paths, n_trades)), axis=1)
+    raise ValueError(f"Unknown method: {method!r}")
+
+
+def path_statistics(paths: np.ndarray, equity_start: float = 5000,
+                    risk_free_rate: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Final equity, max drawdown and Sharpe ratio of each row of a PnL matrix.
+
+    The Sharpe ratio is scaled by sqrt(n) as in metrics.py; the drawdown is
+    measured on the equity curve including the starting equity. `paths` is
+    overwritten with the cumulative PnL.
+    """
+    n = paths.shape[1]
+    mean = paths.mean(axis=1)
+    std = paths.std(axis=1, ddof=1) if n > 1 else np.full(len(paths), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, (mean - risk_free_rate) / std * np.sqrt(n), np.nan)
+
+    equity = np.cumsum(paths, axis=1, out=paths)
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 0.0, out=peak)
+    drawdown = np.subtract(equity, peak, out=peak).min(axis=1)
+    return {'final_equity': equity_start + equity[:, -1], 'max_drawdown': drawdown, 'sharpe': sharpe}
+
+
+def _simulate_chunk(task) -> Dict[str, np.ndarray]:
+    pnl, n_paths, method, block_size, equity_start, risk_free_rate, seed = task
+    rng = np.random.default_rng(seed)
+    paths = pnl[resample_indices(rng, n_paths, len(pnl), method, block_size)]
+    return path_statistics(paths, equity_start, risk_free_rate)
+
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    observed: Dict[str, float]        # statistics of the realised trade order
+    samples: Dict[str, np.ndarray]    # one value per simulated path
+
+    @property
+    def n_paths(self) -> int:
+        return len(self.samples['final_equity'])
+
+    def confidence_interval(self, statistic: str, level: float = 0.95) -> Tuple[float, float]:
+        """Equal-tailed percentile interval, ignoring NaN paths."""
+        tail = (1 - level) / 2 * 100
+        low, high = np.nanpercentile(self.samples[statistic], [tail, 100 - tail])
+        return float(low), float(high)
+
+    def pct_worse(self, statistic: str) -> float:
+        """
+        Share of paths (in %) doing worse than the realised sequence. Values
+        within floating-point tolerance of it count as ties, and statistics
+        the method cannot change give NaN.
+        """
+        observed = self.observed[statistic]
+        if statistic in INVARIANT.get(self.method, ()) or np.isnan(observed):
+            return np.nan
+        values = self.samples[statistic]
+        worse = (values < observed) & ~np.isclose(values, observed, rtol=1e-9, atol=1e-9)
+        return np.mean(worse) * 100
+
+    def summary(self, level: float = 0.95) -> pd.DataFrame:
+        rows = {}
+        for name in STATISTICS:
+            values = self.samples[name]
+            low, high = self.confidence_interval(name, level)
+            rows[name] = {
+                'observed': self.observed[name],
+                'mean': np.nanmean(values),
+                'median': np.nanmedian(values),
+                'ci_low': low,
+                'ci_high': high,
+                'pct_worse': self.pct_worse(name),
+            }
+        return pd.DataFrame(rows).T
+
+    def render(self, level: float = 0.95) -> str:
+        return "\n".join([
+            f"\n🎲 Monte Carlo ({self.method}, {self.n_paths} paths, {level:.0%} CI):",
+            f"---------------------------",
+            self.summary(level).to_string(float_format=lambda x: f"{x:.2f}"),
+        ])
+
+
+def monte_carlo(
+    pnl,
+    n_paths: int = 10_000,
+    method: str = 'iid',
+    block_size: int = 10,
+    equity_start: float = 5000,
+    risk_free_rate: float = 0.0,
+    seed: int = None,
+    max_chunk_bytes: int = 64 * 1024 ** 2,
+    processes: int = 1
+) -> MonteCarloResult:
+    """
+    Resample a trade PnL series and collect path statistics.
+
+    Args:
+        pnl: Per-trade PnL in USD (e.g. the `pnl_usd` column of a trade log)
+        n_paths: Number of simulated paths
+        method: One of METHODS, see resample_indices
+        block_size: Run length for the block bootstrap
+        equity_start: Starting equity in USD
+        risk_free_rate: Per-trade risk-free return used in the Sharpe ratio
+        seed: Seed for reproducible results
+        max_chunk_bytes: Approximate memory budget of one chunk of paths
+        processes: Worker processes (1 = run in-process, None = CPU count)
+
+    Returns:
+        MonteCarloResult
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method!r}")
+    pnl = np.asarray(pnl, dtype=np.float64)
+    pnl = pnl[~np.isnan(pnl)]
+    if len(pnl) == 0:
+        raise ValueError("No trades to resample")
+
+    # Index matrix, PnL paths and running peak are alive at the same time
+    chunk = max(1, min(n_paths, max_chunk_bytes // (20 * len(pnl))))
+    sizes = [chunk] * (n_paths // chunk) + ([n_paths % chunk] if n_paths % chunk else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(pnl, size, method, block_size, equity_start, risk_free_rate, s) for size, s in zip(sizes, seeds)]
+
+    if processes == 1 or len(tasks) == 1:
+        results = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_simulate_chunk, tasks))
+
+    observed = path_statistics(pnl[np.newaxis].copy(), equity_start, risk_free_rate)
+    return MonteCarloResult(
+        method=method,
+        observed={name: float(values[0]) for name, values in observed.items()},
+        samples={name: np.concatenate([r[name] for r in results]) for name in STATISTICS},
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness check of a trade log")
+    parser.add_argument('--trades', default='data/full_trade_log.csv', help="Trade log CSV")
+    parser.add_argument('--column', default='pnl_usd', help="PnL column to resample")
+    parser.add_argument('--paths', type=int, default=10_000)
+    parser.add_argument('--method', default='iid', choices=METHODS)
+    parser.add_argument('--block-size', type=int, default=10)
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--level', type=float, default=0.95, help="Confidence level of the intervals")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--processes', type=int, default=1, help="0 = CPU count")
+    args = parser.parse_args(argv)
+
+    trades = pd.read_csv(args.trades)
+    result = monte_carlo(
+        trades[args.column], n_paths=args.paths, method=args.method, block_size=args.block_size,
+        equity_start=args.equity, seed=args.seed, processes=args.processes or None
+    )
+    print(result.render(args.level))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,188 @@
-import pandas as pd
+"""
+Backtest every stored day, carrying equity from one day to the next.
+
+Runs are recorded in the run registry (see registry.py): days whose bars,
+configuration, code and starting equity match a stored result are read
+back instead of simulated, so a run after fetching one new day only
+simulates that day.
+
+Headless by default; plotting (and matplotlib) is only loaded for --plot-day:
+    python -m src backtest --plot-day 20250417
+"""
+import argparse
 import os
-from signals import compute_vwap_zscore_signals
-from backtest import simulate_trades
-from metrics import evaluate_performance
-from plot_trades import plot_day_trades
+from dataclasses import asdict
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from . import instrumentation
+from .backtest import simulate_trades
+from .cache import cached_compute_vwap_zscore_signals, default_cache
+from .config import VWAPConfig
+from .fills import FillResolver, open_resolver
+from .metrics import evaluate_performance
+from .mtm import equity_from_trades
+from .registry import RunRegistry, RunSession, config_hash, input_hash
+from .shm import open_bars
+from .store import BarReader
 
 DATA_PATH = "data/"
-files = sorted([f for f in os.listdir(DATA_PATH) if f.endswith(".csv")])
 
-all_trades = []
-equity_curve = []
+# simulate_trades arguments of every day
+TRADE_ARGS = dict(risk_pct=0.01, multiplier=5, cooldown_bars=10, max_contracts=5)
+
+
+def run_config(symbol: str, config: VWAPConfig = VWAPConfig(), fills: Optional[dict] = None) -> dict:
+    """
+    Everything besides bars and code that determines a run's results, as recorded in the registry.
+
+    `fills` describes the intrabar fill resolver (see fills_config), if one is used.
+    """
+    out = {'symbol': symbol, 'signals': asdict(config), 'trades': dict(TRADE_ARGS)}
+    if fills is not None:
+        out['fills'] = fills
+    return out
+
+
+def fills_config(resolver: FillResolver, bar_size: str) -> dict:
+    """Registry description of a store-backed resolver: its bar size and which fine bars it holds."""
+    return {'bar_size': bar_size, 'bars': config_hash({'days': resolver.source.store.day_ranges()})}
+
+
+def run_backtest(store: BarReader, equity_start: float = 5000, session: Optional[RunSession] = None,
+                 resolver: Optional[FillResolver] = None) -> Tuple[pd.DataFrame, List[float]]:
+    """
+    Simulate each stored day with the equity left by the previous ones.
+
+    Args:
+        store: BarStore or SharedBars
+        equity_start: Starting equity
+        session: Registry run to reuse stored day results from and record new ones in
+            (started with a run_config that includes the resolver, if any)
+        resolver: Optional FillResolver settling bars that touch both stop and target
+
+    Returns:
+        (trade log with a 'day' column, equity after each trade)
+    """
+    all_trades = []
+    equity_curve = []
+    equity = equity_start
+
+    for day in store.days:
+        found = None
+        if session is not None:
+            day_hash = input_hash(store.load_arrays(day, day))
+            found = session.lookup(day, day_hash, equity, store.tz)
+
+        if found is not None:
+            trades = found[1]
+        else:
+            with instrumentation.stage('load'):
+                df = store.load_frame(day, day)
+            # The day's frame is not used again, so signals go into it without copies
+            df = cached_compute_vwap_zscore_signals(df, copy=False)
+
+            # Simulate trades with current equity
+            trades = simulate_trades(df, equity_start=equity, resolver=resolver, **TRADE_ARGS)
+            if session is not None:
+                equity_out = equity + (trades["pnl"].sum() if not trades.empty else 0.0)
+                session.record(day, day_hash, equity, equity_out, trades)
+
+        if not trades.empty:
+            trades["day"] = day
+            all_trades.append(trades)
+
+            equity += trades["pnl"].sum()  # Use pnl in points
+            equity_curve.extend(trades["equity_after"].tolist())  # Still in points
+
+    all_trades_df = pd.concat(all_trades, ignore_index=True) if all_trades else pd.DataFrame()
+    return all_trades_df, equity_curve
+
+
+def plot_day(store: BarReader, all_trades_df: pd.DataFrame, day_to_plot: str):
+    from .plot_trades import plot_day_trades
+
+    df = store.load_frame(day_to_plot, day_to_plot)
+    df = cached_compute_vwap_zscore_signals(df)
+
+    # Ensure datetime format
+    trades = all_trades_df.copy()
+    trades['entry_time'] = pd.to_datetime(trades['entry_time'], utc=True).dt.tz_localize(None)
+    trades['exit_time'] = pd.to_datetime(trades['exit_time'], utc=True).dt.tz_localize(None)
+
+    plot_day_trades(df, trades, day_to_plot)
 
-# Initialize equity
-equity = 5000
 
-for file in files:
-    df = pd.read_csv(os.path.join(DATA_PATH, file), parse_dates=['date'])
-    df = compute_vwap_zscore_signals(df)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest every stored day with equity carried forward")
+    parser.add_argument('--data', default=DATA_PATH, help="Directory with per-day CSV files and the bar store")
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--trades-out', default="data/full_trade_log.csv")
+    parser.add_argument('--equity-out', default="data/equity_curve.csv")
+    parser.add_argument('--mtm-out', default="data/equity_mtm.npz",
+                        help="Per-bar mark-to-market equity (.npz); empty to skip")
+    parser.add_argument('--shared', default=None, help="Read bars published by 'python -m src share' under this name")
+    parser.add_argument('--registry', default="data/runs.sqlite",
+                        help="Run registry to reuse day results from and record this run in; empty to disable")
+    parser.add_argument('--fills-store', default=None,
+                        help="Store root with finer bars (see 'python -m src.aggregate --store') to resolve "
+                             "bars that touch both stop and target")
+    parser.add_argument('--fills-bar-size', default="5s", help="Bar size of the --fills-store bars")
+    parser.add_argument('--plot-day', default=None, help="Chart the trades of this day (YYYYMMDD)")
+    args = parser.parse_args(argv)
 
-    # Simulate trades with current equity
-    trades = simulate_trades(df, equity_start=equity)
+    instrumentation.enable_from_env()
+    with instrumentation.stage('store_sync'):
+        store = open_bars(args.data, shared=args.shared)
 
-    if not trades.empty:
-        trades["day"] = file.split("_")[1].split(".")[0]
-        all_trades.append(trades)
+    resolver = fills = None
+    if args.fills_store:
+        fine_symbol = f"{store.symbol}_{args.fills_bar_size}"
+        if not os.path.exists(os.path.join(args.fills_store, fine_symbol, "index.json")):
+            parser.error(f"No {fine_symbol} store under {args.fills_store}")
+        resolver = open_resolver(symbol=store.symbol, bar_size=args.fills_bar_size, root=args.fills_store)
+        fills = fills_config(resolver, args.fills_bar_size)
 
-        equity += trades["pnl"].sum()  # Use pnl in points
-        equity_curve.extend(trades["equity_after"].tolist())  # Still in points
+    registry = RunRegistry(args.registry) if args.registry else None
+    session = registry.start_run(store.symbol, run_config(store.symbol, fills=fills), args.equity) if registry else None
+    all_trades_df, equity_curve = run_backtest(store, args.equity, session, resolver)
+    if session is not None:
+        final_equity = args.equity + (all_trades_df["pnl"].sum() if not all_trades_df.empty else 0.0)
+        session.finish(all_trades_df, final_equity)
+        registry.close()
 
-# Combine all trades
-all_trades_df = pd.concat(all_trades, ignore_index=True)
+    # Save logs
+    all_trades_df.to_csv(args.trades_out, index=False)
+    pd.DataFrame({'equity': equity_curve}).to_csv(args.equity_out, index=False)
+    if args.mtm_out:
+        with instrumentation.stage('mtm'):
+            mtm = equity_from_trades(store, all_trades_df, args.equity)
+            mtm.save(args.mtm_out)
 
-# Save logs
-all_trades_df.to_csv("data/full_trade_log.csv", index=False)
-pd.DataFrame({'equity': equity_curve}).to_csv("data/equity_curve.csv", index=False)
+    # Output
+    print(all_trades_df)
+    if not all_trades_df.empty:
+        evaluate_performance(all_trades_df)
+    if args.mtm_out:
+        s = mtm.summary()
+        print(f"📊 Mark-to-market: max drawdown {s['max_drawdown']:.2f} USD ({s['max_drawdown_pct']:.1%}), "
+              f"in market {s['time_in_market']:.1%} of bars, avg exposure {s['avg_exposure']:.0f} USD")
+    print(default_cache().stats)
+    if resolver is not None:
+        print(f"🔍 Ambiguous bars resolved from {args.fills_bar_size} bars: {resolver.stats}")
+    if session is not None:
+        print(f"🔍 Run {session.run_id}: simulated {session.simulated} of {session.days} days, "
+              f"reused {session.days - session.simulated} from {args.registry}")
 
-# Output
-print(all_trades_df)
-evaluate_performance(all_trades_df)
+    # Visualise
+    if args.plot_day:
+        with instrumentation.stage('plot'):
+            plot_day(store, all_trades_df, args.plot_day)
 
-# Plotting section
-day_to_plot = "20250417"
-df = pd.read_csv(f"data/MES_{day_to_plot}.csv", parse_dates=['date'])
-df = compute_vwap_zscore_signals(df)
+    instrumentation.report_from_env()
+    return all_trades_df
 
-# Ensure datetime format
-all_trades_df['entry_time'] = pd.to_datetime(all_trades_df['entry_time'], utc=True).dt.tz_localize(None)
-all_trades_df['exit_time'] = pd.to_datetime(all_trades_df['exit_time'], utc=True).dt.tz_localize(None)
 
-# Visualise
-plot_day_trades(df, all_trades_df, day_to_plot)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
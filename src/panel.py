@@ -0,0 +1,377 @@
+"""
+Multi-instrument panel backtest.
+
+Bars of several instruments are aligned into (instrument x time) arrays.
+Signals for every instrument are computed in one vectorised pass over the
+flattened panel, with sessions and instruments as segments that rolling
+windows, the EWM and the throttle never cross. Trades are then simulated
+for all instruments together, bar by bar, so position sizing draws on one
+shared equity and an optional portfolio-wide risk budget.
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import indicators
+from .backtest import LONG, SHORT, STOP_LOSS, TAKE_PROFIT, TRADE_COLUMNS
+from .config import INSTRUMENTS, InstrumentConfig, VWAPConfig
+from .metrics import METRIC_NAMES, PerformanceAccumulator
+from .signals import _throttle_mask
+from .store import open_store
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+@dataclass
+class Panel:
+    symbols: List[str]
+    times: np.ndarray      # (T,) int64 UTC nanoseconds, union of all bar times
+    open: np.ndarray       # (K, T) arrays; NaN where an instrument has no bar
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    tz: str = "America/Chicago"
+
+    @property
+    def valid(self) -> np.ndarray:
+        return ~np.isnan(self.close)
+
+    def dates(self, cols: np.ndarray) -> pd.DatetimeIndex:
+        return pd.to_datetime(self.times[cols], utc=True).tz_convert(self.tz)
+
+
+def align_panel(frames: Dict[str, pd.DataFrame], tz: str = "America/Chicago") -> Panel:
+    """
+    Align per-instrument bar frames on the union of their timestamps.
+
+    Duplicate timestamps within an instrument (e.g. a session stored under two
+    trade dates) keep the last bar.
+    """
+    symbols = list(frames)
+    stamps = {}
+    for symbol, df in frames.items():
+        ns = pd.DatetimeIndex(pd.to_datetime(df['date'], utc=True)).as_unit('ns').asi8
+        _, last = np.unique(ns[::-1], return_index=True)
+        stamps[symbol] = len(ns) - 1 - last   # rows of unique timestamps, in time order
+    times = np.unique(np.concatenate([
+        pd.DatetimeIndex(pd.to_datetime(frames[s]['date'], utc=True)).as_unit('ns').asi8 for s in symbols
+    ])) if symbols else np.empty(0, dtype=np.int64)
+
+    arrays = {name: np.full((len(symbols), len(times)), np.nan) for name in PRICE_FIELDS}
+    for k, symbol in enumerate(symbols):
+        df = frames[symbol]
+        rows = stamps[symbol]
+        ns = pd.DatetimeIndex(pd.to_datetime(df['date'], utc=True)).as_unit('ns').asi8[rows]
+        cols = np.searchsorted(times, ns)
+        for name in PRICE_FIELDS:
+            arrays[name][k, cols] = df[name].to_numpy(dtype=np.float64)[rows]
+    return Panel(symbols, times, tz=tz, **arrays)
+
+
+def load_panel(symbols: Sequence[str], data_path: str = "data/", start: Optional[str] = None,
+               end: Optional[str] = None) -> Panel:
+    """
+    Load each symbol's bar store under `data_path` and align the bars.
+    """
+    return align_panel({symbol: open_store(data_path, symbol).load_frame(start, end) for symbol in symbols})
+
+
+@dataclass
+class PanelSignals:
+    rows: np.ndarray           # flat positions (into the (K, T) arrays) of real bars, instrument-major
+    starts: np.ndarray         # first bar of each (instrument, session) segment among `rows`
+    vwap: np.ndarray           # (K, T) arrays, NaN / False where an instrument has no bar
+    zscore_smooth: np.ndarray
+    long_signal: np.ndarray
+    short_signal: np.ndarray
+
+
+def compute_panel_signals(panel: Panel, config: VWAPConfig = VWAPConfig()) -> PanelSignals:
+    """
+    VWAP z-score signals for every instrument in one vectorised pass.
+
+    Equivalent to running compute_vwap_zscore_signals on each instrument's
+    sessions separately.
+    """
+    valid = panel.valid
+    rows = np.flatnonzero(valid)
+    n_times = len(panel.times)
+    inst, cols = np.divmod(rows, n_times)
+
+    session = indicators.session_ids(panel.dates(np.arange(n_times)), config.session_start, config.session_tz)[cols]
+    starts = indicators.segment_starts(session)
+    starts[1:] |= inst[1:] != inst[:-1]
+
+    close = panel.close.ravel()[rows]
+    vwap = indicators.session_vwap(close, panel.volume.ravel()[rows], starts)
+    zscore = indicators.rolling_zscore(close - vwap, config.window, starts)
+    zscore_smooth = pd.Series(zscore).groupby(np.cumsum(starts)) \
+        .ewm(span=config.zscore_smooth_span).mean().to_numpy()
+
+    slope = np.empty(len(vwap))
+    slope[1:] = vwap[1:] - vwap[:-1]
+    slope[starts] = np.nan
+
+    long_raw = (zscore_smooth < -config.zscore_threshold) & (slope >= 0)
+    short_raw = (zscore_smooth > config.zscore_threshold) & (slope <= 0)
+
+    def scatter(values, fill):
+        out = np.full(valid.shape, fill, dtype=np.asarray(values).dtype)
+        out.ravel()[rows] = values
+        return out
+
+    return PanelSignals(
+        rows=rows,
+        starts=starts,
+        vwap=scatter(vwap, np.nan),
+        zscore_smooth=scatter(zscore_smooth, np.nan),
+        long_signal=scatter(_throttle_mask(long_raw, config.throttle_bars, starts), False),
+        short_signal=scatter(_throttle_mask(short_raw, config.throttle_bars, starts), False),
+    )
+
+
+def _panel_kernel(col, seg_end, inst_start, inst_end, close, high, low, atr, long_signal, short_signal,
+                  equity_start, risk_pct, max_portfolio_risk, cooldown_bars,
+                  multiplier, commission, slippage, max_contracts):
+    """
+    The simulate_trades state machine run for all instruments at once.
+
+    Kernel rows are instrument-major; each instrument advances through its
+    own rows exactly as simulate_trades does through one session, while the
+    instruments are interleaved in time: at every bar time, exits are filled
+    first and entries are then sized from the shared, realised equity.
+
+    Returns:
+        List of trade tuples (instrument, side, entry row, exit row, entry
+        price, exit price, contracts, pnl, pnl_usd, result, equity after)
+    """
+    never = sys.maxsize
+    n_inst = len(inst_start)
+    ptr = list(inst_start)
+    pos_side = [0] * n_inst
+    pos_entry = [0] * n_inst
+    pos_price = [0.0] * n_inst
+    pos_sl = [0.0] * n_inst
+    pos_tp = [0.0] * n_inst
+    pos_contracts = [0] * n_inst
+    pos_risk = [0.0] * n_inst
+    cooldown = [0] * n_inst
+    next_time = [never] * n_inst
+    equity = equity_start
+    open_risk = 0.0
+    trades = []
+
+    def schedule(k):
+        # Bar time of instrument k's next step: the following bar for an exit check, this bar otherwise
+        nonlocal open_risk
+        i = ptr[k]
+        while i < inst_end[k] and i + 1 >= seg_end[i]:
+            # The last bar of a session has no step; positions still open are dropped, as per day in simulate_trades
+            if pos_side[k] != 0:
+                open_risk -= pos_risk[k]
+                pos_side[k] = 0
+            cooldown[k] = 0
+            i += 1
+        ptr[k] = i
+        if i >= inst_end[k]:
+            return never
+        return col[i + 1] if pos_side[k] != 0 else col[i]
+
+    for k in range(n_inst):
+        next_time[k] = schedule(k)
+
+    while True:
+        t = min(next_time) if n_inst else never
+        if t == never:
+            break
+
+        # Exits first, so entries on the same bar see the realised equity
+        for k in range(n_inst):
+            if next_time[k] != t or pos_side[k] == 0:
+                continue
+            i = ptr[k]
+            h = high[i + 1]
+            l = low[i + 1]
+            result = -1
+            if pos_side[k] == LONG:
+                if l <= pos_sl[k]:
+                    fill, result = pos_sl[k], STOP_LOSS
+                elif h >= pos_tp[k]:
+                    fill, result = pos_tp[k], TAKE_PROFIT
+                if result >= 0:
+                    pnl_points = fill - pos_price[k]
+            else:
+                if h >= pos_sl[k]:
+                    fill, result = pos_sl[k], STOP_LOSS
+                elif l <= pos_tp[k]:
+                    fill, result = pos_tp[k], TAKE_PROFIT
+                if result >= 0:
+                    pnl_points = pos_price[k] - fill
+
+            if result >= 0:
+                n = pos_contracts[k]
+                pnl_net = pnl_points - (slippage[k] + commission[k] / multiplier[k]) * n
+                pnl_usd = pnl_net * n * multiplier[k]
+                equity += pnl_usd
+                open_risk -= pos_risk[k]
+                trades.append((k, pos_side[k], pos_entry[k], i + 1, pos_price[k], fill, n,
+                               pnl_net, pnl_usd, result, equity))
+                pos_side[k] = 0
+                cooldown[k] = cooldown_bars
+            ptr[k] = i + 1
+            next_time[k] = schedule(k)
+
+        # Entry checks and cooldown countdown of flat instruments
+        for k in range(n_inst):
+            while next_time[k] == t and pos_side[k] == 0:
+                i = ptr[k]
+                if cooldown[k] == 0:
+                    a = atr[i]
+                    point_risk = max(a * 0.8, 0.5)
+                    usd_risk_per_contract = point_risk * multiplier[k]
+                    contracts = min(int(equity * risk_pct // usd_risk_per_contract), max_contracts[k])
+                    if max_portfolio_risk is not None:
+                        room = max(equity * max_portfolio_risk - open_risk, 0.0)
+                        contracts = min(contracts, int(room // usd_risk_per_contract))
+                    side = LONG if long_signal[i] else SHORT if short_signal[i] else 0
+                    if contracts > 0 and side != 0:
+                        pos_side[k] = side
+                        pos_entry[k] = i
+                        pos_price[k] = close[i]
+                        pos_sl[k] = close[i] - side * point_risk
+                        pos_tp[k] = close[i] + side * a * 2.4
+                        pos_contracts[k] = contracts
+                        pos_risk[k] = contracts * usd_risk_per_contract
+                        open_risk += pos_risk[k]
+                else:
+                    cooldown[k] = max(0, cooldown[k] - 1)
+                ptr[k] = i + 1
+                next_time[k] = schedule(k)
+
+    return trades
+
+
+@dataclass
+class PanelResult:
+    trades: pd.DataFrame       # trade log with a 'symbol' column, in exit order
+    equity: pd.Series          # shared equity (USD) after each trade
+    metrics: pd.DataFrame      # metrics per symbol and for the portfolio, from pnl_usd
+    signals: PanelSignals
+
+
+def run_panel(
+    panel: Panel,
+    config: VWAPConfig = VWAPConfig(),
+    instruments: Optional[Dict[str, InstrumentConfig]] = None,
+    equity_start: float = 5000,
+    risk_pct: float = 0.01,
+    cooldown_bars: int = 10,
+    max_portfolio_risk: Optional[float] = None
+) -> PanelResult:
+    """
+    Backtest the VWAP z-score strategy on every instrument of a panel.
+
+    Args:
+        panel: Aligned bars
+        config: Strategy parameters shared by all instruments
+        instruments: Contract specs by symbol (defaults to config.INSTRUMENTS)
+        equity_start: Shared starting equity in USD
+        risk_pct: Fraction of equity risked per trade
+        cooldown_bars: Bars to wait after an exit before re-entering
+        max_portfolio_risk: Cap on the stop-loss risk of all open positions
+            as a fraction of equity; None for no cap
+
+    Returns:
+        PanelResult
+    """
+    instruments = instruments or INSTRUMENTS
+    missing = [s for s in panel.symbols if s not in instruments]
+    if missing:
+        raise ValueError(f"No instrument config for: {missing}")
+    specs = [instruments[s] for s in panel.symbols]
+    signals = compute_panel_signals(panel, config)
+
+    # Kernel rows: bars with a smoothed z-score (as after dropna) and a full ATR window per session
+    rows, starts = signals.rows, signals.starts
+    segment = np.cumsum(starts)
+    keep = ~np.isnan(signals.zscore_smooth.ravel()[rows])
+    rows, segment = rows[keep], segment[keep]
+    starts = indicators.segment_starts(segment)
+    atr = indicators.atr(panel.high.ravel()[rows], panel.low.ravel()[rows], panel.close.ravel()[rows], 14, starts)
+    keep = ~np.isnan(atr)
+    rows, segment, atr = rows[keep], segment[keep], atr[keep]
+
+    n_times = len(panel.times)
+    inst, col = np.divmod(rows, n_times)
+    bounds = np.append(np.flatnonzero(indicators.segment_starts(segment)), len(rows))
+    seg_end = bounds[np.searchsorted(bounds, np.arange(len(rows)), side='right')]
+    inst_bounds = np.searchsorted(inst, np.arange(len(specs) + 1))
+
+    trades = _panel_kernel(
+        col.tolist(), seg_end.tolist(), inst_bounds[:-1].tolist(), inst_bounds[1:].tolist(),
+        panel.close.ravel()[rows].tolist(), panel.high.ravel()[rows].tolist(), panel.low.ravel()[rows].tolist(),
+        atr.tolist(), signals.long_signal.ravel()[rows].tolist(), signals.short_signal.ravel()[rows].tolist(),
+        float(equity_start), float(risk_pct), max_portfolio_risk, int(cooldown_bars),
+        [s.multiplier for s in specs], [s.commission_per_contract for s in specs],
+        [s.slippage_per_contract for s in specs], [s.max_contracts for s in specs],
+    )
+
+    if trades:
+        k, side, entry, exit_, entry_price, exit_price, contracts, pnl, pnl_usd, result, equity = map(np.array, zip(*trades))
+        log = pd.DataFrame({
+            'symbol': np.array(panel.symbols)[k],
+            'type': np.where(side == LONG, 'long', 'short'),
+            'entry_time': panel.dates(col[entry]),
+            'entry_price': entry_price,
+            'exit_time': panel.dates(col[exit_]),
+            'exit_price': exit_price,
+            'contracts': contracts,
+            'pnl': pnl,
+            'pnl_usd': pnl_usd,
+            'result': np.where(result == TAKE_PROFIT, 'take_profit', 'stop_loss'),
+            'equity_after': equity,
+        }, columns=['symbol'] + TRADE_COLUMNS)
+    else:
+        log = pd.DataFrame(columns=['symbol'] + TRADE_COLUMNS)
+
+    metrics = {symbol: PerformanceAccumulator.from_pnl(log.loc[log['symbol'] == symbol, 'pnl_usd']).result().as_dict()
+               for symbol in panel.symbols}
+    metrics['portfolio'] = PerformanceAccumulator.from_pnl(log['pnl_usd']).result().as_dict()
+    return PanelResult(
+        trades=log,
+        equity=pd.Series(log['equity_after'].to_numpy(dtype=np.float64), name='equity'),
+        metrics=pd.DataFrame.from_dict(metrics, orient='index', columns=METRIC_NAMES),
+        signals=signals,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the VWAP z-score strategy on several instruments at once")
+    parser.add_argument('--symbols', nargs='+', default=['MES'], help="Symbols with stores/CSVs under --data")
+    parser.add_argument('--data', default='data/')
+    parser.add_argument('--start', default=None, help="First trade date (YYYYMMDD)")
+    parser.add_argument('--end', default=None, help="Last trade date (YYYYMMDD)")
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--risk-pct', type=float, default=0.01)
+    parser.add_argument('--cooldown-bars', type=int, default=10)
+    parser.add_argument('--max-portfolio-risk', type=float, default=None)
+    parser.add_argument('--out', default=None, help="Write the trade log to this CSV path")
+    args = parser.parse_args(argv)
+
+    panel = load_panel(args.symbols, args.data, args.start, args.end)
+    result = run_panel(panel, equity_start=args.equity, risk_pct=args.risk_pct,
+                       cooldown_bars=args.cooldown_bars, max_portfolio_risk=args.max_portfolio_risk)
+    if args.out:
+        result.trades.to_csv(args.out, index=False)
+    print(f"\n📊 Panel Metrics (USD):")
+    print(result.metrics.to_string(float_format=lambda x: f"{x:.2f}"))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,164 @@
+import math
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.io as pio
 
-pio.renderers.default = 'browser'
 
-def plot_candles_with_vwap(df: pd.DataFrame, trades=None, title='MES Candles + VWAP'):
+def downsample_ohlc(df: pd.DataFrame, max_bars: int) -> pd.DataFrame:
+    """
+    Aggregate consecutive bars into at most `max_bars` buckets, keeping each
+    bucket's first open, highest high, lowest low, last close and total volume.
+
+    Bucket timestamps are those of the first bar in the bucket.
+    """
+    n = len(df)
+    if n <= max_bars:
+        return df
+    step = math.ceil(n / max_bars)
+    starts = np.arange(0, n, step)
+    last = np.minimum(starts + step, n) - 1
+    out = {
+        'date': df['date'].iloc[starts].to_numpy(),
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[last],
+    }
+    if 'volume' in df.columns:
+        out['volume'] = np.add.reduceat(df['volume'].to_numpy(), starts)
+    return pd.DataFrame(out)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line without NaN.
+
+    Returns the indices of the `n_out` points that best preserve the line's
+    visual shape (always including the first and last point).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket; the last point for the final bucket
+        nxt = slice(hi, edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def _bound(value, dates: pd.Series) -> Optional[pd.Timestamp]:
+    """A range bound as a Timestamp in the timezone of `dates` (naive bounds are local times)."""
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    tz = getattr(dates.dt, 'tz', None)
+    if tz is not None:
+        value = value.tz_localize(tz) if value.tzinfo is None else value.tz_convert(tz)
+    return value
+
+
+def _trade_times(values: pd.Series, dates: pd.Series) -> pd.Series:
+    """
+    Trade timestamps in the timezone of `dates`. Naive trade times are UTC,
+    as in the trade log; with naive bars they are returned as naive UTC.
+    """
+    times = pd.to_datetime(values, utc=True)
+    tz = getattr(dates.dt, 'tz', None)
+    return times.dt.tz_convert(tz) if tz is not None else times.dt.tz_localize(None)
+
+
+def _trade_markers(trades: pd.DataFrame):
+    """Three grouped marker traces (long entries, short entries, exits) built from arrays."""
+    is_long = (trades['type'] == 'long').to_numpy()
+    pnl = trades['pnl'].to_numpy() if 'pnl' in trades.columns else np.full(len(trades), np.nan)
+    entry_text = np.char.add('PnL: ', np.round(pnl, 2).astype(str))
+    exit_text = trades['result'].astype(str).to_numpy() if 'result' in trades.columns else None
+
+    traces = []
+    for mask, name, color, symbol in ((is_long, 'Long Entry', 'green', 'triangle-up'),
+                                      (~is_long, 'Short Entry', 'red', 'triangle-down')):
+        traces.append(go.Scatter(
+            x=trades['entry_time'].to_numpy()[mask],
+            y=trades['entry_price'].to_numpy()[mask],
+            text=entry_text[mask],
+            mode='markers',
+            marker=dict(color=color, symbol=symbol, size=12),
+            name=name
+        ))
+    traces.append(go.Scatter(
+        x=trades['exit_time'].to_numpy(),
+        y=trades['exit_price'].to_numpy(),
+        text=exit_text,
+        mode='markers',
+        marker=dict(color='white', symbol='x', size=10),
+        name='Exit'
+    ))
+    return traces
+
+
+def plot_candles_with_vwap(df: pd.DataFrame, trades=None, title='MES Candles + VWAP',
+                           start=None, end=None, max_points: Optional[int] = 2000,
+                           output: Optional[str] = None):
+    """
+    Candlestick chart with VWAP, signals and trades.
+
+    Args:
+        df: OHLCV DataFrame, optionally with 'vwap' and signal columns
+        trades: Trade log from simulate_trades
+        title: Chart title
+        start, end: Visible time range; bars and trades outside it are dropped
+        max_points: Candles in the visible range are bucket-aggregated (and the
+            VWAP line LTTB-downsampled) to at most this many points; None keeps every bar
+        output: Write the figure to this file (.html, or an image format
+            supported by kaleido) instead of opening a browser
+
+    Returns:
+        The plotly Figure
+    """
     df = df.copy()
     df['date'] = pd.to_datetime(df['date'])
+    start, end = _bound(start, df['date']), _bound(end, df['date'])
+    if start is not None:
+        df = df[df['date'] >= start]
+    if end is not None:
+        df = df[df['date'] <= end]
+    df = df.reset_index(drop=True)
+
+    # VWAP calculation (cumulative over the frame) unless the signal frame already has it
+    if 'vwap' not in df.columns:
+        cum_vol = df['volume'].cumsum()
+        cum_pv = (df['close'] * df['volume']).cumsum()
+        df['vwap'] = cum_pv / cum_vol
 
-    # VWAP calculation
-    df['cum_vol'] = df['volume'].cumsum()
-    df['cum_pv'] = (df['close'] * df['volume']).cumsum()
-    df['vwap'] = df['cum_pv'] / df['cum_vol']
+    candles = df
+    vwap_idx = np.arange(len(df))
+    if max_points is not None and len(df) > max_points:
+        candles = downsample_ohlc(df, max_points)
+        # Select points on a gap-free copy; NaN VWAP (no volume yet) is still drawn as a gap
+        vwap_idx = lttb(pd.DatetimeIndex(df['date']).asi8, df['vwap'].ffill().bfill().to_numpy(), max_points)
 
     fig = go.Figure()
 
     # Candlesticks
     fig.add_trace(go.Candlestick(
-        x=df['date'],
-        open=df['open'],
-        high=df['high'],
-        low=df['low'],
-        close=df['close'],
+        x=candles['date'],
+        open=candles['open'],
+        high=candles['high'],
+        low=candles['low'],
+        close=candles['close'],
         name='MES',
         increasing_line_color='limegreen',
         decreasing_line_color='crimson',
@@ -31,8 +168,8 @@ def plot_candles_with_vwap(df: pd.DataFrame, trades=None, title='MES Candles + V
 
     # VWAP Line
     fig.add_trace(go.Scatter(
-        x=df['date'],
-        y=df['vwap'],
+        x=df['date'].iloc[vwap_idx],
+        y=df['vwap'].iloc[vwap_idx],
         mode='lines',
         name='VWAP',
         line=dict(color='orange', width=2.5)
@@ -62,27 +199,15 @@ def plot_candles_with_vwap(df: pd.DataFrame, trades=None, title='MES Candles + V
 
     # Trade entries and exits
     if trades is not None and not trades.empty:
-        for _, trade in trades.iterrows():
-            # Entry
-            entry_color = 'green' if trade['type'] == 'long' else 'red'
-            entry_symbol = 'triangle-up' if trade['type'] == 'long' else 'triangle-down'
-
-            fig.add_trace(go.Scatter(
-                x=[trade['entry_time']],
-                y=[trade['entry_price']],
-                mode='markers',
-                marker=dict(color=entry_color, symbol=entry_symbol, size=12),
-                name=f"{trade['type'].capitalize()} Entry"
-            ))
-
-            # Exit
-            fig.add_trace(go.Scatter(
-                x=[trade['exit_time']],
-                y=[trade['exit_price']],
-                mode='markers',
-                marker=dict(color='white', symbol='x', size=10),
-                name="Exit"
-            ))
+        trades = trades.copy()
+        trades['entry_time'] = _trade_times(trades['entry_time'], df['date'])
+        trades['exit_time'] = _trade_times(trades['exit_time'], df['date'])
+        if start is not None:
+            trades = trades[trades['exit_time'] >= start]
+        if end is not None:
+            trades = trades[trades['entry_time'] <= end]
+        for trace in _trade_markers(trades):
+            fig.add_trace(trace)
 
     # Layout
     fig.update_layout(
@@ -106,4 +231,10 @@ def plot_candles_with_vwap(df: pd.DataFrame, trades=None, title='MES Candles + V
     fig.update_yaxes(showgrid=True, gridcolor='gray', gridwidth=0.5)
     fig.update_xaxes(showgrid=False)
 
-    fig.show()
\ No newline at end of file
+    if output is None:
+        fig.show(renderer='browser')
+    elif output.endswith('.html'):
+        fig.write_html(output, include_plotlyjs='cdn')
+    else:
+        fig.write_image(output)
+    return fig
@@ -1,16 +1,32 @@
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.io as pio
 
-pio.renderers.default = 'browser'
-
-def plot_equity_curve(csv_path='data/equity_curve.csv', title='Strategy Equity Curve'):
-    df = pd.read_csv(csv_path)
 
+def plot_equity_curve(csv_path='data/equity_curve.csv', title='Strategy Equity Curve', max_points=5000):
+    """
+    Plot an equity curve: per trade from a CSV with an 'equity' column, or
+    per bar against time from a mark-to-market .npz (see mtm.py), reduced
+    to `max_points` with LTTB.
+    """
     fig = go.Figure()
 
+    if csv_path.endswith('.npz'):
+        from .mtm import MarkToMarket
+        from .plot import lttb
+
+        mtm = MarkToMarket.load(csv_path)
+        keep = lttb(mtm.date, mtm.equity, max_points)
+        x = pd.to_datetime(mtm.date[keep], utc=True).tz_convert('America/Chicago')
+        y = mtm.equity[keep]
+        xaxis_title = 'Time'
+    else:
+        df = pd.read_csv(csv_path)
+        x, y = None, df['equity']
+        xaxis_title = 'Trade Number'
+
     fig.add_trace(go.Scatter(
-        y=df['equity'],
+        x=x,
+        y=y,
         mode='lines',
         line=dict(color='deepskyblue', width=3),
         name='Equity'
@@ -18,7 +34,7 @@ def plot_equity_curve(csv_path='data/equity_curve.csv', title='Strategy Equity C
 
     fig.update_layout(
         title=title,
-        xaxis_title='Trade Number',
+        xaxis_title=xaxis_title,
         yaxis_title='Equity ($)',
         template='plotly_dark',
         font=dict(family='Courier New', size=14),
@@ -30,7 +46,7 @@ def plot_equity_curve(csv_path='data/equity_curve.csv', title='Strategy Equity C
         yaxis=dict(showgrid=True, gridcolor='gray')
     )
 
-    fig.show()
+    fig.show(renderer='browser')
 
 if __name__ == "__main__":
-    plot_equity_curve()
\ No newline at end of file
+    plot_equity_curve()
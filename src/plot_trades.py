@@ -1,7 +1,118 @@
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
 import pandas as pd
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+
+from .config import VWAPConfig
+from .indicators import NS_PER_DAY, session_ids
+
+
+def _utc_ns(dates: pd.Series) -> np.ndarray:
+    """Timestamps as int64 UTC nanoseconds; naive timestamps are taken as UTC."""
+    return pd.DatetimeIndex(pd.to_datetime(dates, utc=True)).as_unit('ns').asi8
+
+
+class TradeIndex:
+    """
+    Bars and trades sorted by int64 time, so a day's rows and each trade's
+    entry/exit bar are found with searchsorted instead of column scans.
+
+    Days are Globex trade dates ('YYYYMMDD'): a day's session opens at
+    `session_start` the evening before.
+    """
+
+    def __init__(self, df: pd.DataFrame, trades: pd.DataFrame, config: VWAPConfig = VWAPConfig()):
+        order = np.argsort(_utc_ns(df['date']), kind='stable')
+        self.bars = df.iloc[order].reset_index(drop=True)
+        self.bar_ns = _utc_ns(self.bars['date'])
+        self.close = self.bars['close'].to_numpy(dtype=np.float64)
+
+        order = np.argsort(_utc_ns(trades['entry_time']), kind='stable')
+        self.trades = trades.iloc[order].reset_index(drop=True)
+        self.entry_ns = _utc_ns(self.trades['entry_time'])
+        self.exit_ns = _utc_ns(self.trades['exit_time'])
+        self.entry_price = self.trades['entry_price'].to_numpy(dtype=np.float64)
+        self.exit_price = self.trades['exit_price'].to_numpy(dtype=np.float64)
+        self.is_long = (self.trades['type'] == 'long').to_numpy()
+        self.take_profit = (self.trades['result'] == 'take_profit').to_numpy()
+
+        # Keep only trades whose entry and exit fall on a bar, as the chart has nothing to anchor others to
+        if len(self.bar_ns):
+            last = len(self.bar_ns) - 1
+            entry_pos = np.minimum(np.searchsorted(self.bar_ns, self.entry_ns), last)
+            exit_pos = np.minimum(np.searchsorted(self.bar_ns, self.exit_ns), last)
+            self.on_bars = (self.bar_ns[entry_pos] == self.entry_ns) & (self.bar_ns[exit_pos] == self.exit_ns)
+        else:
+            self.on_bars = np.zeros(len(self.trades), dtype=bool)
+
+        self.session_start = config.session_start
+        self.tz = config.session_tz
+        self._sessions = session_ids(self.bars['date'], config.session_start, config.session_tz) \
+            if len(self.bars) else np.empty(0, dtype=np.int64)
+
+    def days(self) -> List[str]:
+        """Trade dates with at least one bar, oldest first."""
+        epoch = pd.Timestamp("1970-01-01")
+        return [(epoch + pd.Timedelta(days=int(s) + 1)).strftime("%Y%m%d") for s in np.unique(self._sessions)]
+
+    def session_bounds(self, day: str):
+        """[start, end) of the session for trade date `day` in UTC nanoseconds."""
+        open_ = pd.Timestamp(f"{day} {self.session_start}").tz_localize(self.tz) - pd.Timedelta(days=1)
+        return open_.value, open_.value + NS_PER_DAY
+
+    def day(self, day: str):
+        """(bar slice, trade positions) for trade date `day`."""
+        start, end = self.session_bounds(day)
+        bars = slice(*np.searchsorted(self.bar_ns, [start, end]))
+        lo, hi = np.searchsorted(self.entry_ns, [start, end])
+        trades = np.arange(lo, hi)[self.on_bars[lo:hi]]
+        return bars, trades
+
+
+def _draw_day(ax, index: TradeIndex, day: str, legend: bool = True) -> bool:
+    bars, trades = index.day(day)
+    if bars.start == bars.stop or len(trades) == 0:
+        return False
+
+    dates = index.bars['date'].iloc[bars]
+    ax.plot(dates, index.close[bars], label='Close Price', color='black', linewidth=1)
 
-def plot_day_trades(df: pd.DataFrame, trades: pd.DataFrame, day: str):
+    # Trade times as datetimes in the bars' timezone, so markers line up with the price line
+    tz = dates.dt.tz
+    entry_t = pd.to_datetime(index.entry_ns[trades], utc=True)
+    exit_t = pd.to_datetime(index.exit_ns[trades], utc=True)
+    entry_t = entry_t.tz_convert(tz) if tz is not None else entry_t.tz_localize(None)
+    exit_t = exit_t.tz_convert(tz) if tz is not None else exit_t.tz_localize(None)
+    entry_p, exit_p = index.entry_price[trades], index.exit_price[trades]
+    is_long, take_profit = index.is_long[trades], index.take_profit[trades]
+
+    # Entry and exit markers: one call per marker style
+    ax.scatter(entry_t[is_long], entry_p[is_long], color='green', marker='^', s=60,
+               label='Long Entry' if legend else None)
+    ax.scatter(entry_t[~is_long], entry_p[~is_long], color='red', marker='v', s=60,
+               label='Short Entry' if legend else None)
+    ax.scatter(exit_t[take_profit], exit_p[take_profit], color='blue', marker='x', s=60,
+               label='Exit (TP)' if legend else None)
+    ax.scatter(exit_t[~take_profit], exit_p[~take_profit], color='orange', marker='x', s=60,
+               label='Exit (SL)' if legend else None)
+
+    # Entry-to-exit lines as one collection
+    x0, x1 = mdates.date2num(entry_t.to_pydatetime()), mdates.date2num(exit_t.to_pydatetime())
+    segments = np.stack([np.column_stack([x0, entry_p]), np.column_stack([x1, exit_p])], axis=1)
+    ax.add_collection(LineCollection(segments, linestyles='--', alpha=0.5, colors='gray'))
+
+    ax.set_title(f"Trades on {day}")
+    ax.grid(True)
+    if legend:
+        ax.legend()
+    return True
+
+
+def plot_day_trades(df: pd.DataFrame, trades: pd.DataFrame, day: str, index: Optional[TradeIndex] = None):
     """
     Plots trades on a price chart for a single day.
 
@@ -9,46 +120,75 @@ def plot_day_trades(df: pd.DataFrame, trades: pd.DataFrame, day: str):
         df (pd.DataFrame): Original OHLCV + signals data.
         trades (pd.DataFrame): Trades log from simulate_trades.
         day (str): Date string in 'YYYYMMDD' format (e.g., '20250417').
+        index (TradeIndex): Prebuilt index of df and trades, reused across calls.
     """
-
-    # Filter data
-    df_day = df[df['date'].dt.strftime('%Y%m%d') == day].copy()
-    trades_day = trades[trades['entry_time'].dt.strftime('%Y%m%d') == day]
-
-    if df_day.empty or trades_day.empty:
+    index = index or TradeIndex(df, trades)
+    fig, ax = plt.subplots(figsize=(14, 6))
+    if not _draw_day(ax, index, day):
+        plt.close(fig)
         print(f"No trades or data found for {day}")
         return
 
-    plt.figure(figsize=(14, 6))
-    plt.plot(df_day['date'], df_day['close'], label='Close Price', color='black', linewidth=1)
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Price")
+    fig.tight_layout()
+    plt.show()
 
-    for _, trade in trades_day.iterrows():
-        entry_idx = df_day[df_day['date'] == trade['entry_time']].index
-        exit_idx = df_day[df_day['date'] == trade['exit_time']].index
-        if entry_idx.empty or exit_idx.empty:
-            continue
 
-        # Entry marker
-        plt.scatter(trade['entry_time'], trade['entry_price'], 
-                    color='green' if trade['type'] == 'long' else 'red', 
-                    marker='^' if trade['type'] == 'long' else 'v', 
-                    label='Entry' if _ == trades_day.index[0] else "", s=60)
-
-        # Exit marker
-        plt.scatter(trade['exit_time'], trade['exit_price'], 
-                    color='blue' if trade['result'] == 'take_profit' else 'orange', 
-                    marker='x', 
-                    label='Exit (TP/SL)' if _ == trades_day.index[0] else "", s=60)
-
-        # Draw SL/TP lines
-        plt.plot([trade['entry_time'], trade['exit_time']], 
-                 [trade['entry_price'], trade['exit_price']], 
-                 linestyle='--', alpha=0.5, color='gray')
-
-    plt.title(f"Trades on {day}")
-    plt.xlabel("Time")
-    plt.ylabel("Price")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
\ No newline at end of file
+def plot_days_grid(df: pd.DataFrame, trades: pd.DataFrame, days: Optional[Iterable[str]] = None,
+                   ncols: int = 4, output: Optional[str] = None):
+    """
+    Plot several days as a grid of subplots in one figure.
+
+    Args:
+        df: OHLCV + signals data covering the days
+        trades: Trades log
+        days: Trade dates ('YYYYMMDD'); every day in df by default
+        ncols: Subplots per row
+        output: Save the figure here instead of showing it
+
+    Returns:
+        The matplotlib Figure
+    """
+    index = TradeIndex(df, trades)
+    days = list(days) if days is not None else index.days()
+    nrows = max(1, -(-len(days) // ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(4.5 * ncols, 3 * nrows), squeeze=False)
+    for ax, day in zip(axes.flat, days):
+        if not _draw_day(ax, index, day, legend=False):
+            ax.set_title(f"No trades on {day}")
+        ax.tick_params(labelsize=6)
+    for ax in axes.flat[len(days):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    if output:
+        fig.savefig(output)
+        plt.close(fig)
+    else:
+        plt.show()
+    return fig
+
+
+def save_day_charts(df: pd.DataFrame, trades: pd.DataFrame, out_dir: str,
+                    days: Optional[Iterable[str]] = None, dpi: int = 100) -> List[str]:
+    """
+    Write one PNG per day (`trades_YYYYMMDD.png`) in a single pass over the data.
+
+    Returns:
+        Paths of the files written; days without trades are skipped
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    index = TradeIndex(df, trades)
+    paths = []
+    fig, ax = plt.subplots(figsize=(14, 6))
+    for day in (days if days is not None else index.days()):
+        ax.clear()
+        if not _draw_day(ax, index, day):
+            continue
+        ax.set_xlabel("Time")
+        ax.set_ylabel("Price")
+        path = os.path.join(out_dir, f"trades_{day}.png")
+        fig.savefig(path, dpi=dpi)
+        paths.append(path)
+    plt.close(fig)
+    return paths
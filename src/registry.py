@@ -0,0 +1,321 @@
+"""
+SQLite registry of backtest runs with per-day result reuse.
+
+Every multi-day run is recorded with a hash of its configuration, a hash
+of the code that produces results, its metrics and the day results it is
+made of. A day result is keyed by (config hash, code version, day, hash
+of the day's bars, starting equity), so a later run re-simulates only
+days that are new, whose bars changed, or whose starting equity moved
+because an earlier day changed; everything else, trades included, is read
+back from the database. Past runs can be listed, inspected and compared
+without re-running anything:
+
+    python -m src runs                  # list runs
+    python -m src runs show 12          # per-day results of run 12
+    python -m src runs compare 11 12    # metrics side by side
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest import TRADE_COLUMNS
+from .metrics import PerformanceAccumulator
+
+# Modules whose source determines per-day results
+RESULT_MODULES = ('backtest', 'signals', 'indicators', 'config', 'store', 'cache', 'shm')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    finished TEXT,
+    symbol TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    config TEXT NOT NULL,
+    code_version TEXT NOT NULL,
+    git_rev TEXT,
+    equity_start REAL NOT NULL,
+    final_equity REAL,
+    days INTEGER,
+    simulated_days INTEGER,
+    metrics TEXT
+);
+CREATE TABLE IF NOT EXISTS day_results (
+    result_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_hash TEXT NOT NULL,
+    code_version TEXT NOT NULL,
+    day TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    equity_in REAL NOT NULL,
+    equity_out REAL NOT NULL,
+    n_trades INTEGER NOT NULL,
+    pnl REAL NOT NULL,
+    pnl_usd REAL NOT NULL,
+    UNIQUE (config_hash, code_version, day, input_hash, equity_in)
+);
+CREATE TABLE IF NOT EXISTS trades (
+    result_id INTEGER NOT NULL REFERENCES day_results,
+    seq INTEGER NOT NULL,
+    type TEXT, entry_time INTEGER, entry_price REAL, exit_time INTEGER, exit_price REAL,
+    contracts INTEGER, pnl REAL, pnl_usd REAL, result TEXT, equity_after REAL,
+    PRIMARY KEY (result_id, seq)
+);
+CREATE TABLE IF NOT EXISTS run_days (
+    run_id INTEGER NOT NULL REFERENCES runs,
+    day TEXT NOT NULL,
+    result_id INTEGER NOT NULL REFERENCES day_results,
+    simulated INTEGER NOT NULL,
+    PRIMARY KEY (run_id, day)
+);
+"""
+
+_TIME_COLUMNS = ('entry_time', 'exit_time')
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def config_hash(config: dict) -> str:
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def code_version(modules: Tuple[str, ...] = RESULT_MODULES) -> str:
+    """Hash of the source of `modules` (RESULT_MODULES); any edit to them invalidates stored day results."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.blake2b(digest_size=16)
+    for name in modules:
+        with open(os.path.join(here, f"{name}.py"), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def git_revision() -> Optional[str]:
+    """Short commit hash with a '-dirty' suffix for local changes, or None outside a git checkout."""
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def input_hash(arrays: Dict[str, np.ndarray]) -> str:
+    """Hash of one day's bar columns as stored."""
+    h = hashlib.blake2b(digest_size=16)
+    for name in sorted(arrays):
+        values = np.ascontiguousarray(arrays[name])
+        h.update(f"{name}:{values.dtype.str}:{len(values)}|".encode())
+        h.update(values.tobytes())
+    return h.hexdigest()
+
+
+class RunRegistry:
+    """
+    Results database for multi-day backtests.
+
+    Args:
+        path: SQLite file, created with its schema on first use
+    """
+
+    def __init__(self, path: str = "data/runs.sqlite"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------ runs
+
+    def start_run(self, symbol: str, config: dict, equity_start: float) -> "RunSession":
+        version = code_version()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (started, symbol, config_hash, config, code_version, git_rev, equity_start) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_now(), symbol, config_hash(config), json.dumps(config, sort_keys=True), version,
+                 git_revision(), float(equity_start)))
+        return RunSession(self, cur.lastrowid, config_hash(config), version)
+
+    def runs(self) -> pd.DataFrame:
+        """One row per run, with its metrics expanded into columns."""
+        runs = pd.read_sql_query("SELECT * FROM runs ORDER BY run_id", self.conn)
+        metrics = pd.json_normalize([json.loads(m) if m else {} for m in runs.pop('metrics')])
+        return pd.concat([runs.drop(columns=['config']), metrics], axis=1)
+
+    def run_days(self, run_id: int) -> pd.DataFrame:
+        """Per-day results of a run: starting and ending equity, trades, PnL and whether it was simulated."""
+        return pd.read_sql_query(
+            "SELECT d.day, r.simulated, d.equity_in, d.equity_out, d.n_trades, d.pnl, d.pnl_usd, d.input_hash "
+            "FROM run_days r JOIN day_results d USING (result_id) WHERE r.run_id = ? ORDER BY d.day",
+            self.conn, params=(run_id,))
+
+    def run_trades(self, run_id: int, tz: str = "America/Chicago") -> pd.DataFrame:
+        """The trade log of a run, as multi_day_backtest builds it."""
+        trades = pd.read_sql_query(
+            f"SELECT {', '.join('t.' + c for c in TRADE_COLUMNS)}, r.day FROM run_days r "
+            "JOIN trades t USING (result_id) WHERE r.run_id = ? ORDER BY r.day, t.seq",
+            self.conn, params=(run_id,))
+        return _decode_times(trades, tz)
+
+    def compare(self, *run_ids: int) -> pd.DataFrame:
+        """Runs as columns, configuration and metrics as rows."""
+        runs = self.runs().set_index('run_id').loc[list(run_ids)]
+        return runs.drop(columns=['started', 'finished']).T
+
+    # ------------------------------------------------------------ day results
+
+    def _lookup(self, key: tuple) -> Optional[Tuple[int, float, pd.DataFrame]]:
+        row = self.conn.execute(
+            "SELECT result_id, equity_out FROM day_results "
+            "WHERE config_hash = ? AND code_version = ? AND day = ? AND input_hash = ? AND equity_in = ?",
+            key).fetchone()
+        if row is None:
+            return None
+        result_id, equity_out = row
+        trades = pd.read_sql_query(f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades WHERE result_id = ? ORDER BY seq",
+                                   self.conn, params=(result_id,))
+        return result_id, equity_out, trades
+
+    def _store(self, key: tuple, equity_out: float, trades: pd.DataFrame) -> int:
+        n = len(trades)
+        pnl = float(trades['pnl'].sum()) if n else 0.0
+        pnl_usd = float(trades['pnl_usd'].sum()) if n else 0.0
+        try:
+            cur = self.conn.execute(
+                "INSERT INTO day_results (config_hash, code_version, day, input_hash, equity_in, "
+                "equity_out, n_trades, pnl, pnl_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, equity_out, n, pnl, pnl_usd))
+        except sqlite3.IntegrityError:
+            # Stored meanwhile by a concurrent run; results are deterministic, so reuse it
+            return self._lookup(key)[0]
+        result_id = cur.lastrowid
+        if n:
+            rows = trades[TRADE_COLUMNS].copy()
+            for col in _TIME_COLUMNS:
+                rows[col] = _to_ns(rows[col])
+            rows.insert(0, 'seq', np.arange(n))
+            rows.insert(0, 'result_id', result_id)
+            self.conn.executemany(
+                f"INSERT INTO trades VALUES ({', '.join('?' * len(rows.columns))})",
+                rows.astype(object).itertuples(index=False, name=None))
+        return result_id
+
+
+def _to_ns(times: pd.Series) -> np.ndarray:
+    return np.asarray(pd.to_datetime(times, utc=True).dt.tz_localize(None), dtype='datetime64[ns]').view(np.int64)
+
+
+def _decode_times(trades: pd.DataFrame, tz: str) -> pd.DataFrame:
+    for col in _TIME_COLUMNS:
+        trades[col] = pd.to_datetime(trades[col].to_numpy(dtype=np.int64), utc=True).tz_convert(tz)
+    return trades
+
+
+class RunSession:
+    """
+    One run being recorded: looks up and stores day results, then the run summary.
+    """
+
+    def __init__(self, registry: RunRegistry, run_id: int, config_hash: str, code_version: str):
+        self.registry = registry
+        self.run_id = run_id
+        self.config_hash = config_hash
+        self.code_version = code_version
+        self.days = 0
+        self.simulated = 0
+
+    def _key(self, day: str, day_hash: str, equity_in: float) -> tuple:
+        return self.config_hash, self.code_version, day, day_hash, float(equity_in)
+
+    def lookup(self, day: str, day_hash: str, equity_in: float,
+               tz: str = "America/Chicago") -> Optional[Tuple[float, pd.DataFrame]]:
+        """
+        (equity_out, trades) stored for this day, bars and starting equity, or None.
+        A hit is recorded as part of this run.
+        """
+        found = self.registry._lookup(self._key(day, day_hash, equity_in))
+        if found is None:
+            return None
+        result_id, equity_out, trades = found
+        self._link(day, result_id, simulated=False)
+        return equity_out, _decode_times(trades, tz) if len(trades) else pd.DataFrame()
+
+    def record(self, day: str, day_hash: str, equity_in: float, equity_out: float, trades: pd.DataFrame):
+        """Store a freshly simulated day and record it as part of this run."""
+        with self.registry.conn:
+            result_id = self.registry._store(self._key(day, day_hash, equity_in), float(equity_out), trades)
+        self._link(day, result_id, simulated=True)
+
+    def _link(self, day: str, result_id: int, simulated: bool):
+        with self.registry.conn:
+            self.registry.conn.execute("INSERT OR REPLACE INTO run_days VALUES (?, ?, ?, ?)",
+                                       (self.run_id, day, result_id, int(simulated)))
+        self.days += 1
+        self.simulated += simulated
+
+    def finish(self, trades: pd.DataFrame, final_equity: float):
+        """Record the run's metrics over all its trades."""
+        if trades.empty:
+            metrics = PerformanceAccumulator().result()
+        else:
+            metrics = PerformanceAccumulator.from_pnl(trades['pnl']).result()
+        # NaN is not valid JSON; store it as null
+        values = {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in metrics.as_dict().items()}
+        with self.registry.conn:
+            self.registry.conn.execute(
+                "UPDATE runs SET finished = ?, final_equity = ?, days = ?, simulated_days = ?, metrics = ? "
+                "WHERE run_id = ?",
+                (_now(), float(final_equity), self.days, self.simulated, json.dumps(values), self.run_id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, inspect and compare recorded backtest runs")
+    parser.add_argument('action', nargs='?', default='list', choices=['list', 'show', 'compare', 'trades'])
+    parser.add_argument('run_ids', nargs='*', type=int)
+    parser.add_argument('--db', default="data/runs.sqlite", help="Run registry database")
+    parser.add_argument('--out', default=None, help="CSV path for 'trades'")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"❌ No run registry at {args.db}")
+        return 1
+    registry = RunRegistry(args.db)
+    pd.set_option('display.width', 200)
+
+    if args.action == 'list':
+        columns = ['run_id', 'started', 'git_rev', 'config_hash', 'days', 'simulated_days',
+                   'total_trades', 'total_pnl', 'max_drawdown', 'final_equity']
+        runs = registry.runs()
+        print(runs[[c for c in columns if c in runs.columns]].to_string(index=False))
+    elif not args.run_ids:
+        parser.error(f"'{args.action}' needs at least one run id")
+    elif args.action == 'show':
+        for run_id in args.run_ids:
+            print(f"📊 Run {run_id}")
+            print(registry.run_days(run_id).to_string(index=False))
+    elif args.action == 'compare':
+        print(registry.compare(*args.run_ids).to_string())
+    else:
+        trades = registry.run_trades(args.run_ids[0])
+        if args.out:
+            trades.to_csv(args.out, index=False)
+            print(f"✅ {len(trades)} trades written to {args.out}")
+        else:
+            print(trades.to_string(index=False))
+    registry.close()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Bar history shared between processes through `multiprocessing.shared_memory`.
+
+One process publishes every stored day once, one block per column plus a
+small registry block (JSON: symbol, timezone, column dtypes and block names,
+row range of each day). Other processes attach by name and read the
+columns as read-only NumPy views without copying, so concurrent backtests
+and sweeps share one copy of the bars instead of parsing their own.
+SharedDays does the same for the per-day arrays a sweep hands its workers.
+
+    python -m src share --name mes_bars          # publish, hold until Ctrl-C
+    python -m src backtest --shared mes_bars     # in any number of other shells
+"""
+import argparse
+import json
+import signal
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .store import BarReader, open_store
+
+_LENGTH = struct.Struct("<Q")
+
+# Open instances by (name, owner). Arrays handed out do not keep their
+# SharedBars or SharedDays alive, so the mappings are held here until close() is called.
+_OPEN: Dict[Tuple[str, bool], "_SharedBlocks"] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block with the resource
+        # tracker, which would unlink it when this process exits
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _create(name: Optional[str], size: int) -> shared_memory.SharedMemory:
+    # Zero-sized blocks are not allowed; name=None picks a random unused name
+    return shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+
+
+def _publish(name: Optional[str], columns: Dict[str, List[np.ndarray]],
+             meta: dict) -> Tuple[dict, shared_memory.SharedMemory, Dict[str, shared_memory.SharedMemory]]:
+    """
+    Copy each column, given as pieces to concatenate, into a new block, then
+    write the registry block: `meta` plus row count, dtypes and block names.
+    """
+    rows = sum(len(values) for values in next(iter(columns.values()), []))
+    dtypes = {column: pieces[0].dtype if pieces else np.dtype(np.float64) for column, pieces in columns.items()}
+    blocks = {}
+    try:
+        for column, pieces in columns.items():
+            block = _create(f"{name}_{column}" if name else None, rows * dtypes[column].itemsize)
+            blocks[column] = block
+            out = np.ndarray((rows,), dtype=dtypes[column], buffer=block.buf)
+            position = 0
+            for values in pieces:
+                out[position:position + len(values)] = values
+                position += len(values)
+            # Release the buffer so the block can be closed if a later one fails
+            del out
+
+        registry = {
+            **meta,
+            'rows': rows,
+            'columns': {column: dtype.name for column, dtype in dtypes.items()},
+            'blocks': {column: block.name for column, block in blocks.items()},
+        }
+        # The registry is written last, so a reader never sees half-filled columns
+        payload = json.dumps(registry).encode()
+        header = _create(name, _LENGTH.size + len(payload))
+        header.buf[:_LENGTH.size] = _LENGTH.pack(len(payload))
+        header.buf[_LENGTH.size:_LENGTH.size + len(payload)] = payload
+    except BaseException:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+        raise
+    return registry, header, blocks
+
+
+def _attach_all(name: str) -> Tuple[dict, shared_memory.SharedMemory, Dict[str, shared_memory.SharedMemory]]:
+    header = _attach(name)
+    length, = _LENGTH.unpack(bytes(header.buf[:_LENGTH.size]))
+    registry = json.loads(bytes(header.buf[_LENGTH.size:_LENGTH.size + length]))
+    blocks = {column: _attach(block) for column, block in registry['blocks'].items()}
+    return registry, header, blocks
+
+
+class _SharedBlocks:
+    """
+    Read-only column views over a registry block and one block per column.
+
+    Instances pickle as their registry name, so passing one to a process
+    pool makes the workers attach instead of receiving a copy.
+    """
+
+    def __init__(self, name: str, registry: dict, header: shared_memory.SharedMemory,
+                 blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        self.name = name
+        self.owner = owner
+        self._index = registry
+        self._header = header
+        self._blocks = blocks
+        self._arrays: Dict[str, np.ndarray] = {}
+        for column, dtype in registry['columns'].items():
+            values = np.ndarray((registry['rows'],), dtype=dtype, buffer=blocks[column].buf)
+            values.flags.writeable = False
+            self._arrays[column] = values
+        _OPEN[name, owner] = self
+
+    @classmethod
+    def attach(cls, name: str):
+        """
+        Map blocks published under `name` by another process, read-only and without
+        copying. Repeated calls in one process return the same instance.
+        """
+        if (name, False) in _OPEN:
+            return _OPEN[name, False]
+        return cls(name, *_attach_all(name), owner=False)
+
+    def __reduce__(self):
+        return type(self).attach, (self.name,)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self._arrays.values())
+
+    def close(self):
+        """
+        Unmap the blocks in this process. Arrays and frames loaded from
+        this instance must not be used afterwards.
+        """
+        _OPEN.pop((self.name, self.owner), None)
+        self._arrays.clear()
+        for block in [*self._blocks.values(), self._header]:
+            block.close()
+
+    def unlink(self):
+        """Remove the blocks from the system (publisher only); attached processes keep their mappings."""
+        for block in [*self._blocks.values(), self._header]:
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.owner:
+            self.unlink()
+        self.close()
+
+
+class SharedBars(_SharedBlocks, BarReader):
+    """
+    Bars for one symbol held in shared memory, read like a BarStore.
+
+    Use `publish` in one process and `attach` in the others.
+    """
+
+    def __init__(self, name: str, registry: dict, header: shared_memory.SharedMemory,
+                 blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        self.symbol = registry['symbol']
+        self.tz = registry['tz']
+        super().__init__(name, registry, header, blocks, owner)
+
+    @classmethod
+    def publish(cls, source: BarReader, name: Optional[str] = None) -> "SharedBars":
+        """
+        Copy every day of `source` into new shared memory blocks.
+
+        Args:
+            source: BarStore (or any BarReader) to publish
+            name: Registry block name; defaults to '<symbol>_bars' in lower case
+
+        Returns:
+            Owning SharedBars; the blocks are removed by `unlink` or when leaving a `with` block
+        """
+        name = name or f"{source.symbol.lower()}_bars"
+        offsets = {}
+        rows = 0
+        for day, start, stop in source.day_ranges():
+            offsets[day] = [rows, rows + stop - start]
+            rows += stop - start
+
+        columns = {column: [values] for column, values in source.load_arrays().items()}
+        meta = {'symbol': source.symbol, 'tz': source.tz, 'days': offsets}
+        return cls(name, *_publish(name, columns, meta), owner=True)
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+
+class SharedDays(_SharedBlocks):
+    """
+    A list of per-day dicts of arrays with the same keys (e.g. the
+    precompute_day output a sweep hands its workers) in shared memory.
+    `days` gives the same list back as read-only views.
+    """
+
+    def __init__(self, name: str, registry: dict, header: shared_memory.SharedMemory,
+                 blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        super().__init__(name, registry, header, blocks, owner)
+        self.days: List[Dict[str, np.ndarray]] = [
+            {key: values[start:stop] for key, values in self._arrays.items()}
+            for start, stop in registry['days']
+        ]
+
+    @classmethod
+    def publish(cls, days: List[Dict[str, np.ndarray]], name: Optional[str] = None) -> "SharedDays":
+        """
+        Copy `days` into new shared memory blocks, one per key.
+
+        Args:
+            days: Per-day dicts; every dict has the same keys and dtypes
+            name: Registry block name; a random unused one by default
+
+        Returns:
+            Owning SharedDays; the blocks are removed by `unlink` or when leaving a `with` block
+        """
+        keys = list(days[0]) if days else []
+        bounds, rows = [], 0
+        for day in days:
+            n = len(day[keys[0]])
+            bounds.append([rows, rows + n])
+            rows += n
+        columns = {key: [day[key] for day in days] for key in keys}
+        registry, header, blocks = _publish(name, columns, {'days': bounds})
+        return cls(header.name, registry, header, blocks, owner=True)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+
+def open_bars(data_path: str = "data/", symbol: str = "MES", shared: Optional[str] = None) -> BarReader:
+    """
+    Bars published under `shared` when given, otherwise the bar store under `data_path`.
+    """
+    if shared:
+        return SharedBars.attach(shared)
+    return open_store(data_path, symbol)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish the bar store into shared memory for other processes")
+    parser.add_argument('--data', default="data/", help="Directory with per-day CSV files and the bar store")
+    parser.add_argument('--symbol', default="MES")
+    parser.add_argument('--name', default=None, help="Registry name (default '<symbol>_bars')")
+    args = parser.parse_args(argv)
+
+    with SharedBars.publish(open_store(args.data, args.symbol), args.name) as bars:
+        print(f"📊 Published {len(bars)} days, {bars._index['rows']} bars "
+              f"({bars.nbytes / 1e6:.1f} MB) as '{bars.name}'")
+        print(f"   Attach with --shared {bars.name}; Ctrl-C to unpublish")
+        try:
+            # Background jobs start with SIGINT ignored; take both signals explicitly
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, signal.default_int_handler)
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+    print(f"✅ Removed '{bars.name}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,40 +6,122 @@ from typing import Tuple
 import pandas as pd
 import numpy as np
 from .config import VWAPConfig
+from . import indicators
+from . import instrumentation
 
-def calculate_vwap(df: pd.DataFrame) -> pd.Series:
+def session_starts(
+    df: pd.DataFrame,
+    session_start: str = "17:00",
+    tz: str = "America/Chicago"
+) -> np.ndarray:
+    """
+    Boolean mask marking the first bar of each trading session in `df`.
+    """
+    return indicators.segment_starts(
+        indicators.session_ids(df['date'], session_start, tz)
+    )
+
+def calculate_vwap(
+    df: pd.DataFrame,
+    session_start: str = "17:00",
+    tz: str = "America/Chicago",
+    starts: np.ndarray = None
+) -> pd.Series:
     """
-    Calculate Volume Weighted Average Price (VWAP) for each day.
+    Calculate Volume Weighted Average Price (VWAP) for each trading session.
     
     Args:
         df: DataFrame with 'close', 'volume', and 'date' columns
+        session_start: Local time at which each session (and the VWAP) resets
+        tz: Exchange timezone for the session boundary
+        starts: Precomputed session-start mask (see session_starts); derived
+            from the dates if omitted
         
     Returns:
         Series containing VWAP values
     """
-    return df.groupby(df['date'].dt.date).apply(
-        lambda x: (x['close'] * x['volume']).cumsum() / x['volume'].cumsum()
-    ).reset_index(level=0, drop=True)
+    if starts is None:
+        starts = session_starts(df, session_start, tz)
+    vwap = indicators.session_vwap(
+        df['close'].to_numpy(dtype=np.float64),
+        df['volume'].to_numpy(dtype=np.float64),
+        starts
+    )
+    return pd.Series(vwap, index=df.index)
 
-def calculate_zscore(series: pd.Series, window: int) -> pd.Series:
+def calculate_zscore(series: pd.Series, window: int, starts: np.ndarray = None) -> pd.Series:
     """
     Calculate rolling Z-score for a series.
     
     Args:
         series: Input series to calculate Z-score for
         window: Rolling window size
+        starts: Optional session-start mask; the window restarts at each session
         
     Returns:
         Series containing Z-score values
     """
-    return (
-        series - series.rolling(window).mean()
-    ) / series.rolling(window).std()
+    values = series.to_numpy(dtype=np.float64)
+    return pd.Series(indicators.rolling_zscore(values, window, starts), index=series.index)
+
+def smooth_zscore(zscore: pd.Series, span: int, starts: np.ndarray = None) -> pd.Series:
+    """
+    Exponentially weighted mean of the Z-score, restarted at every session.
+    
+    Args:
+        zscore: Z-score series
+        span: EWM span
+        starts: Optional session-start mask; omitted means a single session
+        
+    Returns:
+        Series containing the smoothed Z-score
+    """
+    if starts is None or not starts[1:].any():
+        return zscore.ewm(span=span).mean()
+    smooth = zscore.groupby(np.cumsum(starts)).ewm(span=span).mean()
+    return pd.Series(smooth.to_numpy(), index=zscore.index)
+
+def _throttle_mask(mask: np.ndarray, throttle_bars: int, starts: np.ndarray = None) -> np.ndarray:
+    """
+    Keep a signal only if at least `throttle_bars` bars passed since the last kept one.
+    
+    Works on the positions of candidate signals and jumps ahead with
+    searchsorted, so the cost scales with the number of signals, not bars.
+    
+    Args:
+        mask: Boolean array of candidate signals
+        throttle_bars: Minimum bars between kept signals
+        starts: Optional boolean mask of segment starts; the throttle
+            restarts at each segment as if segments were throttled separately
+        
+    Returns:
+        Boolean array of kept signals
+    """
+    positions = np.flatnonzero(mask)
+    if throttle_bars > 1 and len(positions) > 1:
+        if starts is not None:
+            # First position of the segment following each candidate
+            bounds = np.append(np.flatnonzero(starts), len(mask))
+            segment_end = bounds[np.searchsorted(bounds, positions, side='right')]
+        kept = []
+        j = 0
+        while j < len(positions):
+            kept.append(j)
+            nxt = positions[j] + throttle_bars
+            if starts is not None:
+                nxt = min(nxt, segment_end[j])
+            j = np.searchsorted(positions, nxt)
+        positions = positions[kept]
+    
+    out = np.zeros(len(mask), dtype=bool)
+    out[positions] = True
+    return out
 
 def throttle_signals(
     long_signals: pd.Series,
     short_signals: pd.Series,
-    throttle_bars: int
+    throttle_bars: int,
+    starts: np.ndarray = None
 ) -> Tuple[pd.Series, pd.Series]:
     """
     Apply throttling to trading signals to prevent overtrading.
@@ -48,29 +130,27 @@ def throttle_signals(
         long_signals: Series of long entry signals
         short_signals: Series of short entry signals
         throttle_bars: Minimum bars between signals
+        starts: Optional session-start mask; the throttle restarts at each session
         
     Returns:
         Tuple of throttled (long_signals, short_signals)
     """
-    throttled_long = pd.Series(False, index=long_signals.index)
-    throttled_short = pd.Series(False, index=short_signals.index)
-    
-    last_long = -np.inf
-    last_short = -np.inf
-    
-    for i in range(len(long_signals)):
-        if long_signals.iloc[i] and (i - last_long >= throttle_bars):
-            throttled_long.iloc[i] = True
-            last_long = i
-        if short_signals.iloc[i] and (i - last_short >= throttle_bars):
-            throttled_short.iloc[i] = True
-            last_short = i
-            
+    throttled_long = pd.Series(
+        _throttle_mask(long_signals.to_numpy(dtype=bool), throttle_bars, starts),
+        index=long_signals.index
+    )
+    throttled_short = pd.Series(
+        _throttle_mask(short_signals.to_numpy(dtype=bool), throttle_bars, starts),
+        index=short_signals.index
+    )
+    
     return throttled_long, throttled_short
 
+@instrumentation.timed('signals')
 def compute_vwap_zscore_signals(
     df: pd.DataFrame,
-    config: VWAPConfig = VWAPConfig()
+    config: VWAPConfig = VWAPConfig(),
+    copy: bool = True
 ) -> pd.DataFrame:
     """
     Compute trading signals based on VWAP deviation Z-score.
@@ -78,37 +158,67 @@ def compute_vwap_zscore_signals(
     Args:
         df: OHLCV DataFrame with 'date' column
         config: VWAPConfig instance with strategy parameters
+        copy: If False, add the columns to `df` itself and keep only those the
+            backtest needs (vwap, zscore_smooth, signals); the warm-up rows
+            are then dropped by slicing rather than copying
         
     Returns:
         DataFrame with added columns for VWAP, Z-score, and signals
     """
-    df = df.copy()
-    df['date'] = pd.to_datetime(df['date'])
+    if copy:
+        df = df.copy()
+    if not pd.api.types.is_datetime64_any_dtype(df['date']):
+        # Frames concatenated across DST changes carry mixed UTC offsets
+        df['date'] = pd.to_datetime(df['date'], utc=True).dt.tz_convert(config.session_tz)
+    
+    # Every indicator restarts at the session boundary, so a multi-session
+    # frame gives the same values as its sessions computed separately
+    starts = session_starts(df, config.session_start, config.session_tz)
     
     # Calculate VWAP and deviation
-    df['vwap'] = calculate_vwap(df)
-    df['vwap_diff'] = df['close'] - df['vwap']
+    with instrumentation.stage('signals.vwap'):
+        vwap = calculate_vwap(df, config.session_start, config.session_tz, starts)
+        vwap_diff = df['close'] - vwap
     
     # Calculate Z-score and smoothed version
-    df['zscore'] = calculate_zscore(df['vwap_diff'], config.window)
-    df['zscore_smooth'] = df['zscore'].ewm(span=config.zscore_smooth_span).mean()
+    with instrumentation.stage('signals.zscore'):
+        zscore = calculate_zscore(vwap_diff, config.window, starts)
+        zscore_smooth = smooth_zscore(zscore, config.zscore_smooth_span, starts)
     
     # Calculate VWAP slope for trend filter
-    df['vwap_slope'] = df['vwap'].diff()
+    vwap_slope = vwap.diff()
+    vwap_slope[starts] = np.nan
+    
+    df['vwap'] = vwap
+    if copy:
+        df['vwap_diff'] = vwap_diff
+        df['zscore'] = zscore
+    df['zscore_smooth'] = zscore_smooth
+    if copy:
+        df['vwap_slope'] = vwap_slope
     
     # Generate raw signals
-    long_signals = (df['zscore_smooth'] < -config.zscore_threshold) & (df['vwap_slope'] >= 0)
-    short_signals = (df['zscore_smooth'] > config.zscore_threshold) & (df['vwap_slope'] <= 0)
+    long_signals = (zscore_smooth < -config.zscore_threshold) & (vwap_slope >= 0)
+    short_signals = (zscore_smooth > config.zscore_threshold) & (vwap_slope <= 0)
     
     # Apply throttling
-    df['long_signal'], df['short_signal'] = throttle_signals(
-        long_signals, short_signals, config.throttle_bars
-    )
+    with instrumentation.stage('signals.throttle'):
+        df['long_signal'], df['short_signal'] = throttle_signals(
+            long_signals, short_signals, config.throttle_bars, starts
+        )
+    if instrumentation.enabled():
+        instrumentation.count('bars', len(df))
+        instrumentation.count('signals', df['long_signal'].sum() + df['short_signal'].sum())
     
     # Add combined signal column for convenience
-    df['signal'] = 0
-    df.loc[df['long_signal'], 'signal'] = 1
-    df.loc[df['short_signal'], 'signal'] = -1
+    long_mask = df['long_signal'].to_numpy()
+    short_mask = df['short_signal'].to_numpy()
+    df['signal'] = np.where(short_mask, -1, np.where(long_mask, 1, 0)).astype(np.int64 if copy else np.int8)
     
     # Clean up NaN values from rolling calculations
-    return df.dropna(subset=['zscore_smooth'])
\ No newline at end of file
+    if not copy:
+        # A single session's NaN only precedes the first valid z-score, so this
+        # is a slice (views); frames spanning sessions fall back to a mask
+        return df.iloc[indicators.valid_rows(zscore_smooth.to_numpy())]
+    missing = zscore_smooth.isna().to_numpy()
+    return df[~missing] if missing.any() else df
@@ -0,0 +1,387 @@
+"""
+Columnar, memory-mapped bar store.
+
+Bars for one symbol live in a directory with one raw binary file per column
+(int64 epoch-nanosecond UTC timestamps, float32 prices, int32 volume and bar
+counts) and an `index.json` holding column dtypes and the row range of every
+day. A column is widened to its BAR_COLUMNS dtype once some day's values do
+not survive the narrow cast (e.g. 'average', which is not tick-aligned).
+Reads are memory-mapped, so loading a date range returns views into the files
+instead of parsing CSV text.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS: Dict[str, str] = {
+    'date': 'int64',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+    'average': 'float64',
+    'barCount': 'int64',
+}
+
+# Narrower dtypes the store writes bar columns in while the values survive the cast unchanged
+COMPACT_COLUMNS: Dict[str, str] = {
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
+    'volume': 'int32',
+    'average': 'float32',
+    'barCount': 'int32',
+}
+
+CSV_PATTERN = re.compile(r"^(?P<symbol>[A-Z0-9]+)_(?P<day>\d{8})\.csv$")
+
+# Layout of 'YYYY-mm-dd HH:MM:SS+HH:MM': character positions of each field
+_FIXED_WIDTH = 25
+_FIXED_SEPARATORS = {4: b'-', 7: b'-', 10: b' ', 13: b':', 16: b':', 22: b':'}
+_FIXED_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 23, 24]
+
+
+def _parse_fixed_offset(dates: pd.Series) -> Optional[np.ndarray]:
+    """
+    Vectorised parse of 'YYYY-mm-dd HH:MM:SS+HH:MM' strings to int64 UTC nanoseconds.
+
+    Reads the digits straight from a fixed-width byte array instead of going
+    through strptime. Returns None if any string has a different layout.
+    """
+    try:
+        raw = np.asarray(dates, dtype=f'S{_FIXED_WIDTH}')
+    except (UnicodeEncodeError, ValueError):
+        return None
+    chars = raw.view(np.uint8).reshape(len(raw), _FIXED_WIDTH)
+    sign = chars[:, 19]
+    if not (all((chars[:, i] == ord(c)).all() for i, c in _FIXED_SEPARATORS.items())
+            and ((sign == ord('+')) | (sign == ord('-'))).all()):
+        return None
+    digits = chars[:, _FIXED_DIGITS].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+    pairs = digits[:, 2:].reshape(len(raw), -1, 2) @ np.array([10, 1])
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + pairs[:, 0]
+    month, day, hour, minute, second, off_hour, off_minute = pairs[:, 1:].T
+
+    # Days since 1970-01-01 of the proleptic Gregorian date (H. Hinnant's days_from_civil)
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    days = era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+    offset = np.where(sign == ord('-'), -1, 1) * (off_hour * 3600 + off_minute * 60)
+    return (days * 86400 + hour * 3600 + minute * 60 + second - offset) * 1_000_000_000
+
+
+def parse_bar_dates(dates: pd.Series) -> np.ndarray:
+    """
+    Parse bar timestamps like '2025-01-08 17:31:00-06:00' to int64 UTC nanoseconds.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        if len(dates) and isinstance(dates.iloc[0], str):
+            parsed = _parse_fixed_offset(dates)
+            if parsed is not None:
+                return parsed
+            dates = pd.to_datetime(dates, format="%Y-%m-%d %H:%M:%S%z", utc=True)
+        else:
+            # datetime objects, e.g. straight from ib_insync bars
+            dates = pd.to_datetime(dates, utc=True)
+    elif dates.dt.tz is None:
+        dates = dates.dt.tz_localize('UTC')
+    return pd.DatetimeIndex(dates).as_unit('ns').asi8
+
+
+def _narrow(values: np.ndarray, dtype: str) -> np.ndarray:
+    """`values` cast to `dtype` if that loses nothing (e.g. tick-aligned prices), otherwise unchanged."""
+    try:
+        with np.errstate(invalid='ignore', over='ignore'):
+            narrow = values.astype(dtype)
+    except (TypeError, ValueError):
+        return values
+    with np.errstate(invalid='ignore'):
+        same = np.array_equal(narrow.astype(values.dtype), values, equal_nan=values.dtype.kind == 'f')
+    return narrow if same else values
+
+
+def read_bars_csv(csv_path: str, compact: bool = True, tz: str = "America/Chicago") -> pd.DataFrame:
+    """
+    Read one bar CSV with a tz-aware 'date' column.
+
+    Args:
+        csv_path: File with the IB CSV schema
+        compact: Narrow columns to COMPACT_COLUMNS dtypes where the values
+            are unchanged by it (float32 prices, int32 volume/barCount)
+        tz: Timezone of the returned timestamps
+
+    Returns:
+        DataFrame of bars
+    """
+    df = pd.read_csv(csv_path, dtype={'date': str})
+    columns = {'date': pd.to_datetime(parse_bar_dates(df['date']), utc=True).tz_convert(tz)}
+    for name in df.columns.drop('date'):
+        values = df[name].to_numpy()
+        columns[name] = _narrow(values, COMPACT_COLUMNS[name]) if compact and name in COMPACT_COLUMNS else values
+    return pd.DataFrame(columns, copy=False)
+
+
+class BarReader:
+    """
+    Read side of a columnar bar history: day selection, array and frame loads.
+
+    Subclasses provide `tz`, an `_index` with 'columns' (name -> dtype) and
+    'days' (day -> [start_row, stop_row]), and `_column(name)` returning the
+    whole column as an array.
+    """
+    tz: str
+    _index: dict
+
+    def _column(self, name: str) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def days(self) -> List[str]:
+        """Stored days as sorted 'YYYYMMDD' strings."""
+        return sorted(self._index['days'])
+
+    def __len__(self) -> int:
+        return len(self._index['days'])
+
+    def __contains__(self, day: str) -> bool:
+        return day in self._index['days']
+
+    def _select_days(self, start: Optional[str], end: Optional[str]) -> List[str]:
+        return [d for d in self.days if (start is None or d >= start) and (end is None or d <= end)]
+
+    def day_ranges(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """
+        (day, start_row, stop_row) for each stored day in [start, end], oldest first.
+        """
+        return [(d, *self._index['days'][d]) for d in self._select_days(start, end)]
+
+    def load_arrays(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        copy: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        Load bars for the days in [start, end] (inclusive, 'YYYYMMDD') as NumPy arrays.
+
+        When the selected days are stored contiguously the arrays are read-only
+        views into the columns (memory-mapped files or shared memory); otherwise
+        they are gathered into new arrays.
+        """
+        columns = columns or list(self._index['columns'])
+        ranges = [(a, b) for _, a, b in self.day_ranges(start, end)]
+        contiguous = all(r0[1] == r1[0] for r0, r1 in zip(ranges, ranges[1:]))
+
+        out = {}
+        for name in columns:
+            col = self._column(name)
+            if not ranges:
+                values = col[:0]
+            elif contiguous:
+                values = col[ranges[0][0]:ranges[-1][1]]
+            else:
+                values = np.concatenate([col[a:b] for a, b in ranges])
+            out[name] = np.array(values) if copy else values
+        return out
+
+    def load_frame(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Load bars for the days in [start, end] as a DataFrame with tz-aware 'date'.
+        """
+        arrays = self.load_arrays(start, end)
+        dates = pd.to_datetime(arrays.pop('date'), utc=True).tz_convert(self.tz)
+        return pd.DataFrame({'date': dates, **arrays}, copy=False)
+
+    def iter_days(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Yield (day, DataFrame) pairs for the days in [start, end], oldest first.
+        """
+        for day in self._select_days(start, end):
+            yield day, self.load_frame(day, day)
+
+
+class BarStore(BarReader):
+    """
+    On-disk columnar store of 1-minute bars for one symbol.
+
+    Args:
+        root: Directory holding one sub-directory per symbol
+        symbol: Instrument symbol, e.g. 'MES'
+        tz: Timezone used when timestamps are returned as a DataFrame
+    """
+
+    def __init__(self, root: str = "data/store", symbol: str = "MES", tz: str = "America/Chicago"):
+        self.symbol = symbol
+        self.tz = tz
+        self.path = os.path.join(root, symbol)
+        os.makedirs(self.path, exist_ok=True)
+        self._index_path = os.path.join(self.path, "index.json")
+        self._maps: Dict[str, np.ndarray] = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                self._index = json.load(f)
+        else:
+            self._index = {'columns': {'date': BAR_COLUMNS['date'], **COMPACT_COLUMNS}, 'rows': 0, 'days': {},
+                           'sources': {}, 'compact': True}
+
+    # ------------------------------------------------------------------ index
+
+    def _save_index(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, self._index_path)
+
+    def _column_file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    # ----------------------------------------------------------------- writes
+
+    def ingest_frame(self, day: str, df: pd.DataFrame, source: Optional[dict] = None):
+        """
+        Append one day of bars. Re-ingesting a day points the index at the new rows.
+
+        The index is saved last, so an interrupted ingest leaves the store as
+        it was; rows written past the index are cut off by the next ingest.
+
+        Args:
+            day: Day label in 'YYYYMMDD' format
+            df: Bars with the IB CSV schema (date, open, high, low, close, volume, average, barCount)
+            source: Optional metadata about where the bars came from (used to detect changes)
+        """
+        start = self._index['rows']
+        columns = self._index['columns']
+        for name in list(columns):
+            if name == 'date':
+                values = parse_bar_dates(df['date'])
+            else:
+                values = _narrow(df[name].to_numpy(), columns[name])
+                if values.dtype != columns[name]:
+                    self._widen(name)
+                    values = df[name].to_numpy(dtype=columns[name])
+            dtype = columns[name]
+            with open(self._column_file(name), "ab") as f:
+                # Drop bytes an interrupted ingest appended past the indexed rows
+                f.truncate(start * np.dtype(dtype).itemsize)
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+        self._index['rows'] = start + len(df)
+        self._index['days'][day] = [start, start + len(df)]
+        if source is not None:
+            self._index['sources'][day] = source
+        self._maps.clear()
+        self._save_index()
+
+    def _widen(self, name: str):
+        """Rewrite a compact column in its BAR_COLUMNS dtype, for values the narrow one cannot hold."""
+        values = self._column(name).astype(BAR_COLUMNS[name])
+        self._maps.clear()
+        tmp = self._column_file(name) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(values.tobytes())
+        os.replace(tmp, self._column_file(name))
+        self._index['columns'][name] = BAR_COLUMNS[name]
+        self._save_index()
+
+    def ingest_csv(self, csv_path: str, day: Optional[str] = None):
+        """
+        Ingest one `SYMBOL_YYYYMMDD.csv` file.
+        """
+        if day is None:
+            day = CSV_PATTERN.match(os.path.basename(csv_path)).group('day')
+        stat = os.stat(csv_path)
+        df = read_bars_csv(csv_path, tz=self.tz)
+        self.ingest_frame(day, df, source={'size': stat.st_size, 'mtime': stat.st_mtime})
+
+    def sync_csv_dir(self, data_path: str = "data/") -> List[str]:
+        """
+        Ingest every CSV for this symbol in `data_path` that is new or has changed.
+
+        Returns:
+            Days that were (re)ingested
+        """
+        ingested = []
+        for name in sorted(os.listdir(data_path)):
+            match = CSV_PATTERN.match(name)
+            if not match or match.group('symbol') != self.symbol:
+                continue
+            day = match.group('day')
+            path = os.path.join(data_path, name)
+            stat = os.stat(path)
+            known = self._index['sources'].get(day)
+            if day in self and known == {'size': stat.st_size, 'mtime': stat.st_mtime}:
+                continue
+            self.ingest_csv(path, day)
+            ingested.append(day)
+        # Stores written before compact dtypes are narrowed once
+        if (ingested and self._fragmented()) or not self._index.get('compact'):
+            self.compact()
+        return ingested
+
+    def _fragmented(self) -> bool:
+        ranges = [self._index['days'][day] for day in self.days]
+        stored = sum(stop - start for start, stop in ranges)
+        in_order = all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        return stored != self._index['rows'] or not in_order or bool(ranges and ranges[0][0] != 0)
+
+    def compact(self):
+        """
+        Rewrite the column files with days in chronological order and no orphaned
+        rows, each column in its COMPACT_COLUMNS dtype if every value fits.
+        """
+        arrays = self.load_arrays(copy=True)
+        offsets = {}
+        position = 0
+        for day in self.days:
+            start, stop = self._index['days'][day]
+            offsets[day] = [position, position + stop - start]
+            position += stop - start
+
+        self._maps.clear()
+        for name in list(self._index['columns']):
+            values = arrays[name]
+            if name in COMPACT_COLUMNS:
+                values = _narrow(values, COMPACT_COLUMNS[name])
+            tmp = self._column_file(name) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(np.ascontiguousarray(values).tobytes())
+            os.replace(tmp, self._column_file(name))
+            self._index['columns'][name] = values.dtype.name
+        self._index['days'] = offsets
+        self._index['rows'] = position
+        self._index['compact'] = True
+        self._save_index()
+
+    # ------------------------------------------------------------------ reads
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self._maps:
+            dtype = np.dtype(self._index['columns'][name])
+            if self._index['rows'] == 0:
+                self._maps[name] = np.empty(0, dtype=dtype)
+            else:
+                # Plain ndarray view over the map; pandas handles it better than the memmap subclass
+                self._maps[name] = np.asarray(np.memmap(self._column_file(name), dtype=dtype, mode='r',
+                                                        shape=(self._index['rows'],)))
+        return self._maps[name]
+
+
+def open_store(data_path: str = "data/", symbol: str = "MES", root: Optional[str] = None) -> BarStore:
+    """
+    Open the bar store under `data_path` and ingest any new or changed CSV files.
+    """
+    store = BarStore(root or os.path.join(data_path, "store"), symbol)
+    store.sync_csv_dir(data_path)
+    return store
@@ -0,0 +1,257 @@
+"""
+Incremental signal engine for live bars.
+
+StreamingVWAPSignal keeps running state (session VWAP sums, a ring buffer
+for the rolling z-score, the EWM smoother and throttle counters) and emits
+the same long/short signals as compute_vwap_zscore_signals, in constant
+time and memory per bar.
+"""
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import VWAPConfig
+from .indicators import NS_PER_DAY
+from .signals import compute_vwap_zscore_signals
+
+
+@dataclass
+class SignalUpdate:
+    """Indicator values and signals for one completed bar."""
+    date: object
+    close: float
+    vwap: float
+    vwap_diff: float
+    zscore: float
+    zscore_smooth: float
+    vwap_slope: float
+    long_signal: bool
+    short_signal: bool
+
+    @property
+    def signal(self) -> int:
+        return 1 if self.long_signal else -1 if self.short_signal else 0
+
+
+def _field(bar, name: str):
+    return bar[name] if isinstance(bar, Mapping) else getattr(bar, name)
+
+
+def _divide(a: float, b: float) -> float:
+    # IEEE division as NumPy does it: x/0 -> +-inf, 0/0 -> nan
+    if b == 0:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class StreamingVWAPSignal:
+    """
+    Bar-by-bar VWAP z-score signal generator.
+
+    Args:
+        config: VWAPConfig instance with strategy and session parameters
+    """
+
+    def __init__(self, config: VWAPConfig = VWAPConfig()):
+        self.config = config
+        self._session_offset = pd.Timedelta(f"{config.session_start}:00").value
+        # EWM weights as pandas derives them from span
+        com = (config.zscore_smooth_span - 1) / 2.0
+        self._ewm_decay = 1.0 - 1.0 / (1.0 + com)
+        self.reset()
+
+    def reset(self):
+        """Clear all running state."""
+        self.bars = 0
+        self._session = None
+        self._new_session()
+
+    def _new_session(self):
+        # Every indicator restarts at the session boundary, as in the batch path
+        w = self.config.window
+        self._session_bars = 0
+        self._cum_pv = 0.0
+        self._cum_vol = 0.0
+        self._prev_vwap = math.nan
+
+        # Ring buffer of vwap_diff with running (shifted) sums for the rolling z-score
+        self._buffer = np.full(w, math.nan)
+        self._shift = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._nan_count = w
+        self._run_length = 0
+        self._last_diff = math.nan
+
+        self._ewm = math.nan
+        self._ewm_weight = 1.0
+        self._last_long = -math.inf
+        self._last_short = -math.inf
+
+    def session_id(self, date) -> int:
+        """Session number of a bar timestamp (the same numbering as indicators.session_ids)."""
+        ts = pd.Timestamp(date)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert(self.config.session_tz).tz_localize(None)
+        return (ts.value - self._session_offset) // NS_PER_DAY
+
+    def _rolling_zscore(self, x: float) -> float:
+        w = self.config.window
+        pos = self._session_bars % w
+        old = self._buffer[pos]
+        self._buffer[pos] = x
+
+        if x == x and self._shift is None:
+            self._shift = x
+        shift = self._shift or 0.0
+        if old == old:
+            self._sum -= old - shift
+            self._sum_sq -= (old - shift) ** 2
+        else:
+            self._nan_count -= 1
+        if x == x:
+            self._sum += x - shift
+            self._sum_sq += (x - shift) ** 2
+        else:
+            self._nan_count += 1
+        # Re-sum the window periodically so add/remove rounding cannot drift
+        if pos == w - 1 and self._nan_count == 0:
+            centred = self._buffer - shift
+            self._sum = float(centred.sum())
+            self._sum_sq = float((centred * centred).sum())
+
+        self._run_length = self._run_length + 1 if x == self._last_diff else 1
+        self._last_diff = x
+
+        if self._nan_count > 0 or self._session_bars + 1 < w:
+            return math.nan
+        if self._run_length >= w:
+            return _divide(0.0, 0.0)
+        mean = self._sum / w + shift
+        var = (self._sum_sq - self._sum * self._sum / w) / (w - 1)
+        return _divide(x - mean, math.sqrt(max(var, 0.0)))
+
+    def _smooth(self, z: float) -> float:
+        # Same recurrence as pandas ewm(span=..., adjust=True, ignore_na=False)
+        if self._ewm == self._ewm:
+            self._ewm_weight *= self._ewm_decay
+            if z == z:
+                if self._ewm != z:
+                    self._ewm = (self._ewm_weight * self._ewm + z) / (self._ewm_weight + 1.0)
+                self._ewm_weight += 1.0
+        elif z == z:
+            self._ewm = z
+        return self._ewm
+
+    def update(self, bar) -> SignalUpdate:
+        """
+        Consume one completed bar and return its indicator values and signals.
+
+        Args:
+            bar: Object or mapping with 'date', 'close' and 'volume' (e.g. an ib_insync BarData)
+
+        Returns:
+            SignalUpdate for the bar
+        """
+        cfg = self.config
+        date = _field(bar, 'date')
+        close = float(_field(bar, 'close'))
+        volume = float(_field(bar, 'volume'))
+
+        session = self.session_id(date)
+        if session != self._session:
+            self._session = session
+            self._new_session()
+        self._cum_pv += close * volume
+        self._cum_vol += volume
+        vwap = _divide(self._cum_pv, self._cum_vol)
+        vwap_diff = close - vwap
+        vwap_slope = vwap - self._prev_vwap
+        self._prev_vwap = vwap
+
+        zscore = self._rolling_zscore(vwap_diff)
+        zscore_smooth = self._smooth(zscore)
+
+        i = self.bars
+        long_signal = short_signal = False
+        if zscore_smooth < -cfg.zscore_threshold and vwap_slope >= 0 and i - self._last_long >= cfg.throttle_bars:
+            long_signal = True
+            self._last_long = i
+        if zscore_smooth > cfg.zscore_threshold and vwap_slope <= 0 and i - self._last_short >= cfg.throttle_bars:
+            short_signal = True
+            self._last_short = i
+        self.bars += 1
+        self._session_bars += 1
+
+        return SignalUpdate(date, close, vwap, vwap_diff, zscore, zscore_smooth, vwap_slope,
+                            long_signal, short_signal)
+
+    def attach(self, bars, callback: Optional[Callable[[SignalUpdate], None]] = None):
+        """
+        Drive the engine from an ib_insync `keepUpToDate=True` bar list.
+
+        Completed historical bars are replayed first to warm up the state;
+        afterwards each finished bar is fed in when IB starts a new one.
+
+        Args:
+            bars: BarDataList returned by reqHistoricalData(..., keepUpToDate=True)
+            callback: Called with the SignalUpdate of every finished live bar
+
+        Returns:
+            The event handler, so it can be removed with `bars.updateEvent -= handler`
+        """
+        for bar in list(bars)[:-1]:
+            self.update(bar)
+
+        def on_bar_update(bars, has_new_bar: bool):
+            if not has_new_bar or len(bars) < 2:
+                return
+            result = self.update(bars[-2])
+            if callback is not None:
+                callback(result)
+
+        bars.updateEvent += on_bar_update
+        return on_bar_update
+
+
+def verify_against_batch(df: pd.DataFrame, config: VWAPConfig = VWAPConfig()) -> pd.DataFrame:
+    """
+    Replay a bar frame through StreamingVWAPSignal and compare with compute_vwap_zscore_signals.
+
+    Returns:
+        Rows of the batch output whose signals differ from the streaming ones (empty if identical)
+    """
+    batch = compute_vwap_zscore_signals(df, config)
+    engine = StreamingVWAPSignal(config)
+    updates = [engine.update(row) for row in df.to_dict('records')]
+    stream = pd.DataFrame({
+        'long_signal': [u.long_signal for u in updates],
+        'short_signal': [u.short_signal for u in updates],
+        'zscore_smooth': [u.zscore_smooth for u in updates],
+    }, index=df.index).loc[batch.index]
+
+    differs = ((stream['long_signal'] != batch['long_signal'])
+               | (stream['short_signal'] != batch['short_signal']))
+    return batch[differs]
+
+
+if __name__ == "__main__":
+    import sys
+    from .store import open_store
+
+    store = open_store("data/")
+    days = sys.argv[1:] or store.days
+    total = 0
+    for day in days:
+        df = store.load_frame(day, day)
+        mismatches = verify_against_batch(df)
+        total += len(mismatches)
+        if len(mismatches):
+            print(f"{day}: {len(mismatches)} mismatched bars")
+    print(f"Checked {len(days)} days, {total} mismatched bars")
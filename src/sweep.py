@@ -0,0 +1,284 @@
+"""
+Parallel parameter sweep over VWAPConfig and simulate_trades arguments.
+
+Work that does not depend on a parameter is shared: VWAP is computed once
+per day, the z-score once per `window`, the smoothed z-score once per
+(`window`, `zscore_smooth_span`) pair, and only thresholding, throttling
+and trade simulation run for every combination.
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from . import indicators
+from .backtest import simulate_trades_arrays
+from .config import VWAPConfig
+from .metrics import METRIC_NAMES, PerformanceAccumulator
+from .shm import SharedDays, open_bars
+from .signals import _throttle_mask, calculate_vwap
+
+SIGNAL_PARAMS = ('window', 'zscore_threshold', 'zscore_smooth_span', 'throttle_bars')
+TRADE_PARAMS = ('risk_pct', 'cooldown_bars', 'max_contracts')
+
+DEFAULT_GRID = {
+    'window': [VWAPConfig.window],
+    'zscore_threshold': [VWAPConfig.zscore_threshold],
+    'zscore_smooth_span': [VWAPConfig.zscore_smooth_span],
+    'throttle_bars': [VWAPConfig.throttle_bars],
+    'risk_pct': [0.01],
+    'cooldown_bars': [10],
+    'max_contracts': [5],
+}
+
+# Per-day parameter-free arrays, set in each worker by _init_worker
+_DAYS: List[Dict[str, np.ndarray]] = []
+# Smoothed z-scores per (window, span), reused by later tasks in the same worker
+_ZSCORES: Dict[tuple, List[np.ndarray]] = {}
+
+
+def load_days(data_path: str = "data/", symbol: str = "MES", shared: str = None) -> List[pd.DataFrame]:
+    """
+    Load every stored day for `symbol` from the bar store under `data_path`
+    (or from the shared-memory bars named `shared`), oldest first.
+    """
+    return [df for _, df in open_bars(data_path, symbol, shared).iter_days()]
+
+
+def precompute_day(df: pd.DataFrame, config: VWAPConfig = VWAPConfig()) -> Dict[str, np.ndarray]:
+    """
+    Compute the parameter-free arrays for one day: prices, VWAP, VWAP deviation and slope.
+    """
+    vwap = calculate_vwap(df, config.session_start, config.session_tz).to_numpy()
+    close = df['close'].to_numpy(dtype=np.float64)
+    slope = np.empty(len(vwap))
+    slope[:1] = np.nan
+    slope[1:] = np.diff(vwap)
+    return {
+        'close': close,
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+        'vwap_diff': close - vwap,
+        'vwap_slope': slope,
+    }
+
+
+def _smoothed_zscores(window: int, span: int) -> List[np.ndarray]:
+    key = (window, span)
+    if key not in _ZSCORES:
+        _ZSCORES[key] = [
+            pd.Series(indicators.rolling_zscore(day['vwap_diff'], window)).ewm(span=span).mean().to_numpy()
+            for day in _DAYS
+        ]
+    return _ZSCORES[key]
+
+
+def _signal_day(day: Dict[str, np.ndarray], zscore_smooth: np.ndarray, threshold: float, throttle_bars: int):
+    """
+    Signals and ATR for one day, trimmed the same way as
+    compute_vwap_zscore_signals followed by simulate_trades.
+    """
+    slope = day['vwap_slope']
+    long_signal = _throttle_mask((zscore_smooth < -threshold) & (slope >= 0), throttle_bars)
+    short_signal = _throttle_mask((zscore_smooth > threshold) & (slope <= 0), throttle_bars)
+
+    # Warm-up rows are sliced off, so the trade inputs are views of the day's arrays
+    keep = indicators.valid_rows(zscore_smooth)
+    close, high, low = day['close'][keep], day['high'][keep], day['low'][keep]
+    atr = indicators.atr(high, low, close, 14)
+    valid = indicators.valid_rows(atr)
+    return (close[valid], high[valid], low[valid], atr[valid],
+            long_signal[keep][valid], short_signal[keep][valid])
+
+
+def _run_days(signal_days, equity_start: float, risk_pct: float, cooldown_bars: int,
+              max_contracts: int) -> PerformanceAccumulator:
+    """
+    Simulate all days in order, carrying equity across days like multi_day_backtest.py.
+
+    Returns:
+        Accumulator over every trade's PnL in points
+    """
+    equity = equity_start
+    acc = PerformanceAccumulator()
+    for arrays in signal_days:
+        trades = simulate_trades_arrays(*arrays, equity_start=equity, risk_pct=risk_pct,
+                                        cooldown_bars=cooldown_bars, max_contracts=max_contracts)
+        if len(trades['pnl']):
+            acc.merge(PerformanceAccumulator.from_pnl(trades['pnl']))
+            equity += trades['pnl'].sum()
+    return acc
+
+
+def _init_worker(days: Union[List[Dict[str, np.ndarray]], SharedDays]):
+    global _DAYS
+    # A SharedDays arrives here attached to the parent's blocks, not copied
+    _DAYS = days.days if isinstance(days, SharedDays) else days
+    _ZSCORES.clear()
+
+
+@contextmanager
+def worker_pool(days: List[pd.DataFrame], base_config: VWAPConfig = VWAPConfig(),
+                processes: int = None) -> Iterator[Optional[ProcessPoolExecutor]]:
+    """
+    Precompute `days` and make them the days tasks are evaluated on.
+
+    With processes == 1 this process is set up and None is yielded. Otherwise
+    the precomputed arrays are published to shared memory once and a process
+    pool is yielded whose workers attach to them, so memory does not grow with
+    the worker count under any start method (fork, spawn or forkserver).
+    """
+    if processes == 1:
+        _init_worker([precompute_day(df, base_config) for df in days])
+        yield None
+        return
+    with SharedDays.publish([precompute_day(df, base_config) for df in days]) as shared:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(shared,)) as pool:
+            yield pool
+
+
+def _evaluate_combinations(params, trade_grid, equity_start: float, days: slice = slice(None)) -> List[dict]:
+    """
+    Evaluate every trade-parameter combination for one set of signal parameters
+    over the worker's days selected by `days`.
+    """
+    window, span, threshold, throttle_bars = params
+    signal_days = [
+        _signal_day(day, zscore_smooth, threshold, throttle_bars)
+        for day, zscore_smooth in zip(_DAYS[days], _smoothed_zscores(window, span)[days])
+    ]
+
+    rows = []
+    for risk_pct, cooldown_bars, max_contracts in itertools.product(*trade_grid):
+        acc = _run_days(signal_days, equity_start, risk_pct, cooldown_bars, max_contracts)
+        row = {
+            'window': window, 'zscore_threshold': threshold, 'zscore_smooth_span': span,
+            'throttle_bars': throttle_bars, 'risk_pct': risk_pct,
+            'cooldown_bars': cooldown_bars, 'max_contracts': max_contracts,
+        }
+        row.update(acc.result().as_dict())
+        rows.append(row)
+    return rows
+
+
+def _sweep_task(task) -> List[dict]:
+    return _evaluate_combinations(*task)
+
+
+def normalize_grid(grid: Dict[str, Sequence]) -> Dict[str, list]:
+    """
+    Validate a parameter grid and fill in defaults for missing parameters.
+    """
+    unknown = set(grid) - set(DEFAULT_GRID)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    return {name: list(grid.get(name, default)) for name, default in DEFAULT_GRID.items()}
+
+
+def signal_combinations(grid: Dict[str, list]) -> List[tuple]:
+    """
+    (window, span, threshold, throttle_bars) tuples, ordered so equal window/span pairs are adjacent.
+    """
+    return list(itertools.product(
+        grid['window'], grid['zscore_smooth_span'], grid['zscore_threshold'], grid['throttle_bars']
+    ))
+
+
+def run_sweep(
+    days: List[pd.DataFrame],
+    grid: Dict[str, Sequence],
+    base_config: VWAPConfig = VWAPConfig(),
+    equity_start: float = 5000,
+    processes: int = None
+) -> pd.DataFrame:
+    """
+    Backtest every combination of a parameter grid over a list of days.
+
+    Args:
+        days: Per-day OHLCV DataFrames in chronological order
+        grid: Mapping of parameter name to candidate values; any of
+            SIGNAL_PARAMS and TRADE_PARAMS, missing ones use their defaults
+        base_config: Session settings used for the VWAP
+        equity_start: Starting equity in USD
+        processes: Worker processes (None = CPU count, 1 = run in-process)
+
+    Returns:
+        DataFrame with one row per combination: the parameters followed by
+        the metrics from evaluate_performance
+    """
+    grid = normalize_grid(grid)
+    trade_grid = [grid[name] for name in TRADE_PARAMS]
+    # Tasks for the same window/span are adjacent so workers reuse their z-scores
+    tasks = [(params, trade_grid, equity_start) for params in signal_combinations(grid)]
+
+    workers = 1 if len(tasks) == 1 else processes or os.cpu_count()
+    with worker_pool(days, base_config, workers) as pool:
+        if pool is None:
+            results = [_sweep_task(task) for task in tasks]
+        else:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = list(pool.map(_sweep_task, tasks, chunksize=chunksize))
+
+    columns = list(SIGNAL_PARAMS) + list(TRADE_PARAMS) + METRIC_NAMES
+    return pd.DataFrame([row for rows in results for row in rows], columns=columns)
+
+
+def sweep_config(row: pd.Series, base_config: VWAPConfig = VWAPConfig()) -> VWAPConfig:
+    """
+    Rebuild the VWAPConfig for one row of a sweep results table.
+    """
+    return replace(
+        base_config,
+        window=int(row['window']),
+        zscore_threshold=float(row['zscore_threshold']),
+        zscore_smooth_span=int(row['zscore_smooth_span']),
+        throttle_bars=int(row['throttle_bars']),
+    )
+
+
+def add_grid_arguments(parser: argparse.ArgumentParser):
+    """
+    Add one multi-value option per sweep parameter (e.g. --window 20 30 40).
+    """
+    parser.add_argument('--window', type=int, nargs='+', default=DEFAULT_GRID['window'])
+    parser.add_argument('--zscore-threshold', type=float, nargs='+', default=DEFAULT_GRID['zscore_threshold'])
+    parser.add_argument('--zscore-smooth-span', type=int, nargs='+', default=DEFAULT_GRID['zscore_smooth_span'])
+    parser.add_argument('--throttle-bars', type=int, nargs='+', default=DEFAULT_GRID['throttle_bars'])
+    parser.add_argument('--risk-pct', type=float, nargs='+', default=DEFAULT_GRID['risk_pct'])
+    parser.add_argument('--cooldown-bars', type=int, nargs='+', default=DEFAULT_GRID['cooldown_bars'])
+    parser.add_argument('--max-contracts', type=int, nargs='+', default=DEFAULT_GRID['max_contracts'])
+
+
+def grid_from_args(args: argparse.Namespace) -> Dict[str, list]:
+    return {name: getattr(args, name) for name in DEFAULT_GRID}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parameter sweep for the VWAP z-score strategy")
+    parser.add_argument('--data', default='data/', help="Directory with per-day CSV files")
+    parser.add_argument('--shared', default=None, help="Read bars published by 'python -m src share' under this name")
+    add_grid_arguments(parser)
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--sort-by', default='total_pnl', choices=METRIC_NAMES)
+    parser.add_argument('--out', default=None, help="Write the results table to this CSV path")
+    args = parser.parse_args(argv)
+
+    results = run_sweep(load_days(args.data, shared=args.shared), grid_from_args(args), equity_start=args.equity,
+                        processes=args.processes)
+    results = results.sort_values(args.sort_by, ascending=False, ignore_index=True)
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+    print(results.head(20).to_string())
+    return results
+
+
+if __name__ == "__main__":
+    main()
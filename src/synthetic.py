@@ -0,0 +1,109 @@
+"""
+Seeded synthetic MES 1-minute bars.
+
+Generates Globex sessions on CME trade dates (17:00 CT the prior evening to
+16:00 CT, or 12:00 CT on early-close holidays) with the same columns as the
+per-day CSV files, so the pipeline can be exercised and benchmarked at any
+scale without market data.
+"""
+import os
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .store import BAR_COLUMNS
+from .trading_calendar import CME_EQUITY_CALENDAR, early_closes
+
+TICK_SIZE = 0.25
+SESSION_OPEN = 17 * 60        # minutes after midnight, prior evening
+SESSION_CLOSE = 16 * 60
+EARLY_CLOSE = 12 * 60
+MEAN_REVERSION = 0.998     # per-bar AR(1) coefficient of the price around the session open
+
+
+def synthetic_trade_dates(n_days: int, start: date = date(2020, 1, 2)) -> List[date]:
+    """The first `n_days` CME trade dates on or after `start`."""
+    days = []
+    while len(days) < n_days:
+        end = start + timedelta(days=2 * (n_days - len(days)) + 7)
+        days.extend(CME_EQUITY_CALENDAR.trading_days(start, end)[:n_days - len(days)])
+        start = end + timedelta(days=1)
+    return days
+
+
+def _session_minutes(day: date) -> np.ndarray:
+    close = EARLY_CLOSE if day in early_closes(day.year) else SESSION_CLOSE
+    return np.arange(SESSION_OPEN - 24 * 60, close)
+
+
+def synthetic_session(day: date, rng: np.random.Generator, start_price: float,
+                      tz: str = "America/Chicago") -> pd.DataFrame:
+    """
+    One session of bars for trade date `day`, opening at `start_price`.
+
+    Prices follow a random walk on the tick grid with a U-shaped intraday
+    volatility and volume profile (quiet overnight, busy after the 08:30 CT
+    cash open and into the close) and a weak pull towards the session open,
+    so the VWAP z-score strategy produces a realistic number of signals.
+    """
+    minutes = _session_minutes(day)
+    n = len(minutes)
+    # Activity profile: overnight ~0.3, cash session ~1, spikes at the open and close
+    cash = (minutes >= 8 * 60 + 30)
+    activity = np.where(cash, 1.0, 0.3)
+    activity += cash * (1.5 * np.exp(-(minutes - 510) / 20.0) + 0.8 * np.exp((minutes - minutes[-1]) / 15.0))
+
+    sigma = 0.6 * np.sqrt(activity)
+    steps = rng.standard_normal(n) * sigma
+    # AR(1) deviation from the session open, x[t] = phi * x[t-1] + step[t], in closed form
+    powers = MEAN_REVERSION ** np.arange(n)
+    path = powers * np.cumsum(steps / powers)
+
+    close = np.round((start_price + path) / TICK_SIZE) * TICK_SIZE
+    open_ = np.concatenate(([np.round(start_price / TICK_SIZE) * TICK_SIZE], close[:-1]))
+    wick = np.round(np.abs(rng.standard_normal((2, n))) * sigma * 0.5 / TICK_SIZE) * TICK_SIZE
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+
+    volume = np.floor(rng.lognormal(np.log(40 * activity), 0.8))
+    volume[rng.random(n) < np.where(cash, 0.0, 0.2)] = 0.0
+    bar_count = np.where(volume > 0, np.ceil(volume / 3), 0).astype(np.int64)
+    average = np.where(volume > 0, np.round((high + low + close) / 3, 6), close)
+
+    local = pd.Timestamp(day) + pd.to_timedelta(minutes, unit='min')
+    return pd.DataFrame({
+        'date': pd.DatetimeIndex(local).tz_localize(tz),
+        'open': open_, 'high': high, 'low': low, 'close': close,
+        'volume': volume, 'average': average, 'barCount': bar_count,
+    }, columns=list(BAR_COLUMNS))
+
+
+def synthetic_days(n_days: int, seed: int = 0, start: date = date(2020, 1, 2), start_price: float = 4000.0,
+                   tz: str = "America/Chicago") -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (day, DataFrame) pairs for `n_days` consecutive trade dates.
+
+    The same seed always produces the same bars; each session opens at the
+    previous session's close.
+    """
+    rng = np.random.default_rng(seed)
+    price = start_price
+    for day in synthetic_trade_dates(n_days, start):
+        df = synthetic_session(day, rng, price, tz)
+        price = float(df['close'].iloc[-1])
+        yield day.strftime("%Y%m%d"), df
+
+
+def write_synthetic_csv(data_path: str, n_days: int, seed: int = 0, symbol: str = "MES", **kwargs) -> List[str]:
+    """
+    Write synthetic sessions as `SYMBOL_YYYYMMDD.csv` files and return their paths.
+    """
+    os.makedirs(data_path, exist_ok=True)
+    paths = []
+    for day, df in synthetic_days(n_days, seed, **kwargs):
+        path = os.path.join(data_path, f"{symbol}_{day}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
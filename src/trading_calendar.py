@@ -0,0 +1,111 @@
+"""
+CME Globex equity index futures trading calendar.
+
+A trade date is a weekday whose Globex session (opening 17:00 CT the prior
+evening) is not cancelled by a full exchange closure. US holidays such as
+MLK Day or Thanksgiving only shorten the session and stay trade dates.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+
+def easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> Optional[date]:
+    # Sunday holidays move to Monday; Saturday holidays move to Friday except New Year's Day
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    if day.weekday() == 5:
+        return None if (day.month, day.day) == (1, 1) else day - timedelta(days=1)
+    return day
+
+
+def closures(year: int) -> Dict[date, str]:
+    """Full closures: trade dates with no Globex equity session."""
+    days = {
+        _observed(date(year, 1, 1)): "New Year's Day",
+        easter_sunday(year) - timedelta(days=2): "Good Friday",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    return {d: name for d, name in days.items() if d is not None}
+
+
+def early_closes(year: int) -> Dict[date, str]:
+    """Holiday trade dates whose session halts early (around 12:00 CT)."""
+    days = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Presidents' Day",
+        _last_weekday(year, 5, 0): "Memorial Day",
+        _observed(date(year, 6, 19)) if year >= 2022 else None: "Juneteenth",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+    }
+    return {d: name for d, name in days.items() if d is not None}
+
+
+class TradingCalendar:
+    """
+    Trade dates for CME equity index futures.
+
+    Args:
+        extra_closures: Additional full-closure dates (e.g. special market closures)
+    """
+
+    def __init__(self, extra_closures: Iterable[date] = ()):
+        self.extra_closures = set(extra_closures)
+        self._closures: Dict[int, Dict[date, str]] = {}
+
+    def closures(self, year: int) -> Dict[date, str]:
+        if year not in self._closures:
+            self._closures[year] = closures(year)
+        return self._closures[year]
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.closures(day.year) and day not in self.extra_closures
+
+    def trading_days(self, start: date, end: date) -> List[date]:
+        """Trade dates in [start, end], oldest first."""
+        days = []
+        day = start
+        while day <= end:
+            if self.is_trading_day(day):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def previous_trading_days(self, n: int, before: date) -> List[date]:
+        """The `n` trade dates strictly before `before`, oldest first."""
+        days = []
+        day = before
+        while len(days) < n:
+            day -= timedelta(days=1)
+            if self.is_trading_day(day):
+                days.append(day)
+        return days[::-1]
+
+
+CME_EQUITY_CALENDAR = TradingCalendar()
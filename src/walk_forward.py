@@ -0,0 +1,210 @@
+"""
+Walk-forward optimisation on top of the multi-day backtest.
+
+The day history is cut into consecutive train/test windows measured in
+trading days. On every train window the parameter grid is swept and the
+best configuration by the chosen objective is kept; it is then traded on
+the following, unseen test window. Train windows are optimised in parallel
+on per-day indicators computed once, and the test windows are stitched
+into one out-of-sample trade log and equity curve.
+"""
+import argparse
+import math
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .backtest import simulate_trades
+from .config import VWAPConfig
+from .metrics import METRIC_NAMES, PerformanceAccumulator, PerformanceResult
+from .signals import compute_vwap_zscore_signals
+from .shm import open_bars
+from .sweep import (SIGNAL_PARAMS, TRADE_PARAMS, _evaluate_combinations, add_grid_arguments, grid_from_args,
+                    normalize_grid, signal_combinations, worker_pool)
+
+
+@dataclass
+class WalkForwardResult:
+    windows: pd.DataFrame           # one row per fold: day ranges, chosen parameters, train/test metrics
+                                    # ('skipped' folds had no qualifying configuration and were not traded)
+    trades: pd.DataFrame            # stitched out-of-sample trade log
+    equity: pd.Series               # out-of-sample equity after each trade
+    performance: PerformanceResult  # metrics over all out-of-sample trades
+
+
+def make_windows(n_days: int, train_days: int, test_days: int, anchored: bool = False) -> List[Tuple[slice, slice]]:
+    """
+    Consecutive (train, test) day slices.
+
+    Test windows do not overlap and follow each other; a rolling train window
+    covers the `train_days` days before its test window, an anchored one
+    every day from the start of the history.
+    """
+    if train_days < 1 or test_days < 1:
+        raise ValueError("train_days and test_days must be positive")
+    windows = []
+    start = train_days
+    while start < n_days:
+        train = slice(0 if anchored else start - train_days, start)
+        windows.append((train, slice(start, min(start + test_days, n_days))))
+        start += test_days
+    return windows
+
+
+def _score(row: dict, objective: str, min_trades: int) -> float:
+    value = row[objective]
+    if row['total_trades'] < min_trades or value is None or math.isnan(value):
+        return -math.inf
+    return value
+
+
+def _train_window(task) -> Optional[dict]:
+    """
+    Sweep the grid over one train window and return the best row, or None
+    if no combination qualifies (e.g. all trade less than `min_trades`).
+    """
+    train, grid, equity_start, objective, min_trades = task
+    trade_grid = [grid[name] for name in TRADE_PARAMS]
+    best, best_score = None, -math.inf
+    for params in signal_combinations(grid):
+        for row in _evaluate_combinations(params, trade_grid, equity_start, train):
+            score = _score(row, objective, min_trades)
+            if score > best_score:
+                best, best_score = row, score
+    return best
+
+
+def walk_forward(
+    days: List[str],
+    frames: List[pd.DataFrame],
+    grid: Dict[str, Sequence],
+    train_days: int,
+    test_days: int,
+    anchored: bool = False,
+    objective: str = 'total_pnl',
+    min_trades: int = 1,
+    base_config: VWAPConfig = VWAPConfig(),
+    equity_start: float = 5000,
+    processes: int = None
+) -> WalkForwardResult:
+    """
+    Run a walk-forward optimisation.
+
+    Args:
+        days: Day labels ('YYYYMMDD'), oldest first
+        frames: OHLCV DataFrame for each day
+        grid: Parameter grid as accepted by run_sweep
+        train_days: Trading days per train window (the minimum for anchored windows)
+        test_days: Trading days per test window
+        anchored: Grow the train window from the first day instead of rolling it
+        objective: Metric from evaluate_performance to maximise on train windows
+        min_trades: Configurations with fewer train trades are never chosen; a
+            train window where none qualifies leaves its test window untraded
+        base_config: Session settings used for the VWAP
+        equity_start: Starting equity in USD
+        processes: Worker processes (None = CPU count, 1 = run in-process)
+
+    Returns:
+        WalkForwardResult
+    """
+    if objective not in METRIC_NAMES:
+        raise ValueError(f"Unknown objective: {objective!r}")
+    grid = normalize_grid(grid)
+    windows = make_windows(len(days), train_days, test_days, anchored)
+    if not windows:
+        raise ValueError("Not enough days for a single train/test window")
+
+    tasks = [(train, grid, equity_start, objective, min_trades) for train, _ in windows]
+    with worker_pool(frames, base_config, 1 if len(tasks) == 1 else processes) as pool:
+        chosen = list(pool.map(_train_window, tasks)) if pool else [_train_window(task) for task in tasks]
+
+    # Out-of-sample pass: sequential, so equity carries across test windows
+    equity = equity_start
+    rows, trade_logs, equity_curve = [], [], []
+    total = PerformanceAccumulator()
+    for number, ((train, test), best) in enumerate(zip(windows, chosen)):
+        row = {
+            'fold': number,
+            'train_start': days[train][0], 'train_end': days[train][-1],
+            'test_start': days[test][0], 'test_end': days[test][-1],
+            'skipped': best is None,
+        }
+        if best is None:
+            # Nothing qualified on the train window, so there is nothing to trade
+            rows.append(row)
+            continue
+        config = replace(base_config, **{name: best[name] for name in SIGNAL_PARAMS})
+        window_acc = PerformanceAccumulator()
+        for day, df in zip(days[test], frames[test]):
+            trades = simulate_trades(
+                compute_vwap_zscore_signals(df, config), equity_start=equity,
+                risk_pct=best['risk_pct'], cooldown_bars=best['cooldown_bars'],
+                max_contracts=best['max_contracts']
+            )
+            if trades.empty:
+                continue
+            trades['day'] = day
+            trades['fold'] = number
+            trade_logs.append(trades)
+            window_acc.merge(PerformanceAccumulator.from_pnl(trades['pnl']))
+            equity += trades['pnl'].sum()  # Use pnl in points, as in multi_day_backtest.py
+            equity_curve.extend(trades['equity_after'].tolist())
+        total.merge(window_acc)
+
+        row.update({name: best[name] for name in SIGNAL_PARAMS + TRADE_PARAMS})
+        row.update({f"train_{name}": best[name] for name in METRIC_NAMES})
+        row.update({f"test_{name}": value for name, value in window_acc.result().as_dict().items()})
+        rows.append(row)
+
+    trades = pd.concat(trade_logs, ignore_index=True) if trade_logs else pd.DataFrame()
+    return WalkForwardResult(
+        windows=pd.DataFrame(rows),
+        trades=trades,
+        equity=pd.Series(equity_curve, name='equity', dtype=float),
+        performance=total.result(),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation of the VWAP z-score strategy")
+    parser.add_argument('--data', default='data/', help="Directory with per-day CSV files")
+    parser.add_argument('--shared', default=None, help="Read bars published by 'python -m src share' under this name")
+    add_grid_arguments(parser)
+    parser.add_argument('--train-days', type=int, default=20)
+    parser.add_argument('--test-days', type=int, default=5)
+    parser.add_argument('--anchored', action='store_true', help="Anchor train windows at the first day")
+    parser.add_argument('--objective', default='total_pnl', choices=METRIC_NAMES)
+    parser.add_argument('--min-trades', type=int, default=1)
+    parser.add_argument('--equity', type=float, default=5000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--out-dir', default=None, help="Write windows.csv, oos_trades.csv and oos_equity.csv here")
+    args = parser.parse_args(argv)
+
+    store = open_bars(args.data, shared=args.shared)
+    days, frames = zip(*store.iter_days()) if len(store) else ((), ())
+    result = walk_forward(
+        list(days), list(frames), grid_from_args(args), args.train_days, args.test_days,
+        anchored=args.anchored, objective=args.objective, min_trades=args.min_trades,
+        equity_start=args.equity, processes=args.processes
+    )
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        result.windows.to_csv(os.path.join(args.out_dir, "windows.csv"), index=False)
+        result.trades.to_csv(os.path.join(args.out_dir, "oos_trades.csv"), index=False)
+        result.equity.to_frame().to_csv(os.path.join(args.out_dir, "oos_equity.csv"), index=False)
+
+    columns = ['fold', 'train_start', 'train_end', 'test_start', 'test_end', *SIGNAL_PARAMS, *TRADE_PARAMS,
+               f"train_{args.objective}", 'test_total_trades', 'test_total_pnl']
+    print(result.windows.reindex(columns=columns).to_string(index=False))
+    skipped = result.windows.loc[result.windows['skipped'], 'fold'].tolist()
+    if skipped:
+        print(f"⚠️ Folds {skipped} skipped: no configuration reached {args.min_trades} train trades")
+    print(result.performance.render())
+    return result
+
+
+if __name__ == "__main__":
+    main()
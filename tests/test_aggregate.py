@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.aggregate import TimeBarAggregator, VolumeBarAggregator, ticks_to_records
+
+
+def _ticks(times, prices, sizes):
+    ns = pd.DatetimeIndex(pd.to_datetime(times, utc=True)).as_unit('ns').asi8
+    return ticks_to_records(ns, np.asarray(prices, dtype=float), np.asarray(sizes, dtype=float))
+
+
+def test_time_bar_stamped_at_bucket_start():
+    records = _ticks(["2025-04-16T22:31:03Z", "2025-04-16T22:31:20Z", "2025-04-16T22:31:59Z"],
+                     [5400.0, 5402.0, 5401.0], [1, 2, 3])
+    bars = pd.concat(TimeBarAggregator(60).aggregate([records]), ignore_index=True)
+
+    assert len(bars) == 1
+    assert bars['date'][0] == pd.Timestamp("2025-04-16 17:31:00", tz="America/Chicago")
+    assert (bars['open'][0], bars['high'][0], bars['low'][0], bars['close'][0]) == (5400.0, 5402.0, 5400.0, 5401.0)
+    assert bars['volume'][0] == 6
+
+
+def test_time_bar_stamp_independent_of_chunking():
+    times = ["2025-04-16T22:31:03Z", "2025-04-16T22:31:40Z", "2025-04-16T22:32:07Z", "2025-04-16T22:32:58Z"]
+    records = _ticks(times, [1.0, 2.0, 3.0, 4.0], [1, 1, 1, 1])
+    whole = pd.concat(TimeBarAggregator(60).aggregate([records]), ignore_index=True)
+    chunks = [{name: values[i:i + 1] for name, values in records.items()} for i in range(len(times))]
+    split = pd.concat(TimeBarAggregator(60).aggregate(chunks), ignore_index=True)
+
+    pd.testing.assert_frame_equal(whole, split)
+    assert list(whole['date'].dt.strftime("%H:%M:%S")) == ["17:31:00", "17:32:00"]
+
+
+def test_volume_bar_stamped_at_first_record():
+    records = _ticks(["2025-04-16T22:31:03Z", "2025-04-16T22:31:20Z"], [1.0, 2.0], [5, 5])
+    bars = pd.concat(VolumeBarAggregator(10).aggregate([records]), ignore_index=True)
+
+    assert bars['date'][0] == pd.Timestamp("2025-04-16 17:31:03", tz="America/Chicago")
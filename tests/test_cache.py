@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import cache
+from src.cache import SignalCache, frame_key
+from src.config import VWAPConfig
+
+
+def _bars(n=120):
+    dates = pd.date_range("2025-04-14 17:00", periods=n, freq="1min", tz="America/Chicago")
+    close = 5400 + np.cumsum(np.random.default_rng(1).choice([-0.25, 0, 0.25], n))
+    return pd.DataFrame({'date': dates, 'close': close, 'volume': np.arange(1, n + 1)})
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pickle", b"\x80\x05garbage"])
+def test_corrupt_file_is_a_miss_and_removed(tmp_path, content):
+    store = SignalCache(str(tmp_path))
+    df = _bars()
+    key = frame_key(df, VWAPConfig())
+    (tmp_path / f"{key}.pkl").write_bytes(content)
+
+    frame = store.compute(df)
+
+    assert store.stats.misses == 1 and store.stats.disk_hits == 0
+    assert len(frame)
+    # The recomputed frame replaced the bad file
+    pd.testing.assert_frame_equal(SignalCache(str(tmp_path)).compute(df), frame)
+
+
+def test_key_follows_signal_source(monkeypatch):
+    df = _bars()
+    key = frame_key(df, VWAPConfig())
+    monkeypatch.setattr(cache, "CODE_VERSION", "edited")
+    assert frame_key(df, VWAPConfig()) != key
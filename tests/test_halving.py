@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from src.halving import successive_halving
+
+
+def _days(n_days=4, n=240):
+    rng = np.random.default_rng(5)
+    frames = []
+    for d in range(n_days):
+        dates = pd.date_range(f"2025-04-{14 + d} 17:00", periods=n, freq="1min", tz="America/Chicago")
+        close = 5400 + np.cumsum(rng.choice([-0.5, -0.25, 0, 0.25, 0.5], n))
+        frames.append(pd.DataFrame({'date': dates, 'open': close, 'high': close + 0.5, 'low': close - 0.5,
+                                    'close': close, 'volume': rng.integers(1, 50, n)}))
+    return frames
+
+
+def test_best_keeps_integer_parameters():
+    grid = {'window': [20, 30], 'zscore_threshold': [1.0, 1.5], 'throttle_bars': [5, 15]}
+    result = successive_halving(_days(), grid, n_candidates=8, min_days=2, eta=2, processes=1, verbose=False)
+
+    for name in ('candidate', 'window', 'throttle_bars', 'rung', 'days'):
+        assert type(result.best[name]) is int, name
+    assert result.best['candidate'] == result.leaderboard['candidate'].iloc[0]
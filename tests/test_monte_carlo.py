@@ -0,0 +1,30 @@
+import numpy as np
+
+from src.monte_carlo import monte_carlo
+
+
+def _pnl():
+    return np.random.default_rng(1).normal(0.3, 7.1, 500)
+
+
+def test_permutation_reports_no_worse_paths_for_order_invariant_statistics():
+    result = monte_carlo(_pnl(), n_paths=2000, method='permutation', seed=0)
+    summary = result.summary()
+
+    # Summing reordered trades differs from the observed total only by rounding
+    np.testing.assert_allclose(result.samples['final_equity'], result.observed['final_equity'])
+    assert np.isnan(summary.loc['final_equity', 'pct_worse'])
+    assert np.isnan(summary.loc['sharpe', 'pct_worse'])
+    assert 0 < summary.loc['max_drawdown', 'pct_worse'] < 100
+
+
+def test_ties_within_tolerance_are_not_worse():
+    result = monte_carlo(_pnl(), n_paths=500, method='permutation', seed=0)
+    result.method = 'iid'
+    assert result.pct_worse('final_equity') == 0
+    assert result.pct_worse('sharpe') == 0
+
+
+def test_bootstrap_counts_worse_paths():
+    result = monte_carlo(_pnl(), n_paths=2000, method='iid', seed=0)
+    assert 20 < result.pct_worse('final_equity') < 80
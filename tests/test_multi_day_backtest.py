@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from src.backtest import TAKE_PROFIT
+from src.multi_day_backtest import run_backtest, run_config
+from src.registry import config_hash
+from src.store import BarStore
+
+
+class AlwaysTarget:
+    """Resolver stub: every ambiguous bar reached the target first."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def first_touch(self, bar_ns, side, sl, tp):
+        self.calls += 1
+        return TAKE_PROFIT
+
+
+def _store(tmp_path, n_days=3, n=300):
+    rng = np.random.default_rng(11)
+    store = BarStore(str(tmp_path), "MES")
+    for d in range(n_days):
+        dates = pd.date_range(f"2025-04-{14 + d} 17:00", periods=n, freq="1min", tz="America/Chicago")
+        close = 5400 + np.cumsum(rng.choice([-1.0, -0.5, 0, 0.5, 1.0], n))
+        # Occasional spikes wide enough to touch both stop and target
+        spike = np.where(np.arange(n) % 10 == 9, 40.0, 0.5)
+        store.ingest_frame(f"202504{15 + d}", pd.DataFrame({
+            'date': dates, 'open': close, 'high': close + spike, 'low': close - spike, 'close': close,
+            'volume': rng.integers(1, 50, n).astype(float), 'average': close, 'barCount': np.ones(n),
+        }))
+    return store
+
+
+def test_resolver_reaches_simulate_trades(tmp_path):
+    store = _store(tmp_path)
+    plain, _ = run_backtest(store)
+    resolver = AlwaysTarget()
+    resolved, _ = run_backtest(store, resolver=resolver)
+
+    assert resolver.calls > 0
+    assert resolved['pnl'].sum() > plain['pnl'].sum()
+
+
+def test_run_config_records_resolver():
+    plain = run_config("MES")
+    assert 'fills' not in plain
+    with_fills = run_config("MES", fills={'bar_size': '5s', 'bars': 'abc'})
+    assert config_hash(with_fills) != config_hash(plain)
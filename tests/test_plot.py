@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("plotly")
+
+from src.plot import plot_candles_with_vwap
+
+
+def _bars():
+    dates = pd.date_range("2025-04-16 17:00", periods=120, freq="1min", tz="America/Chicago")
+    close = pd.Series(range(120), dtype=float) + 5400
+    return pd.DataFrame({'date': dates, 'open': close, 'high': close + 1, 'low': close - 1,
+                         'close': close, 'volume': 10})
+
+
+def _trades(aware: bool):
+    times = pd.to_datetime(["2025-04-16 17:10", "2025-04-16 17:20", "2025-04-16 18:30", "2025-04-16 18:40"])
+    times = times.tz_localize("America/Chicago").tz_convert("UTC")
+    if not aware:
+        # As multi_day_backtest.plot_day and the plot command pass them: naive UTC
+        times = times.tz_localize(None)
+    return pd.DataFrame({'type': ['long', 'short'], 'entry_time': times[[0, 2]], 'entry_price': [5410.0, 5490.0],
+                         'exit_time': times[[1, 3]], 'exit_price': [5420.0, 5480.0], 'pnl': [10.0, 10.0],
+                         'result': ['target', 'target']})
+
+
+@pytest.mark.parametrize("aware", [False, True])
+def test_windowed_plot_filters_trades(tmp_path, aware):
+    fig = plot_candles_with_vwap(_bars(), _trades(aware), start="2025-04-16 17:00", end="2025-04-16 17:30",
+                                 output=str(tmp_path / "chart.html"))
+
+    traces = {trace.name: trace for trace in fig.data}
+    assert len(traces['Long Entry'].x) == 1
+    assert len(traces['Short Entry'].x) == 0
+    assert pd.Timestamp(traces['Long Entry'].x[0]) == pd.Timestamp("2025-04-16 17:10", tz="America/Chicago")
+    assert (tmp_path / "chart.html").exists()
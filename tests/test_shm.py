@@ -0,0 +1,52 @@
+import multiprocessing as mp
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from src import sweep
+from src.shm import SharedDays
+from src.sweep import run_sweep, worker_pool
+
+
+def _days(n_days=3, n=240):
+    rng = np.random.default_rng(0)
+    frames = []
+    for d in range(n_days):
+        dates = pd.date_range(f"2025-04-{14 + d} 17:00", periods=n, freq="1min", tz="America/Chicago")
+        close = 5400 + np.cumsum(rng.choice([-0.5, -0.25, 0, 0.25, 0.5], n))
+        frames.append(pd.DataFrame({'date': dates, 'open': close, 'high': close + 0.5, 'low': close - 0.5,
+                                    'close': close, 'volume': rng.integers(1, 50, n)}))
+    return frames
+
+
+def _probe(_):
+    values = sweep._DAYS[1]['close']
+    return values.flags.writeable, float(values[0])
+
+
+def test_shared_days_round_trip():
+    days = [{'a': np.arange(n, dtype=np.float64), 'b': np.arange(n, dtype=np.int32)} for n in (3, 0, 5)]
+    with SharedDays.publish(days) as shared:
+        attached = pickle.loads(pickle.dumps(shared))
+        assert len(attached) == 3
+        for got, want in zip(attached.days, days):
+            for key in want:
+                np.testing.assert_array_equal(got[key], want[key])
+                assert got[key].dtype == want[key].dtype
+                assert not got[key].flags.writeable
+        attached.close()
+
+
+def test_spawned_workers_attach_to_shared_days(monkeypatch):
+    monkeypatch.setattr(sweep, "ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=mp.get_context("spawn")))
+    days = _days()
+    grid = {'window': [20, 30], 'zscore_threshold': [1.0, 1.5]}
+    pd.testing.assert_frame_equal(run_sweep(days, grid, processes=2), run_sweep(days, grid, processes=1))
+
+    first_close = float(sweep.precompute_day(days[1])['close'][0])
+    with worker_pool(days, processes=2) as pool:
+        # Workers attach read-only instead of unpickling writable copies
+        assert set(pool.map(_probe, range(4))) == {(False, first_close)}
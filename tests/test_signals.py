@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import VWAPConfig
+from src.signals import compute_vwap_zscore_signals
+from src.streaming import verify_against_batch
+
+
+def _sessions(n_days=4, n=300):
+    rng = np.random.default_rng(7)
+    frames = []
+    for d in range(n_days):
+        dates = pd.date_range(f"2025-04-{14 + d} 17:00", periods=n, freq="1min", tz="America/Chicago")
+        close = 5400 + d * 20 + np.cumsum(rng.choice([-0.5, -0.25, 0, 0.25, 0.5], n))
+        frames.append(pd.DataFrame({'date': dates, 'open': close, 'high': close + 0.5, 'low': close - 0.5,
+                                    'close': close, 'volume': rng.integers(1, 50, n)}))
+    return frames
+
+
+CONFIGS = [VWAPConfig(window=20, zscore_threshold=1.0, throttle_bars=15),
+           VWAPConfig(window=50, zscore_threshold=1.5, throttle_bars=100)]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("copy", [True, False])
+def test_concatenated_sessions_match_per_day(config, copy):
+    days = _sessions()
+    combined = pd.concat(days, ignore_index=True)
+
+    got = compute_vwap_zscore_signals(combined, config, copy=copy)
+    offsets = np.cumsum([0] + [len(d) for d in days[:-1]])
+    want = pd.concat([compute_vwap_zscore_signals(d.set_axis(d.index + o), config, copy=copy)
+                      for d, o in zip(days, offsets)])
+
+    assert got['long_signal'].any() and got['short_signal'].any()
+    pd.testing.assert_frame_equal(got, want, check_exact=False, rtol=1e-9, atol=1e-9)
+    for name in ('long_signal', 'short_signal', 'signal'):
+        pd.testing.assert_series_equal(got[name], want[name], check_exact=True)
+
+
+def test_streaming_matches_batch_across_sessions():
+    combined = pd.concat(_sessions(n_days=3), ignore_index=True)
+    assert verify_against_batch(combined, CONFIGS[0]).empty
@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.store import BAR_COLUMNS, COMPACT_COLUMNS, BarStore
+
+
+def _bars(day_start: str, n: int = 30, average_offset: float = 0.0) -> pd.DataFrame:
+    dates = pd.date_range(day_start, periods=n, freq="1min", tz="America/Chicago")
+    close = 5400 + np.arange(n) * 0.25
+    return pd.DataFrame({
+        'date': dates.strftime("%Y-%m-%d %H:%M:%S%z").str.replace(r"(\d\d)(\d\d)$", r"\1:\2", regex=True),
+        'open': close, 'high': close + 0.5, 'low': close - 0.5, 'close': close,
+        'volume': np.arange(n, dtype=float), 'average': close + average_offset, 'barCount': np.arange(n),
+    })
+
+
+def test_ingest_writes_compact_dtypes(tmp_path):
+    store = BarStore(str(tmp_path), "MES")
+    df = _bars("2025-04-16 17:00")
+    store.ingest_frame("20250417", df)
+
+    arrays = store.load_arrays()
+    assert {name: arrays[name].dtype.name for name in COMPACT_COLUMNS} == COMPACT_COLUMNS
+    np.testing.assert_array_equal(arrays['close'], df['close'])
+    np.testing.assert_array_equal(arrays['volume'], df['volume'])
+
+
+def test_column_widened_when_values_do_not_fit(tmp_path):
+    store = BarStore(str(tmp_path), "MES")
+    first = _bars("2025-04-16 17:00")
+    second = _bars("2025-04-17 17:00", average_offset=0.1)
+    store.ingest_frame("20250417", first)
+    store.ingest_frame("20250418", second)
+
+    assert store._index['columns']['average'] == BAR_COLUMNS['average']
+    assert store._index['columns']['close'] == COMPACT_COLUMNS['close']
+    reopened = BarStore(str(tmp_path), "MES")
+    np.testing.assert_array_equal(reopened.load_arrays("20250417", "20250417")['average'], first['average'])
+    np.testing.assert_array_equal(reopened.load_arrays("20250418", "20250418")['average'], second['average'])
+
+
+def test_sync_narrows_a_wide_store(tmp_path):
+    root = tmp_path / "store"
+    store = BarStore(str(root), "MES")
+    store._index['columns'] = dict(BAR_COLUMNS)
+    del store._index['compact']
+    df = _bars("2025-04-16 17:00")
+    store.ingest_frame("20250417", df)
+    assert json.loads((root / "MES" / "index.json").read_text())['columns']['close'] == 'float64'
+
+    store = BarStore(str(root), "MES")
+    store.sync_csv_dir(str(tmp_path))
+
+    assert store._index['columns']['close'] == 'float32'
+    assert (root / "MES" / "close.bin").stat().st_size == len(df) * 4
+    frame = store.load_frame()
+    np.testing.assert_array_equal(frame['close'], df['close'])
+
+
+def test_interrupted_ingest_does_not_misalign_later_days(tmp_path, monkeypatch):
+    store = BarStore(str(tmp_path), "MES")
+    first, second, third = (_bars(f"2025-04-{d} 17:00", n) for d, n in ((15, 30), (16, 20), (17, 25)))
+    store.ingest_frame("20250416", first)
+
+    def crash():
+        raise KeyboardInterrupt
+    # Every column is appended, then the process dies before the index is saved
+    monkeypatch.setattr(store, "_save_index", crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.ingest_frame("20250417", second)
+    assert (tmp_path / "MES" / "date.bin").stat().st_size == (len(first) + len(second)) * 8
+
+    store = BarStore(str(tmp_path), "MES")
+    assert store.days == ["20250416"]
+    # A partial write of another column on top of the orphaned rows
+    with open(tmp_path / "MES" / "close.bin", "ab") as f:
+        f.write(b"\0" * 6)
+    store.ingest_frame("20250417", second)
+    store.ingest_frame("20250418", third)
+
+    store = BarStore(str(tmp_path), "MES")
+    for day, df in zip(store.days, (first, second, third)):
+        frame = store.load_frame(day, day)
+        np.testing.assert_array_equal(frame['close'], df['close'])
+        np.testing.assert_array_equal(frame['volume'], df['volume'])
+        assert frame['date'].iloc[0] == pd.Timestamp(df['date'].iloc[0])
+    assert (tmp_path / "MES" / "close.bin").stat().st_size == store._index['rows'] * 4
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.signals import _throttle_mask, throttle_signals
+
+
+def legacy_throttle_signals(long_signals, short_signals, throttle_bars):
+    """The bar-by-bar loop throttle_signals replaced, kept as the reference."""
+    throttled_long = pd.Series(False, index=long_signals.index)
+    throttled_short = pd.Series(False, index=short_signals.index)
+
+    last_long = -np.inf
+    last_short = -np.inf
+
+    for i in range(len(long_signals)):
+        if long_signals.iloc[i] and (i - last_long >= throttle_bars):
+            throttled_long.iloc[i] = True
+            last_long = i
+        if short_signals.iloc[i] and (i - last_short >= throttle_bars):
+            throttled_short.iloc[i] = True
+            last_short = i
+
+    return throttled_long, throttled_short
+
+
+N = 300
+THROTTLES = [0, 1, 2, 3, 5, 10, 37, N, N + 50]
+
+
+def _random_masks(seed, n=N):
+    rng = np.random.default_rng(seed)
+    density = rng.uniform(0.0, 0.6)
+    # Shuffled index: the throttle counts bars by position, not by label
+    index = pd.Index(rng.permutation(n) * 3)
+    return (pd.Series(rng.random(n) < density, index=index),
+            pd.Series(rng.random(n) < density, index=index))
+
+
+@pytest.mark.parametrize("throttle_bars", THROTTLES)
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_legacy_loop(seed, throttle_bars):
+    long_signals, short_signals = _random_masks(seed)
+
+    got_long, got_short = throttle_signals(long_signals, short_signals, throttle_bars)
+    want_long, want_short = legacy_throttle_signals(long_signals, short_signals, throttle_bars)
+
+    pd.testing.assert_series_equal(got_long, want_long)
+    pd.testing.assert_series_equal(got_short, want_short)
+
+
+@pytest.mark.parametrize("throttle_bars", THROTTLES)
+@pytest.mark.parametrize("n", [0, 1, 2])
+def test_short_series(n, throttle_bars):
+    long_signals, short_signals = _random_masks(n, n)
+    long_signals[:] = True
+
+    got = throttle_signals(long_signals, short_signals, throttle_bars)
+    want = legacy_throttle_signals(long_signals, short_signals, throttle_bars)
+
+    for g, w in zip(got, want):
+        pd.testing.assert_series_equal(g, w)
+
+
+@pytest.mark.parametrize("throttle_bars", THROTTLES)
+@pytest.mark.parametrize("seed", range(10))
+def test_segments_throttled_separately(seed, throttle_bars):
+    rng = np.random.default_rng(100 + seed)
+    mask = rng.random(N) < 0.4
+    starts = np.zeros(N, dtype=bool)
+    starts[0] = True
+    starts[rng.choice(np.arange(1, N), size=5, replace=False)] = True
+
+    bounds = np.append(np.flatnonzero(starts), N)
+    want = np.concatenate([
+        legacy_throttle_signals(pd.Series(mask[a:b]), pd.Series(mask[a:b]), throttle_bars)[0].to_numpy()
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ])
+
+    np.testing.assert_array_equal(_throttle_mask(mask, throttle_bars, starts), want)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from src.walk_forward import walk_forward
+
+
+def _days(n_days=6, n=240):
+    rng = np.random.default_rng(3)
+    frames = []
+    for d in range(n_days):
+        dates = pd.date_range(f"2025-04-{7 + d} 17:00", periods=n, freq="1min", tz="America/Chicago")
+        close = 5400 + np.cumsum(rng.choice([-0.5, -0.25, 0, 0.25, 0.5], n))
+        frames.append(pd.DataFrame({'date': dates, 'open': close, 'high': close + 0.5, 'low': close - 0.5,
+                                    'close': close, 'volume': rng.integers(1, 50, n)}))
+    return [f"202504{7 + d:02d}" for d in range(n_days)], frames
+
+
+GRID = {'window': [20, 30], 'zscore_threshold': [1.0, 1.5]}
+
+
+def test_window_without_qualifying_configuration_is_skipped():
+    days, frames = _days()
+    result = walk_forward(days, frames, GRID, train_days=2, test_days=2, min_trades=10**6, processes=1)
+
+    assert result.windows['skipped'].all()
+    assert 'window' not in result.windows
+    assert result.trades.empty and result.equity.empty
+    assert result.performance.total_trades == 0
+
+
+def test_qualifying_windows_are_traded():
+    days, frames = _days()
+    result = walk_forward(days, frames, GRID, train_days=2, test_days=2, processes=1)
+
+    assert not result.windows['skipped'].any()
+    assert set(result.trades['fold']) <= set(result.windows['fold'])
+    assert (result.windows['train_total_trades'] >= 1).all()